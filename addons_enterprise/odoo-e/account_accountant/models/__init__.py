@@ -7,6 +7,8 @@ from . import account_chart_template
 from . import account_fiscal_year
 from . import account_journal_dashboard
 from . import account_move
+from . import account_move_line_matching_token
+from . import account_partial_reconcile
 from . import account_payment
 from . import account_reconcile_model
 from . import account_reconcile_model_line
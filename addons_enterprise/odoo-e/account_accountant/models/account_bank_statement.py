@@ -12,6 +12,9 @@ from markupsafe import Markup
 
 _logger = logging.getLogger(__name__)
 
+# Number of statement lines whose invoice matching candidates are computed at once by the auto-reconciliation CRON.
+AUTO_RECONCILE_MATCHING_BATCH_SIZE = 500
+
 class AccountBankStatement(models.Model):
     _name = "account.bank.statement"
     _inherit = ['mail.thread.main.attachment', 'account.bank.statement']
@@ -133,6 +136,14 @@ class AccountBankStatementLine(models.Model):
         # concurrent update in order to avoid the whole transaction to be rollbacked.
         self.env.cr.execute("SELECT 1 FROM account_bank_statement_line WHERE id in %s FOR UPDATE", [tuple(st_lines.ids)])
 
+        # The 'invoice_matching' rules are evaluated by batch of statement lines: their candidates are computed at once using a
+        # single token join, then only refined for each statement line by the bank reconciliation widget.
+        invoice_matching_models = self.env['account.reconcile.model'].search([
+            ('rule_type', '=', 'invoice_matching'),
+            ('company_id', 'in', st_lines.company_id.ids),
+        ])
+        invoice_matching_candidate_ids = {}
+
         nb_auto_reconciled_lines = 0
         for index, st_line in enumerate(st_lines):
             # we want the cron to run only for limit_time seconds
@@ -140,7 +151,14 @@ class AccountBankStatementLine(models.Model):
                 remaining_line_id = st_line.id
                 st_lines = st_lines[:index]
                 break
-            wizard = self.env['bank.rec.widget'].with_context(default_st_line_id=st_line.id).new({})
+            if invoice_matching_models and index % AUTO_RECONCILE_MATCHING_BATCH_SIZE == 0:
+                invoice_matching_candidate_ids = invoice_matching_models._prefetch_invoice_matching_candidate_ids(
+                    st_lines[index:index + AUTO_RECONCILE_MATCHING_BATCH_SIZE].filtered(lambda line: not line.is_reconciled),
+                )
+            wizard = self.env['bank.rec.widget'].with_context(
+                default_st_line_id=st_line.id,
+                invoice_matching_candidate_ids=invoice_matching_candidate_ids,
+            ).new({})
             wizard._action_trigger_matching_rules()
             if wizard.state == 'valid' and wizard.matching_rules_allow_auto_reconcile:
                 try:
@@ -106,6 +106,19 @@ class AccountMove(models.Model):
         for invoice in invoice_with_signature:
             invoice.signature = invoice.signing_user.sudo().sign_signature
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        moves = super().create(vals_list)
+        self.env['account.move.line.matching.token']._refresh(moves.filtered(lambda m: m.state == 'posted').line_ids)
+        return moves
+
+    def write(self, vals):
+        res = super().write(vals)
+        # Posting an entry, resetting it to draft or changing its number or reference changes the tokens of its lines.
+        if {'state', 'name', 'ref'} & vals.keys():
+            self.env['account.move.line.matching.token']._refresh(self.line_ids)
+        return res
+
     def _post(self, soft=True):
         # Deferred management
         posted = super()._post(soft)
@@ -481,6 +494,12 @@ class AccountMoveLine(models.Model):
             )
         return sql_order
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        self.env['account.move.line.matching.token']._refresh(lines.filtered(lambda line: line.parent_state == 'posted'))
+        return lines
+
     def copy_data(self, default=None):
         data_list = super().copy_data(default=default)
         for line, values in zip(self, data_list):
@@ -504,7 +523,10 @@ class AccountMoveLine(models.Model):
                         "You cannot change the account for a deferred line in %(move_name)s if it has already been deferred.",
                         move_name=line.move_id.display_name
                     ))
-        return super().write(vals)
+        res = super().write(vals)
+        if 'name' in vals:
+            self.env['account.move.line.matching.token']._refresh(self.filtered(lambda line: line.parent_state == 'posted'))
+        return res
 
     # ============================= START - Deferred management ====================================
     def _compute_has_deferred_moves(self):
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models
+from odoo.tools import SQL, create_index, str2bool
+
+# Longer tokens are not indexed, as btree entries are limited in size. Statement lines having such a token are matched
+# without using the index.
+MATCHING_TOKEN_MAX_LENGTH = 256
+
+
+class AccountMoveLineMatchingToken(models.Model):
+    _name = 'account.move.line.matching.token'
+    _description = "Journal Items Matching Tokens"
+    _log_access = False
+
+    move_line_id = fields.Many2one(comodel_name='account.move.line', required=True, readonly=True, index=True, ondelete='cascade')
+    token = fields.Char(required=True, readonly=True)
+    kind = fields.Selection(
+        selection=[
+            ('numerical', "Numerical"),
+            ('exact', "Exact"),
+        ],
+        required=True,
+        readonly=True,
+        help="Numerical tokens are the digits-only words of the label, number and reference of the journal item's entry; "
+             "exact tokens are those values themselves.",
+    )
+
+    def init(self):
+        super().init()
+        create_index(
+            self.env.cr,
+            indexname='account_move_line_matching_token_token_idx',
+            tablename=self._table,
+            expressions=['token', 'kind', 'move_line_id'],
+        )
+
+    @api.model
+    def _is_enabled(self):
+        return str2bool(self.env['ir.config_parameter'].sudo().get_param('account_accountant.invoice_matching_token_index', 'False'))
+
+    @api.model
+    def _can_lookup(self, tokens):
+        """ Tells if the journal items matching the provided statement line tokens can be found using the index. """
+        return self._is_enabled() and all(len(token) <= MATCHING_TOKEN_MAX_LENGTH for token in tokens)
+
+    @api.model
+    def _get_tokens_query(self, where_sql):
+        """ Returns a query tokenizing, the same way _get_invoice_matching_amls_candidates does, the open journal items
+        matching where_sql. Each token is returned once per occurrence, as (move_line_id, token, kind).
+        """
+        return SQL(
+            r'''
+                SELECT
+                    account_move_line.id AS move_line_id,
+                    aml_field_token.token,
+                    aml_field_token.kind
+                FROM account_move_line
+                JOIN account_move account_move_line__move_id ON account_move_line__move_id.id = account_move_line.move_id
+                CROSS JOIN LATERAL (
+                    VALUES (account_move_line.name), (account_move_line__move_id.name), (account_move_line__move_id.ref)
+                ) AS aml_field(value)
+                CROSS JOIN LATERAL (
+                    SELECT aml_field.value, 'exact'
+                    WHERE aml_field.value != ''
+
+                    UNION ALL
+
+                    SELECT numerical_token, 'numerical'
+                    FROM UNNEST(
+                        REGEXP_SPLIT_TO_ARRAY(
+                            SUBSTRING(
+                                REGEXP_REPLACE(aml_field.value, '[^0-9\s]', '', 'g'),
+                                '\S(?:.*\S)*'
+                            ),
+                            '\s+'
+                        )
+                    ) AS numerical_token
+                ) AS aml_field_token(token, kind)
+                WHERE account_move_line.parent_state = 'posted'
+                AND account_move_line.reconciled IS NOT TRUE
+                AND %(where_sql)s
+            ''',
+            where_sql=where_sql,
+        )
+
+    @api.model
+    def _rebuild(self):
+        """ Recomputes the tokens of all the open journal items, or empties the index if it is disabled. """
+        self.env['account.move'].flush_model()
+        self.env['account.move.line'].flush_model()
+        self.env.cr.execute(SQL("DELETE FROM %s", SQL.identifier(self._table)))
+        if self._is_enabled():
+            self._insert_tokens(SQL("TRUE"))
+
+    @api.model
+    def _refresh(self, move_lines):
+        """ Recomputes the tokens of the provided journal items, after their label, entry or reconciliation changed. """
+        if not move_lines or not self._is_enabled():
+            return
+
+        self.env['account.move'].flush_model(['name', 'ref', 'state'])
+        self.env['account.move.line'].flush_model(['name', 'move_id', 'parent_state', 'reconciled'])
+        self.env.cr.execute(SQL("DELETE FROM account_move_line_matching_token WHERE move_line_id = ANY(%s)", move_lines.ids))
+        self._insert_tokens(SQL("account_move_line.id = ANY(%s)", move_lines.ids))
+
+    @api.model
+    def _insert_tokens(self, where_sql):
+        self.env.cr.execute(SQL(
+            """
+                INSERT INTO account_move_line_matching_token (move_line_id, token, kind)
+                SELECT aml_token.move_line_id, aml_token.token, aml_token.kind
+                FROM (%(tokens_query)s) AS aml_token
+                WHERE LENGTH(aml_token.token) <= %(max_length)s
+            """,
+            tokens_query=self._get_tokens_query(where_sql),
+            max_length=MATCHING_TOKEN_MAX_LENGTH,
+        ))
+
+    @api.autovacuum
+    def _gc_matching_tokens(self):
+        """ Removes the tokens of the journal items that got fully reconciled, or whose entry is no longer posted. """
+        self.env.cr.execute(SQL(
+            """
+                DELETE FROM account_move_line_matching_token matching_token
+                USING account_move_line
+                WHERE account_move_line.id = matching_token.move_line_id
+                AND (account_move_line.reconciled OR account_move_line.parent_state != 'posted')
+            """
+        ))
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import models
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = 'account.partial.reconcile'
+
+    def unlink(self):
+        # Unreconciled journal items can be matched again: their tokens, removed once they got fully reconciled, are restored.
+        move_lines = self.debit_move_id + self.credit_move_id
+        res = super().unlink()
+        self.env['account.move.line.matching.token']._refresh(move_lines.exists())
+        return res
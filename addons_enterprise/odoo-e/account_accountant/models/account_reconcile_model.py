@@ -209,6 +209,77 @@ class AccountReconcileModel(models.Model):
 
         return numerical_tokens, list(exact_tokens), text_tokens
 
+    def _prefetch_invoice_matching_candidate_ids(self, st_lines):
+        """ Computes, in a single query, the journal items sharing at least one token with each statement line, for each
+        'invoice_matching' rule in self. The result is meant to be passed in the 'invoice_matching_candidate_ids' context key,
+        so that _get_invoice_matching_amls_candidates only has to refine those candidates instead of tokenizing all the open
+        journal items again for each statement line.
+
+        The returned candidates are a superset of the ones _get_invoice_matching_amls_candidates would find by itself: only the
+        conditions that are common to all statement lines are applied here.
+
+        :param st_lines: The statement lines to be matched.
+        :return: A dictionary mapping each (reconcile_model_id, st_line_id) pair to a list of journal items ids.
+        """
+        model_ids = []
+        st_line_ids = []
+        tokens = []
+        prefetched = {}
+        for rule in self.filtered(lambda rule: rule.rule_type == 'invoice_matching'):
+            for st_line in st_lines.filtered(lambda st_line: st_line.company_id == rule.company_id):
+                numerical_tokens, exact_tokens, _text_tokens = rule._get_invoice_matching_st_line_tokens(st_line)
+                prefetched[(rule.id, st_line.id)] = []
+                for token in set(numerical_tokens + exact_tokens):
+                    model_ids.append(rule.id)
+                    st_line_ids.append(st_line.id)
+                    tokens.append(token)
+
+        if not tokens:
+            return prefetched
+
+        self.env['account.move'].flush_model(['name', 'ref', 'state'])
+        self.env['account.move.line'].flush_model(['name', 'move_id', 'company_id', 'parent_state', 'reconciled'])
+        company_ids = self.env['res.company'].search([('id', 'child_of', st_lines.company_id.root_id.ids)]).ids
+        token_model = self.env['account.move.line.matching.token']
+        if token_model._can_lookup(tokens):
+            aml_token = SQL(
+                """
+                    SELECT matching_token.move_line_id, matching_token.token
+                    FROM account_move_line_matching_token matching_token
+                    JOIN account_move_line ON account_move_line.id = matching_token.move_line_id
+                    WHERE account_move_line.parent_state = 'posted'
+                    AND account_move_line.reconciled IS NOT TRUE
+                    AND account_move_line.company_id = ANY(%s)
+                """,
+                company_ids,
+            )
+        else:
+            aml_token = token_model._get_tokens_query(SQL("account_move_line.company_id = ANY(%s)", company_ids))
+        rows = self.env.execute_query(SQL(
+            '''
+                WITH st_line_token AS (
+                    SELECT *
+                    FROM UNNEST(%(model_ids)s::integer[], %(st_line_ids)s::integer[], %(tokens)s::text[])
+                        AS st_line_token(reconcile_model_id, st_line_id, token)
+                )
+                SELECT
+                    st_line_token.reconcile_model_id,
+                    st_line_token.st_line_id,
+                    ARRAY_AGG(DISTINCT aml_token.move_line_id)
+                FROM st_line_token
+                JOIN (%(aml_token)s) AS aml_token ON aml_token.token = st_line_token.token
+                GROUP BY st_line_token.reconcile_model_id, st_line_token.st_line_id
+            ''',
+            aml_token=aml_token,
+            model_ids=model_ids,
+            st_line_ids=st_line_ids,
+            tokens=tokens,
+            company_ids=company_ids,
+        ))
+        for model_id, st_line_id, aml_ids in rows:
+            prefetched[(model_id, st_line_id)] = aml_ids
+        return prefetched
+
     def _get_invoice_matching_amls_candidates(self, st_line, partner):
         """ Returns the match candidates for the 'invoice_matching' rule, with respect to the provided parameters.
 
@@ -234,7 +305,37 @@ class AccountReconcileModel(models.Model):
         aml_cte = SQL()
         sub_queries: list[SQL] = []
         numerical_tokens, exact_tokens, _text_tokens = self._get_invoice_matching_st_line_tokens(st_line)
-        if numerical_tokens or exact_tokens:
+
+        # Candidates already computed in batch by _prefetch_invoice_matching_candidate_ids, if any.
+        prefetched_candidate_ids = self._context.get('invoice_matching_candidate_ids', {}).get((self.id, st_line.id))
+        aml_cte_where_clause = where_clause
+        if prefetched_candidate_ids:
+            aml_cte_where_clause = SQL("%s AND account_move_line.id = ANY(%s)", where_clause, prefetched_candidate_ids)
+
+        tokens = numerical_tokens + exact_tokens
+        use_token_index = bool(tokens) and self.env['account.move.line.matching.token']._can_lookup(tokens)
+        if use_token_index:
+            # Look the tokens up in the index instead of tokenizing all the open journal items.
+            kinds = [kind for kind, kind_tokens in (('numerical', numerical_tokens), ('exact', exact_tokens)) if kind_tokens]
+            sub_queries.append(SQL(
+                '''
+                    SELECT
+                        account_move_line.id,
+                        account_move_line.date,
+                        account_move_line.date_maturity,
+                        matching_token.token
+                    FROM %s
+                    JOIN account_move_line_matching_token matching_token ON matching_token.move_line_id = account_move_line.id
+                    WHERE %s
+                    AND matching_token.token IN %s
+                    AND matching_token.kind IN %s
+                ''',
+                tables,
+                aml_cte_where_clause,
+                tuple(tokens),
+                tuple(kinds),
+            ))
+        elif tokens:
             aml_cte = SQL('''
                 WITH aml_cte AS (
                     SELECT
@@ -248,8 +349,8 @@ class AccountReconcileModel(models.Model):
                     JOIN account_move account_move_line__move_id ON account_move_line__move_id.id = account_move_line.move_id
                     WHERE %s
                 )
-            ''', tables, where_clause)
-        if numerical_tokens:
+            ''', tables, aml_cte_where_clause)
+        if numerical_tokens and not use_token_index:
             for table_alias, field in (
                 ('account_move_line', 'name'),
                 ('account_move_line__move_id', 'name'),
@@ -272,7 +373,7 @@ class AccountReconcileModel(models.Model):
                     FROM aml_cte
                     WHERE %(field)s IS NOT NULL
                 ''', field=SQL("%s_%s", SQL(table_alias), SQL(field))))
-        if exact_tokens:
+        if exact_tokens and not use_token_index:
             for table_alias, field in (
                 ('account_move_line', 'name'),
                 ('account_move_line__move_id', 'name'),
@@ -289,7 +390,7 @@ class AccountReconcileModel(models.Model):
                 ''', field=SQL("%s_%s", SQL(table_alias), SQL(field))))
         if sub_queries:
             order_by = get_order_by_clause(prefix=SQL('sub.'))
-            candidate_ids = [r[0] for r in self.env.execute_query(SQL(
+            candidate_ids = [] if prefetched_candidate_ids == [] else [r[0] for r in self.env.execute_query(SQL(
                 '''
                     %s
                     SELECT
@@ -303,7 +404,7 @@ class AccountReconcileModel(models.Model):
                 ''',
                 aml_cte,
                 SQL(" UNION ALL ").join(sub_queries),
-                tuple(numerical_tokens + exact_tokens),
+                tuple(tokens),
                 order_by,
             ))]
             if candidate_ids:
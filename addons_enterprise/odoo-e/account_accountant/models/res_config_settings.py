@@ -72,6 +72,17 @@ class ResConfigSettings(models.TransientModel):
         help='Method used to compute the amount of deferred entries',
     )
 
+    invoice_matching_token_index = fields.Boolean(
+        string="Invoice Matching Index",
+        config_parameter='account_accountant.invoice_matching_token_index',
+    )
+
+    def set_values(self):
+        token_index_was_enabled = self.env['account.move.line.matching.token']._is_enabled()
+        super().set_values()
+        if self.env['account.move.line.matching.token']._is_enabled() != token_index_was_enabled:
+            self.env['account.move.line.matching.token']._rebuild()
+
     @api.depends('sign_invoice')
     def _compute_module_sign_status(self):
         sign_installed = 'sign' in self.env['ir.module.module']._installed()
@@ -4,6 +4,7 @@ from . import test_bank_rec_widget
 from . import test_bank_rec_widget_tour
 from . import test_prediction
 from . import test_reconciliation_matching_rules
+from . import test_invoice_matching_benchmark
 from . import test_account_auto_reconcile_wizard
 from . import test_account_reconcile_wizard
 from . import test_deferred_management
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import logging
+import time
+
+from freezegun import freeze_time
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+from odoo.tests import tagged
+from odoo import Command
+
+_logger = logging.getLogger(__name__)
+
+OPEN_ITEMS_STEPS = (1000, 5000, 20000)
+OPEN_ITEMS_PER_MOVE = 500
+
+
+@tagged('post_install', '-at_install', '-standard', 'account_accountant_perf')
+class TestInvoiceMatchingTokenIndexPerf(AccountTestInvoicingCommon):
+    """ Not part of the standard test suite: grows the number of open receivable lines and compares the 'invoice_matching'
+    rule with and without the matching token index, both on speed and on the proposed matching.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.bank_journal = cls.company_data['default_journal_bank']
+        cls.rule = cls.env['account.reconcile.model'].create({
+            'name': "Invoice matching",
+            'rule_type': 'invoice_matching',
+            'match_partner': False,
+            'company_id': cls.company.id,
+        })
+        cls.st_lines = cls.env['account.bank.statement.line'].create([
+            {
+                'journal_id': cls.bank_journal.id,
+                'date': '2020-01-01',
+                'payment_ref': payment_ref,
+                'amount': amount,
+            }
+            for payment_ref, amount in (
+                ("Payment of REF 00000042", 10.0),
+                ("REF 00000007 and REF 00000008", 20.0),
+                ("Unknown reference 99999999", 10.0),
+            )
+        ])
+
+    @classmethod
+    def _create_open_items(cls, indexes):
+        chunks = [indexes[i:i + OPEN_ITEMS_PER_MOVE] for i in range(0, len(indexes), OPEN_ITEMS_PER_MOVE)]
+        moves = cls.env['account.move'].create([
+            {
+                'date': '2020-01-01',
+                'line_ids': [
+                    Command.create({
+                        'name': f"REF {index:08d}",
+                        'account_id': cls.company_data['default_account_receivable'].id,
+                        'partner_id': cls.partner_a.id,
+                        'debit': 10.0,
+                    })
+                    for index in chunk
+                ] + [
+                    Command.create({
+                        'name': "Counterpart",
+                        'account_id': cls.company_data['default_account_revenue'].id,
+                        'credit': 10.0 * len(chunk),
+                    }),
+                ],
+            }
+            for chunk in chunks
+        ])
+        moves.action_post()
+
+    def _set_token_index(self, enabled):
+        self.env['ir.config_parameter'].set_param('account_accountant.invoice_matching_token_index', enabled)
+        self.env['account.move.line.matching.token']._rebuild()
+        self.env.invalidate_all()
+
+    @freeze_time('2020-01-01')
+    def _apply_rule(self):
+        """ Returns the matching proposed for each statement line and the time needed to compute it. """
+        start = time.perf_counter()
+        matching = [self.rule._apply_rules(st_line, st_line._retrieve_partner()) for st_line in self.st_lines]
+        return matching, time.perf_counter() - start
+
+    def test_invoice_matching_token_index_perf(self):
+        timings = []
+        previous_step = 0
+        for step in OPEN_ITEMS_STEPS:
+            self._create_open_items(range(previous_step, step))
+            previous_step = step
+
+            self._set_token_index(False)
+            expected_matching, scan_time = self._apply_rule()
+            self._set_token_index(True)
+            matching, index_time = self._apply_rule()
+
+            # The index may only narrow down the candidates fetched from the database, never change the matching.
+            self.assertEqual(matching, expected_matching)
+            self.assertEqual(matching[0]['amls'].mapped('name'), ["REF 00000042"])
+            timings.append((step, scan_time, index_time))
+
+        _logger.info(
+            "invoice_matching rule on %s statement lines, open items: without index / with index\n%s",
+            len(self.st_lines),
+            "\n".join(f"{step:>8}: {scan * 1000:>9.2f} ms / {index * 1000:>9.2f} ms" for step, scan, index in timings),
+        )
@@ -645,6 +645,48 @@ class TestReconciliationMatchingRules(AccountTestInvoicingCommon):
             }
         })
 
+    def test_prefetched_invoice_matching_candidates(self):
+        ''' The candidates computed in batch for a set of statement lines must lead to the same matching as the per-line ones.'''
+        self.rule_1.match_text_location_label = False
+        st_lines = self.bank_line_1 + self.bank_line_2 + self.cash_line_1
+        candidate_ids = self.rule_1._prefetch_invoice_matching_candidate_ids(st_lines)
+        self.assertEqual(set(candidate_ids), {(self.rule_1.id, st_line.id) for st_line in st_lines})
+        self.assertIn(self.invoice_line_1.id, candidate_ids[(self.rule_1.id, self.bank_line_1.id)])
+
+        rule = self.rule_1.with_context(invoice_matching_candidate_ids=candidate_ids)
+        for st_line in st_lines:
+            partner = st_line._retrieve_partner()
+            self.assertDictEqual(rule._apply_rules(st_line, partner), self.rule_1._apply_rules(st_line, partner))
+
+    @freeze_time('2020-01-01')
+    def test_invoice_matching_token_index(self):
+        ''' Matching the statement lines using the token index must give the same results as without it.'''
+        self.rule_1.match_text_location_label = False
+        st_lines = self.bank_line_1 + self.bank_line_2 + self.bank_line_3 + self.bank_line_4 + self.bank_line_5 + self.cash_line_1
+
+        def get_matching():
+            return [self.rule_1._apply_rules(st_line, st_line._retrieve_partner()) for st_line in st_lines]
+
+        def get_tokens(move_line):
+            return set(token_model.search([('move_line_id', '=', move_line.id)]).mapped(lambda token: (token.token, token.kind)))
+
+        expected_matching = get_matching()
+
+        token_model = self.env['account.move.line.matching.token']
+        self.env['ir.config_parameter'].set_param('account_accountant.invoice_matching_token_index', True)
+        token_model._rebuild()
+        self.assertTrue({('RF12 3456', 'exact'), ('12', 'numerical'), ('3456', 'numerical')} <= get_tokens(self.invoice_line_6))
+        self.assertEqual(get_matching(), expected_matching)
+
+        # The index is maintained when resetting the invoices to draft and posting them again.
+        invoice = self.invoice_line_6.move_id
+        invoice.button_draft()
+        self.assertFalse(get_tokens(self.invoice_line_6))
+        invoice.ref = "RF98 7654"
+        invoice.action_post()
+        self.assertTrue({('RF98 7654', 'exact'), ('7654', 'numerical')} <= get_tokens(self.invoice_line_6))
+        self.assertFalse(('3456', 'numerical') in get_tokens(self.invoice_line_6))
+
     def test_larger_invoice_auto_reconcile(self):
         ''' Test auto reconciliation with an invoice with larger amount than the
         statement line's, for rules without write-offs.'''
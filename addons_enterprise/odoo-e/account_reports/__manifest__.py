@@ -11,6 +11,7 @@ Accounting Reports
     'depends': ['accountant'],
     'data': [
         'security/ir.model.access.csv',
+        'security/account_reports_security.xml',
         'data/pdf_export_templates.xml',
         'data/customer_reports_pdf_export_templates.xml',
         'data/balance_sheet.xml',
@@ -32,6 +33,7 @@ Accounting Reports
         'views/account_report_view.xml',
         'data/account_report_actions.xml',
         'data/report_send_cron.xml',
+        'data/report_export_job_cron.xml',
         'data/menuitems.xml',
         'data/mail_activity_type_data.xml',
         'data/mail_templates.xml',
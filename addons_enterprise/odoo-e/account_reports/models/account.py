@@ -9,3 +9,9 @@ class AccountAccount(models.Model):
 
     exclude_provision_currency_ids = fields.Many2many('res.currency', relation='account_account_exclude_res_currency_provision', help="Whether or not we have to make provisions for the selected foreign currencies.")
     budget_item_ids = fields.One2many(comodel_name='account.report.budget.item', inverse_name='account_id')  # To use it in the domain when adding accounts from the report
+
+    def write(self, vals):
+        # The account_codes and domain engines rely on the code, type and tags of the accounts
+        if {'code', 'account_type', 'tag_ids'} & vals.keys():
+            self.env['account.report.totals.cache']._invalidate(self.company_ids.ids)
+        return super().write(vals)
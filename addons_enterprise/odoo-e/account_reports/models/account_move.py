@@ -20,6 +20,33 @@ class AccountMove(models.Model):
     # technical field used to know whether to show the tax closing alert or not
     tax_closing_alert = fields.Boolean(compute='_compute_tax_closing_alert')
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        moves = super().create(vals_list)
+        posted_moves = moves.filtered(lambda m: m.state == 'posted')
+        if posted_moves and self.env['account.report.balance']._is_enabled():
+            self.env['account.report.balance']._apply_lines(posted_moves.line_ids, 1)
+        return moves
+
+    def write(self, vals):
+        # Posting or resetting entries to draft changes the totals of the reports
+        if 'state' in vals:
+            self._invalidate_report_totals_cache()
+        balance_store = self.env['account.report.balance']
+        if 'state' not in vals or not balance_store._is_enabled():
+            return super().write(vals)
+
+        # The journal items are moved out of the balances before the write and back in after it, as a whole: the changes made
+        # to them in between must not be applied again by the journal items themselves.
+        balance_store._apply_lines(self.line_ids, -1)
+        res = super(AccountMove, self.with_context(account_report_balance_applied=True)).write(vals)
+        balance_store._apply_lines(self.line_ids, 1)
+        return res
+
+    def _invalidate_report_totals_cache(self):
+        if self:
+            self.env['account.report.totals.cache']._invalidate(self.company_id.ids, min(self.mapped('date')))
+
     def _post(self, soft=True):
         # Overridden to create carryover external values and join the pdf of the report when posting the tax closing
         for move in self.filtered(lambda m: m.tax_closing_report_id):
@@ -6,6 +6,8 @@ from odoo import api, models, fields, _
 from odoo.exceptions import UserError
 from odoo.tools import SQL
 
+from .account_report_balance import BALANCE_STORE_LINE_FIELDS
+
 class AccountMoveLine(models.Model):
     _name = "account.move.line"
     _inherit = "account.move.line"
@@ -34,6 +36,26 @@ class AccountMoveLine(models.Model):
         (self - lines_to_compute).tax_ids = False
         super(AccountMoveLine, lines_to_compute)._compute_tax_ids()
 
+    def write(self, vals):
+        # Changing posted journal items changes the totals of the reports
+        posted_lines = self.filtered(lambda aml: aml.parent_state == 'posted')
+        posted_lines.move_id._invalidate_report_totals_cache()
+
+        balance_store = self.env['account.report.balance']
+        if (
+            not posted_lines
+            or self.env.context.get('account_report_balance_applied')
+            or not BALANCE_STORE_LINE_FIELDS.intersection(vals)
+            or not balance_store._is_enabled()
+        ):
+            return super().write(vals)
+
+        # The balances of the lines are moved from the buckets they leave to the ones they join
+        balance_store._apply_lines(posted_lines, -1)
+        res = super(AccountMoveLine, self.with_context(account_report_balance_applied=True)).write(vals)
+        balance_store._apply_lines(posted_lines, 1)
+        return res
+
     @api.model
     def _prepare_aml_shadowing_for_report(self, change_equivalence_dict):
         """ Prepares the fields lists for creating a temporary table shadowing the account_move_line one.
@@ -75,3 +97,18 @@ class AccountMoveLine(models.Model):
                 ))
 
         return SQL(', ').join(SQL.identifier(fname) for fname in stored_fields), SQL(', ').join(fields_to_insert)
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = "account.partial.reconcile"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        # Residual amounts can be used in the domains of report expressions
+        partials = super().create(vals_list)
+        (partials.debit_move_id | partials.credit_move_id).move_id._invalidate_report_totals_cache()
+        return partials
+
+    def unlink(self):
+        (self.debit_move_id | self.credit_move_id).move_id._invalidate_report_totals_cache()
+        return super().unlink()
@@ -187,6 +187,38 @@ class PartnerLedgerCustomHandler(models.AbstractModel):
             'aml_values': self._get_aml_values(options, partner_ids_to_expand) if partner_ids_to_expand else {},
         }
 
+    def _split_lines_by_partner(self, options, lines):
+        """ Splits the lines of a partner ledger computed for several partners into the lines of each of them, as they would be
+        if the report was computed for this partner only (see account.report's _split_lines_by_partner).
+        """
+        if options.get('hide_partner_totals'):
+            # The report total can't be deduced from the partner line
+            return None
+
+        report = self.env['account.report'].browse(options['report_id'])
+        lines_by_partner = defaultdict(list)
+        for line in lines:
+            markup, model, model_id = report._parse_line_id(line['id'])[0]
+            if model == 'res.partner' and model_id:
+                lines_by_partner[model_id].append(line)
+            elif markup == 'total' and not model:
+                # Report total line; rebuilt for each partner below
+                continue
+            else:
+                # Unknown partner or prefix group lines mix the data of several partners
+                return None
+
+        for partner_id, partner_lines in lines_by_partner.items():
+            # With a single partner, the report total is the total of its line
+            partner_lines.append({
+                'id': report._get_generic_line_id(None, None, markup='total'),
+                'name': _('Total'),
+                'level': 1,
+                'columns': [dict(column) for column in partner_lines[0]['columns']],
+            })
+
+        return lines_by_partner
+
     def _get_report_send_recipients(self, options):
         # Deprecated, to be moved to customer statement handler in master
         partners = options.get('partner_ids', [])
@@ -3,11 +3,17 @@
 
 import ast
 import base64
+import bisect
 import datetime
 import io
+import itertools
 import json
 import logging
 import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from ast import literal_eval
 from collections import defaultdict
 from functools import cmp_to_key
@@ -17,15 +23,17 @@ import markupsafe
 from dateutil.relativedelta import relativedelta
 from PIL import ImageFont
 
-from odoo import models, fields, api, _, osv
+from odoo import models, fields, api, _, osv, tools
 from odoo.addons.web.controllers.utils import clean_action
 from odoo.exceptions import RedirectWarning, UserError, ValidationError
 from odoo.service.model import get_public_method
-from odoo.tools import date_utils, get_lang, float_is_zero, float_repr, SQL, parse_version, Query
+from odoo.tools import date_utils, get_lang, float_is_zero, float_repr, SQL, parse_version, Query, str2bool
 from odoo.tools.float_utils import float_round, float_compare
 from odoo.tools.misc import file_path, format_date, formatLang, split_every, xlsxwriter
 from odoo.tools.safe_eval import expr_eval, safe_eval
 
+from .account_report_balance import BALANCE_STORE_GROUPBY_FIELDS
+
 _logger = logging.getLogger(__name__)
 
 ACCOUNT_CODES_ENGINE_SPLIT_REGEX = re.compile(r"(?=[+-])")
@@ -48,6 +56,21 @@ LINE_ID_HIERARCHY_DELIMITER = '|'
 
 CURRENCIES_USING_LAKH = {'AFN', 'BDT', 'INR', 'MMK', 'NPR', 'PKR', 'LKR'}
 
+# Number of lines used to compute the layout (column widths, styles) of streamed XLSX exports
+XLSX_STREAMING_SAMPLE_SIZE = 1000
+# Send & Print cron: number of partners of the first batch, duration targeted for each batch (the size of the next batches is
+# adapted accordingly), maximum size of a batch and number of seconds after which the cron stops starting new batches.
+SEND_AND_PRINT_INITIAL_BATCH_SIZE = 10
+SEND_AND_PRINT_BATCH_DURATION = 60
+SEND_AND_PRINT_MAX_BATCH_SIZE = 500
+SEND_AND_PRINT_TIME_BUDGET = 600
+
+# Default number of wkhtmltopdf processes run in parallel when generating the PDF exports of several partners at once
+PDF_EXPORT_WORKERS_COUNT = 4
+
+# Number of lines written to an XLSX export between two updates of the progress of its export job
+XLSX_EXPORT_PROGRESS_STEP = 500
+
 
 class AccountReportAnnotation(models.Model):
     _name = 'account.report.annotation'
@@ -156,9 +179,12 @@ class AccountReport(models.Model):
     ####################################################
 
     @api.model
-    def _cron_account_report_send(self, job_count=10):
+    def _cron_account_report_send(self, job_count=None, time_budget=SEND_AND_PRINT_TIME_BUDGET):
         """ Handle Send & Print async processing.
+        The partners are processed by batches, whose size is adapted so that each of them takes about SEND_AND_PRINT_BATCH_DURATION
+        seconds; the progress is committed after each batch.
         :param job_count: maximum number of jobs to process if specified.
+        :param time_budget: number of seconds after which no new batch is started; the cron is then retriggered.
         """
         to_process = self.env['account.report'].search(
             [('send_and_print_values', '!=', False)],
@@ -166,32 +192,50 @@ class AccountReport(models.Model):
         if not to_process:
             return
 
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        start_time = time.monotonic()
+        batch_size = SEND_AND_PRINT_INITIAL_BATCH_SIZE
         processed_count = 0
         need_retrigger = False
 
         for report in to_process:
-            if need_retrigger:
-                break
             send_and_print_vals = report.send_and_print_values
             report_partner_ids = send_and_print_vals.get('report_options', {}).get('partner_ids', [])
-            need_retrigger = processed_count + len(report_partner_ids) > job_count
-            partner_ids = report_partner_ids[:job_count - processed_count]
             company = self.env['res.company'].browse(send_and_print_vals['report_options']['companies'][0]['id'])
-            existing_partner_ids = set(self.env['res.partner'].browse(partner_ids).exists().ids)
-            for partner_id in partner_ids:
-                if partner_id in existing_partner_ids:
+
+            while report_partner_ids:
+                if time.monotonic() - start_time >= time_budget or (job_count and processed_count >= job_count):
+                    need_retrigger = True
+                    break
+
+                partner_ids = report_partner_ids[:min(batch_size, job_count - processed_count) if job_count else batch_size]
+                partners = self.env['res.partner'].browse(partner_ids).exists()
+
+                batch_start_time = time.monotonic()
+                if partners:
                     options = {
                         **send_and_print_vals['report_options'],
-                        'partner_ids': [partner_id],
+                        'partner_ids': partners.ids,
                     }
                     self.env['account.report.send']._process_send_and_print(report=report.with_company(company), options=options)
-                    processed_count += 1
-                report_partner_ids.remove(partner_id)
-            if report_partner_ids:
-                send_and_print_vals['report_options']['partner_ids'] = report_partner_ids
-                report.send_and_print_values = send_and_print_vals
-            else:
-                report.send_and_print_values = False
+                    processed_count += len(partners)
+
+                    # Adapt the size of the next batch to the time needed per partner
+                    time_per_partner = (time.monotonic() - batch_start_time) / len(partners)
+                    batch_size = max(1, min(SEND_AND_PRINT_MAX_BATCH_SIZE, int(SEND_AND_PRINT_BATCH_DURATION / max(time_per_partner, 0.001))))
+
+                del report_partner_ids[:len(partner_ids)]
+                if report_partner_ids:
+                    send_and_print_vals['report_options']['partner_ids'] = report_partner_ids
+                    report.send_and_print_values = send_and_print_vals
+                else:
+                    report.send_and_print_values = False
+
+                if auto_commit:
+                    self.env.cr.commit()
+
+            if need_retrigger:
+                break
 
         if need_retrigger:
             self.env.ref('account_reports.ir_cron_account_report_send')._trigger()
@@ -1752,6 +1796,8 @@ class AccountReport(models.Model):
         options['buttons'] = [
             {'name': _('PDF'), 'sequence': 10, 'action': 'export_file', 'action_param': 'export_to_pdf', 'file_export_type': _('PDF'), 'branch_allowed': True, 'always_show': True},
             {'name': _('XLSX'), 'sequence': 20, 'action': 'export_file', 'action_param': 'export_to_xlsx', 'file_export_type': _('XLSX'), 'branch_allowed': True, 'always_show': True},
+            {'name': _('PDF (background)'), 'sequence': 15, 'action': 'export_file_async', 'action_param': 'export_to_pdf', 'branch_allowed': True},
+            {'name': _('XLSX (background)'), 'sequence': 25, 'action': 'export_file_async', 'action_param': 'export_to_xlsx', 'branch_allowed': True},
         ]
 
     def open_account_report_file_download_error_wizard(self, errors, content):
@@ -2145,6 +2191,59 @@ class AccountReport(models.Model):
 
         return query
 
+    def _get_report_balance_store_query(self, options, date_scope, domain=None, groupby_fields=()):
+        """ Get a Query object equivalent to _get_report_query, but targeting the monthly balances of account.report.balance instead of
+        the journal items. Like in _get_report_query, the table is aliased as account_move_line, so that the same SQL can be run on both.
+
+        :param groupby_fields: The account.move.line fields the caller will group the results by.
+        :return: The Query, or None if the balance store is disabled or the options, domain and groupby cannot be expressed on it.
+        """
+        if (
+            not self.env['account.report.balance']._is_enabled()
+            or options['currency_table']['type'] == 'cta'
+            or any(options.get(key) for key in ('compute_budget', 'analytic_groupby_option', 'analytic_accounts', 'report_cash_basis'))
+            or any(groupby_field not in BALANCE_STORE_GROUPBY_FIELDS for groupby_field in groupby_fields)
+        ):
+            return None
+
+        store_domain = []
+        for leaf in osv.expression.normalize_domain(self._get_options_domain(options, date_scope) + (domain or [])):
+            if not osv.expression.is_leaf(leaf) or leaf in (osv.expression.TRUE_LEAF, osv.expression.FALSE_LEAF):
+                store_domain.append(leaf)
+                continue
+
+            field_path, operator, value = leaf
+            if field_path == 'display_type' and operator == 'not in' and set(value) == {'line_section', 'line_note'}:
+                # The store never contains those lines
+                store_domain.append(osv.expression.TRUE_LEAF)
+            elif field_path == 'parent_state' and operator == '=' and value == 'posted':
+                # The store only contains posted lines
+                store_domain.append(osv.expression.TRUE_LEAF)
+            elif field_path == 'date' and value:
+                # Dates are aggregated per month; only month boundaries can be used
+                date_value = fields.Date.to_date(value)
+                is_month_start = date_value.day == 1
+                is_month_end = (date_value + relativedelta(days=1)).day == 1
+                if not ((operator in ('>=', '<') and is_month_start) or (operator in ('<=', '>') and is_month_end)):
+                    return None
+                store_domain.append(leaf)
+            elif field_path.split('.')[0] in BALANCE_STORE_GROUPBY_FIELDS:
+                store_domain.append(leaf)
+            else:
+                return None
+
+        self.env['account.move.line'].check_access('read')
+        self.env['account.report.balance'].check_access('read')
+
+        # The balances only keep fields of the journal items, so that the domain can be evaluated on them as on the journal items.
+        # The record rules are the ones of the balances: the ones of the journal items may involve other fields.
+        if not self.env.su:
+            store_domain += self.env['ir.rule']._compute_domain('account.report.balance', 'read')
+        query = self.env['account.move.line']._where_calc(store_domain)
+        query._tables['account_move_line'] = SQL.identifier('account_report_balance')
+
+        return query
+
     def _create_report_budget_temp_table(self, options):
         self._cr.execute("SELECT 1 FROM information_schema.tables WHERE table_name='account_report_budget_temp_aml'")
         if self._cr.fetchone():
@@ -3193,14 +3292,25 @@ class AccountReport(models.Model):
                 forced_column_group_totals = None
 
             if not col_groups_restrict or group_key in col_groups_restrict:
-                current_group_expression_totals = self._compute_expression_totals_for_single_column_group(
-                    group_options,
-                    grouped_formulas,
-                    forced_column_group_expression_totals=forced_column_group_totals,
-                    offset=offset,
-                    limit=limit,
-                    warnings=warnings,
-                )
+                cache_key = None
+                current_group_expression_totals = None
+                if not groupby_to_expand and not forced_column_group_totals and not offset and not limit and self._use_totals_cache(group_options):
+                    cache_key = self.env['account.report.totals.cache']._get_cache_key(self, group_options, grouped_formulas)
+                    if cache_key:
+                        current_group_expression_totals = self.env['account.report.totals.cache']._get_totals(cache_key)
+
+                if current_group_expression_totals is None:
+                    current_group_expression_totals = self._compute_expression_totals_for_single_column_group(
+                        group_options,
+                        grouped_formulas,
+                        forced_column_group_expression_totals=forced_column_group_totals,
+                        offset=offset,
+                        limit=limit,
+                        warnings=warnings,
+                    )
+
+                    if cache_key:
+                        self.env['account.report.totals.cache']._store_totals(self, cache_key, group_options, current_group_expression_totals)
             else:
                 current_group_expression_totals = forced_column_group_totals
 
@@ -3208,6 +3318,21 @@ class AccountReport(models.Model):
 
         return all_column_groups_expression_totals
 
+    def _use_totals_cache(self, column_group_options):
+        """ Tells whether the totals of the provided column group can be stored in (and served from) account.report.totals.cache.
+        Only the totals computed from posted entries, without currency conversion nor budgets, are cached, as the cache
+        is only invalidated when posted journal items change.
+        """
+        return (
+            not self._context.get('account_report_no_totals_cache')
+            and not column_group_options.get('all_entries')
+            and not column_group_options.get('analytic_groupby_option')
+            and not column_group_options.get('report_cash_basis')
+            and column_group_options['currency_table']['type'] == 'monocurrency'
+            and not any(budget['selected'] for budget in column_group_options.get('budgets', []))
+            and bool(column_group_options.get('date', {}).get('date_to'))
+        )
+
     def _standardize_date_scope_for_date_range(self, date_scope):
         """ Depending on the fact the report accepts date ranges or not, different date scopes might mean the same thing.
         This function is used so that, in those cases, only one of these date_scopes' values is used, to avoid useless creation
@@ -3840,17 +3965,29 @@ class AccountReport(models.Model):
                     line=expressions.report_line_id.name,
                     formula=formula,
                 ))
-            query = self._get_report_query(options, date_scope, domain=line_domain)
+            count_field_name = next_groupby.split(',')[0] if next_groupby else 'id'
+            balance_store_query = None
+            if not offset and not limit:
+                balance_store_query = self._get_report_balance_store_query(
+                    options,
+                    date_scope,
+                    domain=line_domain,
+                    groupby_fields=[field_name for field_name in (current_groupby, count_field_name) if field_name and field_name != 'id'],
+                )
+            query = balance_store_query or self._get_report_query(options, date_scope, domain=line_domain)
 
             groupby_sql = self.env['account.move.line']._field_to_sql('account_move_line', current_groupby, query) if current_groupby else None
-            select_count_field = self.env['account.move.line']._field_to_sql('account_move_line', next_groupby.split(',')[0] if next_groupby else 'id', query)
+            if balance_store_query and count_field_name == 'id':
+                count_rows_sql = SQL("COALESCE(SUM(account_move_line.aml_count), 0)")
+            else:
+                count_rows_sql = SQL("COUNT(DISTINCT %s)", self.env['account.move.line']._field_to_sql('account_move_line', count_field_name, query))
 
             tail_query = self._get_engine_query_tail(offset, limit)
             query = SQL(
                 """
                 SELECT
                     COALESCE(SUM(%(balance_select)s), 0.0) AS sum,
-                    COUNT(DISTINCT %(select_count_field)s) AS count_rows
+                    %(count_rows_sql)s AS count_rows
                     %(select_groupby_sql)s
                 FROM %(table_references)s
                 %(currency_table_join)s
@@ -3859,7 +3996,7 @@ class AccountReport(models.Model):
                 %(order_by_sql)s
                 %(tail_query)s
                 """,
-                select_count_field=select_count_field,
+                count_rows_sql=count_rows_sql,
                 select_groupby_sql=SQL(', %s AS grouping_key', groupby_sql) if groupby_sql else SQL(),
                 table_references=query.from_clause,
                 balance_select=self._currency_table_apply_rate(SQL("account_move_line.balance")),
@@ -3951,71 +4088,21 @@ class AccountReport(models.Model):
         prefixes_to_compute = set()
         for formula in formulas_dict:
             prefix_details_by_formula[formula] = []
-            for token in ACCOUNT_CODES_ENGINE_SPLIT_REGEX.split(formula.replace(' ', '')):
-                if token:
-                    token_match = ACCOUNT_CODES_ENGINE_TERM_REGEX.match(token)
-
-                    if not token_match:
-                        raise UserError(_("Invalid token '%(token)s' in account_codes formula '%(formula)s'", token=token, formula=formula))
-
-                    parsed_token = token_match.groupdict()
-
-                    if not parsed_token:
-                        raise UserError(_("Could not parse account_code formula from token '%s'", token))
-
-                    multiplicator = -1 if parsed_token['sign'] == '-' else 1
-                    excluded_prefixes_match = token_match['excluded_prefixes']
-                    excluded_prefixes = excluded_prefixes_match.split(',') if excluded_prefixes_match else []
-                    prefix = token_match['prefix']
-
-                    # We group using both prefix and excluded_prefixes as keys, for the case where two expressions would
-                    # include the same prefix, but exlcude different prefixes (example 104\(1041) and 104\(1042))
-                    prefix_key = (prefix, *excluded_prefixes)
-                    prefix_details_by_formula[formula].append((multiplicator, prefix_key, token_match['balance_character']))
-                    prefixes_to_compute.add((prefix, tuple(excluded_prefixes)))
-
-        # Create the subquery for the WITH linking our prefixes with account.account entries
-        all_prefixes_queries: list[SQL] = []
-        prefilter = self.env['account.account']._check_company_domain(self.get_report_company_ids(options))
-        for prefix, excluded_prefixes in prefixes_to_compute:
-            account_domain = [
-                *prefilter,
-            ]
-
-            tag_match = ACCOUNT_CODES_ENGINE_TAG_ID_PREFIX_REGEX.match(prefix)
-
-            if tag_match:
-                if tag_match['ref']:
-                    tag_id = self.env['ir.model.data']._xmlid_to_res_id(tag_match['ref'])
-                else:
-                    tag_id = int(tag_match['id'])
-
-                account_domain.append(('tag_ids', 'in', [tag_id]))
-            else:
-                account_domain.append(('code', '=like', f'{prefix}%'))
-
-            excluded_prefixes_domains = []
-
-            for excluded_prefix in excluded_prefixes:
-                excluded_prefixes_domains.append([('code', '=like', f'{excluded_prefix}%')])
-
-            if excluded_prefixes_domains:
-                account_domain.append('!')
-                account_domain += osv.expression.OR(excluded_prefixes_domains)
-
-            prefix_query = self.env['account.account']._where_calc(account_domain)
-            all_prefixes_queries.append(prefix_query.select(
-                SQL("%s AS prefix", [prefix, *excluded_prefixes]),
-                SQL("account_account.id AS account_id"),
-            ))
+            for multiplicator, prefix, excluded_prefixes, balance_character in self._parse_account_codes_formula(formula):
+                # We group using both prefix and excluded_prefixes as keys, for the case where two expressions would
+                # include the same prefix, but exlcude different prefixes (example 104\(1041) and 104\(1042))
+                prefix_key = (prefix, *excluded_prefixes)
+                prefix_details_by_formula[formula].append((multiplicator, prefix_key, balance_character))
+                prefixes_to_compute.add((prefix, excluded_prefixes))
 
         # Build a map to associate each account with the prefixes it matches
-        accounts_prefix_map = defaultdict(list)
-        for prefix, account_id in self.env.execute_query(SQL(' UNION ALL ').join(all_prefixes_queries)):
-            accounts_prefix_map[account_id].append(tuple(prefix))
+        accounts_prefix_map = self._get_account_codes_prefix_map(options, prefixes_to_compute)
 
-        # Run main query
-        query = self._get_report_query(options, date_scope)
+        # Run main query, on the pre-aggregated balances when possible
+        balance_store_query = None
+        if not offset and not limit:
+            balance_store_query = self._get_report_balance_store_query(options, date_scope, groupby_fields=[current_groupby] if current_groupby else [])
+        query = balance_store_query or self._get_report_query(options, date_scope)
 
         current_groupby_aml_sql = self.env['account.move.line']._field_to_sql('account_move_line', current_groupby, query) if current_groupby else None
         tail_query = self._get_engine_query_tail(offset, limit)
@@ -4045,7 +4132,7 @@ class AccountReport(models.Model):
             SELECT
                 account_move_line.account_id AS account_id,
                 SUM(%(balance_select)s) AS sum,
-                COUNT(account_move_line.id) AS aml_count
+                %(aml_count_sql)s AS aml_count
                 %(extra_select_sql)s
             FROM %(table_references)s
             %(currency_table_join)s
@@ -4056,6 +4143,7 @@ class AccountReport(models.Model):
             %(tail_query)s
             """,
             extra_select_sql=extra_select_sql,
+            aml_count_sql=SQL("SUM(account_move_line.aml_count)") if balance_store_query else SQL("COUNT(account_move_line.id)"),
             table_references=query.from_clause,
             balance_select=self._currency_table_apply_rate(SQL("account_move_line.balance")),
             currency_table_join=self._currency_table_aml_join(options),
@@ -4115,6 +4203,92 @@ class AccountReport(models.Model):
 
         return rslt
 
+    @api.model
+    @tools.ormcache('formula')
+    def _parse_account_codes_formula(self, formula):
+        """ Parses a formula of the account_codes engine. As the same formulas are evaluated over and over again each time a report
+        is opened, the result is cached per formula.
+
+        :return: A tuple of (multiplicator, prefix, excluded_prefixes, balance_character), one per term of the formula, where:
+                 - multiplicator is 1 or -1, depending on the sign of the term
+                 - prefix is the account code prefix (or tag(...) reference) of the term
+                 - excluded_prefixes is a tuple of the prefixes excluded with the \\ operator
+                 - balance_character is 'D', 'C' or an empty string
+        """
+        parsed_terms = []
+        for token in ACCOUNT_CODES_ENGINE_SPLIT_REGEX.split(formula.replace(' ', '')):
+            if token:
+                token_match = ACCOUNT_CODES_ENGINE_TERM_REGEX.match(token)
+
+                if not token_match:
+                    raise UserError(_("Invalid token '%(token)s' in account_codes formula '%(formula)s'", token=token, formula=formula))
+
+                parsed_token = token_match.groupdict()
+
+                if not parsed_token:
+                    raise UserError(_("Could not parse account_code formula from token '%s'", token))
+
+                multiplicator = -1 if parsed_token['sign'] == '-' else 1
+                excluded_prefixes_match = token_match['excluded_prefixes']
+                excluded_prefixes = tuple(excluded_prefixes_match.split(',')) if excluded_prefixes_match else ()
+                parsed_terms.append((multiplicator, token_match['prefix'], excluded_prefixes, token_match['balance_character']))
+
+        return tuple(parsed_terms)
+
+    def _get_account_codes_prefix_map(self, options, prefixes):
+        """ Resolves account code prefixes to the accounts they match, for the companies of the report.
+
+        All the accounts of these companies are loaded at once and indexed by code, so that each prefix is resolved with a
+        lookup in this index instead of a search per prefix.
+
+        :param prefixes: A set of (prefix, excluded_prefixes) tuples, as obtained from _parse_account_codes_formula.
+        :return: A dict {account_id: [prefix_key]}, where each prefix_key is a (prefix, *excluded_prefixes) tuple matched by the account.
+        """
+        accounts_prefix_map = defaultdict(list)
+        if not prefixes:
+            return accounts_prefix_map
+
+        prefilter = self.env['account.account']._check_company_domain(self.get_report_company_ids(options))
+        accounts = self.env['account.account'].browse(self.env['account.account']._where_calc(prefilter))
+
+        # Sorting the codes makes all the accounts matching a prefix contiguous in the index
+        sorted_codes = []
+        account_ids_by_tag = defaultdict(set)
+        for account in accounts:
+            if account.code:
+                sorted_codes.append((account.code, account.id))
+            for tag_id in account.tag_ids.ids or [False]:
+                account_ids_by_tag[tag_id].add(account.id)
+        sorted_codes.sort()
+        codes_index = [code for code, _account_id in sorted_codes]
+
+        def get_account_ids_matching_prefix(prefix):
+            # All codes starting with prefix are located between prefix itself and prefix followed by the highest character
+            start = bisect.bisect_left(codes_index, prefix)
+            end = bisect.bisect_left(codes_index, prefix + '\U0010FFFF', lo=start)
+            return {account_id for _code, account_id in sorted_codes[start:end]}
+
+        for prefix, excluded_prefixes in prefixes:
+            tag_match = ACCOUNT_CODES_ENGINE_TAG_ID_PREFIX_REGEX.match(prefix)
+
+            if tag_match:
+                if tag_match['ref']:
+                    tag_id = self.env['ir.model.data']._xmlid_to_res_id(tag_match['ref'])
+                else:
+                    tag_id = int(tag_match['id'])
+
+                matching_account_ids = set(account_ids_by_tag.get(tag_id, ()))
+            else:
+                matching_account_ids = get_account_ids_matching_prefix(prefix)
+
+            for excluded_prefix in excluded_prefixes:
+                matching_account_ids -= get_account_ids_matching_prefix(excluded_prefix)
+
+            for account_id in matching_account_ids:
+                accounts_prefix_map[account_id].append((prefix, *excluded_prefixes))
+
+        return accounts_prefix_map
+
     def _compute_formula_batch_with_engine_external(self, options, date_scope, formulas_dict, current_groupby, next_groupby, offset=0, limit=None, warnings=None):
         """ Report engine.
 
@@ -5811,21 +5985,140 @@ class AccountReport(models.Model):
             }
         }
 
+    def export_file_async(self, options, file_generator):
+        """ Same as export_file, but generating the file in a cron, so that huge exports don't hit the time limit of the
+        HTTP workers. The file is stored as an attachment of an account.report.export.job, whose progress the client can follow.
+        """
+        self.ensure_one()
+
+        export_options = {**options, 'export_mode': 'file'}
+        self.env['account.report.export.job']._enqueue(self, export_options, file_generator)
+
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'type': 'info',
+                'title': _("Export in progress"),
+                'message': _("The file is being generated in the background. You will be notified once it is ready."),
+            },
+        }
+
+    def _notify_export_progress(self, done_increment, total_increment=0):
+        """ Reports the progress of the export being generated, if it runs as an account.report.export.job. """
+        job_id = self._context.get('account_report_export_job_id')
+        if job_id:
+            self.env['account.report.export.job'].browse(job_id)._update_progress(done_increment, total_increment)
+
     def _get_report_send_recipients(self, options):
         custom_handler_model = self._get_custom_handler_model()
         if custom_handler_model and hasattr(self.env[custom_handler_model], '_get_report_send_recipients'):
             return self.env[custom_handler_model]._get_report_send_recipients(options)
         return self.env['res.partner']
 
-    def export_to_pdf(self, options):
-        self.ensure_one()
+    def _split_lines_by_partner(self, options, lines):
+        """ Splits the lines of the report, computed for several partners, into the lines the report would have if it was computed
+        for each of them separately.
+
+        :return: A dict {partner_id: lines}, or None if the report does not support it.
+        """
+        custom_handler_model = self._get_custom_handler_model()
+        if custom_handler_model and hasattr(self.env[custom_handler_model], '_split_lines_by_partner'):
+            return self.env[custom_handler_model]._split_lines_by_partner(options, lines)
+        return None
 
-        base_url = self.env['ir.config_parameter'].sudo().get_param('report.url') or self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+    def _get_pdf_export_base_url(self):
+        return self.env['ir.config_parameter'].sudo().get_param('report.url') or self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+
+    def _get_pdf_export_footer(self, base_url):
         rcontext = {
             'mode': 'print',
             'base_url': base_url,
             'company': self.env.company,
         }
+        footer = self.env['ir.actions.report']._render_template("account_reports.internal_layout", values=rcontext)
+        footer = self.env['ir.actions.report']._render_template("web.minimal_layout", values=dict(rcontext, subst=True, body=markupsafe.Markup(footer.decode())))
+        return footer.decode()
+
+    @api.model
+    def _run_pdf_export_wkhtmltopdf(self, bodies, footer, landscape):
+        return self.env['ir.actions.report']._run_wkhtmltopdf(
+            bodies,
+            footer=footer,
+            landscape=landscape or self._context.get('force_landscape_printing'),
+            specific_paperformat_args={
+                'data-report-margin-top': 10,
+                'data-report-header-spacing': 10,
+                'data-report-margin-bottom': 15,
+            }
+        )
+
+    def _export_to_pdf_by_partner(self, options, partners):
+        """ Generates the PDF export of the report for each of the provided partners, as export_to_pdf would do with options
+        filtered on each partner, but computing the options and lines only once for all of them when the report supports it
+        (see _split_lines_by_partner). The PDF files are then generated in parallel.
+
+        :return: A dict {partner_id: export_to_pdf result}
+        """
+        self.ensure_one()
+
+        print_options = self.get_options(previous_options={**options, 'partner_ids': partners.ids, 'export_mode': 'print'})
+        lines_by_partner = None
+        if not print_options['sections']:
+            lines_by_partner = self._split_lines_by_partner(print_options, self._filter_out_folded_children(self._get_lines(print_options)))
+
+        rslt = {}
+        base_url = self._get_pdf_export_base_url()
+        bodies_by_partner = {}
+        for partner in partners:
+            if lines_by_partner is None or partner.id not in lines_by_partner:
+                rslt[partner.id] = self.export_to_pdf({**options, 'partner_ids': partner.ids})
+                continue
+
+            partner_options = {
+                **print_options,
+                'partner_ids': partner.ids,
+                'selected_partner_ids': [partner.name] if partner.name else [],
+            }
+            bodies_by_partner[partner.id] = [self._get_pdf_export_html(partner_options, lines_by_partner[partner.id], additional_context={'base_url': base_url})]
+
+        if bodies_by_partner:
+            footer = self._get_pdf_export_footer(base_url)
+            landscape = len(print_options['columns']) > 5 or print_options.get('horizontal_split')
+            file_name = self.get_default_report_filename(print_options, 'pdf')
+            files_content = self._run_pdf_export_wkhtmltopdf_parallel(list(bodies_by_partner.values()), footer, landscape)
+            for partner_id, file_content in zip(bodies_by_partner, files_content):
+                rslt[partner_id] = {
+                    'file_name': file_name,
+                    'file_content': file_content,
+                    'file_type': 'pdf',
+                }
+
+        return rslt
+
+    def _run_pdf_export_wkhtmltopdf_parallel(self, bodies_list, footer, landscape):
+        """ Runs _run_pdf_export_wkhtmltopdf for each element of bodies_list, using a pool of threads (each with its own cursor),
+        so that several wkhtmltopdf processes run at the same time.
+
+        :return: The list of the generated PDF files content, in the same order as bodies_list.
+        """
+        workers_count = int(self.env['ir.config_parameter'].sudo().get_param('account_reports.pdf_export_workers', PDF_EXPORT_WORKERS_COUNT))
+        if workers_count <= 1 or len(bodies_list) <= 1 or getattr(threading.current_thread(), 'testing', False):
+            return [self._run_pdf_export_wkhtmltopdf(bodies, footer, landscape) for bodies in bodies_list]
+
+        uid, context, registry = self.env.uid, self.env.context, self.env.registry
+
+        def run_wkhtmltopdf(bodies):
+            with registry.cursor() as cr:
+                return self.with_env(api.Environment(cr, uid, context))._run_pdf_export_wkhtmltopdf(bodies, footer, landscape)
+
+        with ThreadPoolExecutor(max_workers=min(workers_count, len(bodies_list))) as executor:
+            return list(executor.map(run_wkhtmltopdf, bodies_list))
+
+    def export_to_pdf(self, options):
+        self.ensure_one()
+
+        base_url = self._get_pdf_export_base_url()
 
         print_options = self.get_options(previous_options={**options, 'export_mode': 'print'})
         if print_options['sections']:
@@ -5842,8 +6135,7 @@ class AccountReport(models.Model):
             key=lambda report: len(report[1]['columns']) > 5 or report[1].get('horizontal_split')
         )
 
-        footer = self.env['ir.actions.report']._render_template("account_reports.internal_layout", values=rcontext)
-        footer = self.env['ir.actions.report']._render_template("web.minimal_layout", values=dict(rcontext, subst=True, body=markupsafe.Markup(footer.decode())))
+        footer = self._get_pdf_export_footer(base_url)
 
         action_report = self.env['ir.actions.report']
         files_stream = []
@@ -5851,24 +6143,15 @@ class AccountReport(models.Model):
             bodies = []
 
             for report, report_options in reports_with_options:
+                lines = report._filter_out_folded_children(report._get_lines(report_options))
                 bodies.append(report._get_pdf_export_html(
                     report_options,
-                    report._filter_out_folded_children(report._get_lines(report_options)),
+                    lines,
                     additional_context={'base_url': base_url}
                 ))
+                self._notify_export_progress(len(lines), len(lines))
 
-            files_stream.append(
-                io.BytesIO(action_report._run_wkhtmltopdf(
-                    bodies,
-                    footer=footer.decode(),
-                    landscape=is_landscape or self._context.get('force_landscape_printing'),
-                    specific_paperformat_args={
-                        'data-report-margin-top': 10,
-                        'data-report-header-spacing': 10,
-                        'data-report-margin-bottom': 15,
-                    }
-                )
-            ))
+            files_stream.append(io.BytesIO(self._run_pdf_export_wkhtmltopdf(bodies, footer, is_landscape)))
 
         if len(files_stream) > 1:
             result_stream = action_report._merge_pdfs(files_stream)
@@ -5972,11 +6255,20 @@ class AccountReport(models.Model):
             return workbook.add_worksheet(new_sheet_name)
 
         self.ensure_one()
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {
-            'in_memory': True,
-            'strings_to_formulas': False,
-        })
+        streaming = self._is_xlsx_streaming_enabled()
+        if streaming:
+            # Rows are flushed to temporary files as soon as they are written, keeping the memory usage constant.
+            output = tempfile.TemporaryFile()
+            workbook = xlsxwriter.Workbook(output, {
+                'constant_memory': True,
+                'strings_to_formulas': False,
+            })
+        else:
+            output = io.BytesIO()
+            workbook = xlsxwriter.Workbook(output, {
+                'in_memory': True,
+                'strings_to_formulas': False,
+            })
 
         print_options = self.get_options(previous_options={**options, 'export_mode': 'print'})
         if print_options['sections']:
@@ -5988,7 +6280,12 @@ class AccountReport(models.Model):
         for report in reports_to_print:
             report_options = report.get_options(previous_options={**print_options, 'selected_section_id': report.id})
             reports_options.append(report_options)
-            report._inject_report_into_xlsx_sheet(report_options, workbook, add_worksheet_unique_name(workbook, report.name))
+            report._inject_report_into_xlsx_sheet(
+                report_options,
+                workbook,
+                add_worksheet_unique_name(workbook, report.name),
+                streaming=streaming and report._can_stream_xlsx_export(report_options),
+            )
 
         self._add_options_xlsx_sheet(workbook, reports_options)
 
@@ -6003,6 +6300,82 @@ class AccountReport(models.Model):
             'file_type': 'xlsx',
         }
 
+    def _is_xlsx_streaming_enabled(self):
+        """ Whether XLSX exports should be generated in streaming mode, pulling the lines lazily from the expansion functions and
+        writing them with a constant memory usage. This is meant for huge exports (e.g. a fully unfolded general ledger).
+        """
+        return self._context.get('xlsx_streaming') or str2bool(self.env['ir.config_parameter'].sudo().get_param('account_reports.xlsx_streaming', 'False'))
+
+    def _can_stream_xlsx_export(self, options):
+        """ Streaming is only possible when the lines do not need to be known all at once, which is the case when they need to be sorted,
+        or when a custom handler post-processes the whole list of lines.
+        """
+        if options.get('order_column'):
+            return False
+
+        custom_handler_model = self._get_custom_handler_model()
+        if custom_handler_model:
+            handler_class = type(self.env[custom_handler_model])
+            base_handler_class = type(self.env['account.report.custom.handler'])
+            if handler_class._custom_line_postprocessor is not base_handler_class._custom_line_postprocessor:
+                return False
+
+        return True
+
+    def _get_xlsx_streamed_lines(self, options):
+        """ Generator yielding the same lines as _filter_out_folded_children(_get_lines(options)) would, in the same order, but without
+        building them all at once: the lines are first computed without unfolding anything, and each line to unfold is then
+        expanded when reached, following its 'load more' lines page by page if the expand function returns some.
+        """
+        def expand_line(line):
+            progress = line.get('progress')
+            offset = 0
+            while True:
+                sublines = self._expand_unfoldable_line(
+                    line['expand_function'], line['id'], line.get('groupby'), options, progress, offset, line.get('horizontal_split_side'),
+                )
+                # Same as get_expanded_lines
+                self._inject_account_names_for_consolidation(sublines)
+                self._format_column_values(options, sublines)
+
+                load_more_line = None
+                for subline in sublines:
+                    if self._get_markup(subline['id']) == 'load_more':
+                        load_more_line = subline
+                        continue
+
+                    yield subline
+
+                    # Sublines are generated with the actual options, so their 'unfolded' key is already right
+                    if subline.get('unfolded') and subline.get('expand_function'):
+                        yield from expand_line(subline)
+
+                if not load_more_line:
+                    break
+                offset = load_more_line['offset']
+                progress = load_more_line['progress']
+
+        def generate_lines():
+            for line in self._get_lines({**options, 'unfold_all': False, 'unfolded_lines': []}):
+                # Lines that are unfolded even without unfolding anything have already been expanded by _get_lines
+                needs_expansion = line.get('unfoldable') and not line.get('unfolded') and (options['unfold_all'] or line['id'] in options['unfolded_lines'])
+                if needs_expansion:
+                    line['unfolded'] = True
+
+                yield line
+
+                if needs_expansion and line.get('expand_function'):
+                    yield from expand_line(line)
+
+        # Same as _filter_out_folded_children
+        folded_lines = set()
+        for line in generate_lines():
+            if line.get('unfoldable') and not line.get('unfolded'):
+                folded_lines.add(line['id'])
+
+            if 'parent_id' not in line or line['parent_id'] not in folded_lines:
+                yield line
+
     @api.model
     def _set_xlsx_cell_sizes(self, sheet, fonts, col, row, value, style, has_colspan):
         """ This small helper will resize the cells if needed, to allow to get a better output. """
@@ -6060,11 +6433,18 @@ class AccountReport(models.Model):
                 fonts[font_type] = ImageFont.load_default()
         return fonts
 
-    def _inject_report_into_xlsx_sheet(self, options, workbook, sheet):
+    def _inject_report_into_xlsx_sheet(self, options, workbook, sheet, streaming=False):
+        """ Writes the lines of the report into sheet.
+
+        :param streaming: If True, the lines are generated lazily by _get_xlsx_streamed_lines and written one by one, and the column
+                          widths are only computed from the first XLSX_STREAMING_SAMPLE_SIZE lines.
+        """
         fonts = self._get_xlsx_export_fonts()
+        measure_cell_sizes = True
 
         def write_cell(sheet, x, y, value, style, colspan=1, datetime=False):
-            self._set_xlsx_cell_sizes(sheet, fonts, x, y, value, style, colspan > 1)
+            if measure_cell_sizes:
+                self._set_xlsx_cell_sizes(sheet, fonts, x, y, value, style, colspan > 1)
             if colspan == 1:
                 if datetime:
                     sheet.write_datetime(y, x, value, style)
@@ -6130,30 +6510,46 @@ class AccountReport(models.Model):
             return level_formats.get(content_type, level_formats['default'])
 
         print_mode_self = self.with_context(no_format=True)
-        lines = self._filter_out_folded_children(print_mode_self._get_lines(options))
+        if streaming:
+            # Only a sample of the lines is kept in memory, to determine the layout of the sheet
+            lines_generator = print_mode_self._get_xlsx_streamed_lines(options)
+            lines = list(itertools.islice(lines_generator, XLSX_STREAMING_SAMPLE_SIZE))
+        else:
+            lines_generator = iter(())
+            lines = self._filter_out_folded_children(print_mode_self._get_lines(options))
+            # The total number of lines is only known when not streaming
+            self._notify_export_progress(0, len(lines))
         annotations = self.get_annotations(options)
 
         # For reports with lines generated for accounts, the account name and codes are shown in a single column.
         # To help user post-process the report if they need, we should in such a case split the account name and code in two columns.
         account_lines_split_names = {}
-        for line in lines:
+
+        def add_account_line_split_name(line):
             line_model = self._get_model_info_from_id(line['id'])[0]
             if line_model == 'account.account':
                 # Reuse the _split_code_name to split the name and code in two values.
                 account_lines_split_names[line['id']] = self.env['account.account']._split_code_name(line['name'])
 
+        for line in lines:
+            add_account_line_split_name(line)
+        split_account_names = bool(account_lines_split_names)
+
         # Set the (Account) Name column width to 50.
         # If we have account lines and split the name and code in two columns, we will also set the code column.
-        if len(account_lines_split_names) > 0:
+        if split_account_names:
             sheet.set_column(0, 0, 13)
             sheet.set_column(1, 1, 50)
         else:
             sheet.set_column(0, 0, 50)
 
         if not options.get('no_xlsx_currency_code_columns'):
+            required_currency_code_columns = self._get_xlsx_currency_codes_required_columns()
             self._add_xlsx_currency_codes_columns(options, lines)
+        else:
+            required_currency_code_columns = set()
 
-        original_x_offset = 1 if len(account_lines_split_names) > 0 else 0
+        original_x_offset = 1 if split_account_names else 0
 
         y_offset = 0
         # 1 and not 0 to leave space for the line name. original_x_offset allows making place for the code column if needed.
@@ -6189,7 +6585,7 @@ class AccountReport(models.Model):
         y_offset += 1
         x_offset = original_x_offset + 1
 
-        if account_lines_split_names:
+        if split_account_names:
             # If we have a separate account code column, add a title for it
             write_cell(sheet, x_offset - 2, y_offset, _("Code"), title_format)
             write_cell(sheet, x_offset - 1, y_offset, _("Account Name"), title_format)
@@ -6219,7 +6615,24 @@ class AccountReport(models.Model):
 
         # Add lines.
         counter = 1
-        for y, line in enumerate(lines):
+        sample_size = len(lines)
+        written_lines_count = 0
+        for y, line in enumerate(itertools.chain(lines, lines_generator)):
+            if written_lines_count == XLSX_EXPORT_PROGRESS_STEP:
+                self._notify_export_progress(written_lines_count)
+                written_lines_count = 0
+            written_lines_count += 1
+
+            if y == sample_size:
+                # Past the sample, the lines are streamed: keep the column widths computed so far.
+                measure_cell_sizes = False
+
+            if y >= sample_size:
+                if split_account_names:
+                    add_account_line_split_name(line)
+                if required_currency_code_columns:
+                    self._add_xlsx_currency_codes_values(options, [line], required_currency_code_columns)
+
             level = line.get('level')
             if level == 0:
                 y_offset += 1
@@ -6244,9 +6657,9 @@ class AccountReport(models.Model):
                 cell_format = get_format('default_indent', level)
 
             x_offset = original_x_offset + 1
-            if lines[y]['id'] in account_lines_split_names:
+            if line['id'] in account_lines_split_names:
                 # Write the Account Code and Name columns.
-                code, name = account_lines_split_names[lines[y]['id']]
+                code, name = account_lines_split_names[line['id']]
                 # Don't indent the account code and don't format is as a monetary value either.
                 write_cell(sheet, 0, y + y_offset, code, account_code_cell_format)
                 write_cell(sheet, 1, y + y_offset, name, cell_format)
@@ -6285,15 +6698,13 @@ class AccountReport(models.Model):
                     counter += 1
                 write_cell(sheet, annotations_x_offset, y + y_offset, "\n".join(line_annotation_text), annotation_format)
 
+        self._notify_export_progress(written_lines_count)
+
     def _add_xlsx_currency_codes_columns(self, options, lines):
         """ Adds a 'Currency Code' column for each column displaying amounts in foreign currencies. This is done because
         the raw number is displayed on the xlsx file, making it impossible to know the currency used.
         To have it displayed, the line must have an expression label starting with '_currency_' """
-        required_currency_code_columns = {
-            label.removeprefix('_currency_')
-            for label in self.line_ids.expression_ids.mapped('label')
-            if label.startswith('_currency_')
-        }
+        required_currency_code_columns = self._get_xlsx_currency_codes_required_columns()
 
         new_columns = []
         for col in options['columns']:
@@ -6308,8 +6719,17 @@ class AccountReport(models.Model):
                 })
 
         options['columns'] = new_columns
+        self._add_xlsx_currency_codes_values(options, lines, required_currency_code_columns)
+
+    def _get_xlsx_currency_codes_required_columns(self):
+        return {
+            label.removeprefix('_currency_')
+            for label in self.line_ids.expression_ids.mapped('label')
+            if label.startswith('_currency_')
+        }
 
-        # Add 'Currency Code' values to each line
+    def _add_xlsx_currency_codes_values(self, options, lines, required_currency_code_columns):
+        """ Adds the 'Currency Code' values to each line, once the columns have been added by _add_xlsx_currency_codes_columns. """
         for line in lines:
             new_column_values = []
 
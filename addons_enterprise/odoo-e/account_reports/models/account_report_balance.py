@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models
+from odoo.tools import SQL, create_index, create_unique_index, str2bool
+
+# Fields of account.move.line kept as grouping keys in account.report.balance. Report domains and groupbys only using those fields
+# (together with 'date', at month granularity) can be evaluated on the pre-aggregated balances instead of the journal items.
+BALANCE_STORE_GROUPBY_FIELDS = ('company_id', 'account_id', 'journal_id', 'partner_id', 'currency_id')
+
+# Fields of account.move.line whose change moves its balance between buckets or changes it.
+BALANCE_STORE_LINE_FIELDS = {
+    *BALANCE_STORE_GROUPBY_FIELDS, 'move_id', 'date', 'display_type', 'debit', 'credit', 'balance', 'amount_currency',
+    'price_unit', 'quantity', 'discount',
+}
+
+# Key of the buckets of account.report.balance. The optional fields are coalesced so that buckets without them are unique as well.
+BALANCE_STORE_BUCKET_EXPRESSIONS = [
+    'company_id', 'account_id', 'COALESCE(journal_id, 0)', 'COALESCE(partner_id, 0)', 'COALESCE(currency_id, 0)', 'date',
+]
+
+
+class AccountReportBalance(models.Model):
+    _name = 'account.report.balance'
+    _description = "Pre-aggregated Journal Items Balances"
+    _log_access = False
+
+    company_id = fields.Many2one(comodel_name='res.company', required=True, readonly=True)
+    account_id = fields.Many2one(comodel_name='account.account', required=True, readonly=True)
+    journal_id = fields.Many2one(comodel_name='account.journal', readonly=True)
+    partner_id = fields.Many2one(comodel_name='res.partner', readonly=True)
+    currency_id = fields.Many2one(comodel_name='res.currency', readonly=True)
+    date = fields.Date(required=True, readonly=True, help="First day of the month of the aggregated journal items.")
+    debit = fields.Float(readonly=True)
+    credit = fields.Float(readonly=True)
+    balance = fields.Float(readonly=True)
+    amount_currency = fields.Float(readonly=True)
+    aml_count = fields.Integer(readonly=True)
+
+    def init(self):
+        super().init()
+        create_index(
+            self.env.cr,
+            indexname='account_report_balance_company_date_account_idx',
+            tablename=self._table,
+            expressions=['company_id', 'date', 'account_id'],
+        )
+        # One row per bucket, so that the balances of the changed journal items can be applied as deltas
+        create_unique_index(
+            self.env.cr,
+            'account_report_balance_bucket_uniq',
+            self._table,
+            BALANCE_STORE_BUCKET_EXPRESSIONS,
+        )
+
+    @api.model
+    def _is_enabled(self):
+        return str2bool(self.env['ir.config_parameter'].sudo().get_param('account_reports.balance_store', 'False'))
+
+    @api.model
+    def _rebuild(self):
+        """ Recomputes the whole table from the posted journal items, or empties it if the store is disabled. """
+        self.env['account.move.line'].flush_model()
+        self.env.cr.execute(SQL("DELETE FROM %s", SQL.identifier(self._table)))
+        if self._is_enabled():
+            self.env.cr.execute(self._get_aggregation_query(SQL("TRUE")))
+
+    @api.model
+    def _apply_lines(self, lines, sign):
+        """ Adds (sign=1) or subtracts (sign=-1) the current balances of the provided journal items to/from their buckets.
+        Callers subtract the journal items before changing them and add them back afterwards.
+        """
+        if not lines:
+            return
+
+        self.env['account.move.line'].flush_model()
+        self.env.cr.execute(self._get_aggregation_query(SQL("account_move_line.id = ANY(%s)", lines.ids), sign=sign))
+        empty_bucket_ids = [bucket_id for bucket_id, aml_count in self.env.cr.fetchall() if not aml_count]
+        if empty_bucket_ids:
+            self.env.cr.execute(SQL("DELETE FROM account_report_balance WHERE id = ANY(%s)", empty_bucket_ids))
+        self.invalidate_model()
+
+    @api.model
+    def _get_aggregation_query(self, where_sql, sign=1):
+        return SQL(
+            """
+            INSERT INTO account_report_balance (company_id, account_id, journal_id, partner_id, currency_id, date, debit, credit, balance, amount_currency, aml_count)
+            SELECT
+                account_move_line.company_id,
+                account_move_line.account_id,
+                account_move_line.journal_id,
+                account_move_line.partner_id,
+                account_move_line.currency_id,
+                DATE_TRUNC('month', account_move_line.date)::date,
+                %(sign)s * SUM(account_move_line.debit),
+                %(sign)s * SUM(account_move_line.credit),
+                %(sign)s * SUM(account_move_line.balance),
+                %(sign)s * SUM(account_move_line.amount_currency),
+                %(sign)s * COUNT(*)
+            FROM account_move_line
+            WHERE account_move_line.parent_state = 'posted'
+            AND (account_move_line.display_type IS NULL OR account_move_line.display_type NOT IN ('line_section', 'line_note'))
+            AND %(where_sql)s
+            GROUP BY 1, 2, 3, 4, 5, 6
+            ON CONFLICT (%(bucket_expressions)s) DO UPDATE SET
+                debit = account_report_balance.debit + EXCLUDED.debit,
+                credit = account_report_balance.credit + EXCLUDED.credit,
+                balance = account_report_balance.balance + EXCLUDED.balance,
+                amount_currency = account_report_balance.amount_currency + EXCLUDED.amount_currency,
+                aml_count = account_report_balance.aml_count + EXCLUDED.aml_count
+            RETURNING id, aml_count
+            """,
+            sign=sign,
+            where_sql=where_sql,
+            bucket_expressions=SQL(', '.join(BALANCE_STORE_BUCKET_EXPRESSIONS)),
+        )
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import hashlib
+import json
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+# Engines whose results only depend on posted journal items and on the report/account configuration, and can hence be cached
+# safely as long as the cache gets invalidated when those change. 'external' and 'custom' are excluded, as they respectively rely
+# on manual values and on arbitrary python code.
+TOTALS_CACHE_ENGINES = {'domain', 'account_codes', 'tax_tags', 'aggregation'}
+
+# Options keys that only influence the rendering of the report, and not the computed totals. They are removed from the options
+# before hashing them, so that unfolding a line or changing the display does not lead to a cache miss.
+TOTALS_CACHE_IGNORED_OPTIONS = {
+    'buttons', 'column_headers', 'column_groups', 'unfolded_lines', 'unfold_all', 'loading_call_number', 'hide_0_lines',
+    'order_column', 'search_bar', 'filter_search_bar', 'rounding_unit', 'rounding_unit_names', 'hierarchy', 'display_hierarchy_filter',
+    'export_mode', 'readonly_query', 'show_growth_comparison', 'column_percent_comparison', 'show_debug_column', 'sections',
+    'sections_source_id', 'has_inactive_sections', 'variants_source_id', 'available_variants', 'selected_variant_id', 'report_title',
+    'is_opening_date_alert', 'custom_display_config', 'show_account', 'show_currency', 'prefix_groups_threshold',
+}
+
+
+class AccountReportTotalsCache(models.Model):
+    _name = 'account.report.totals.cache'
+    _description = "Account Report Expression Totals Cache"
+
+    report_id = fields.Many2one(comodel_name='account.report', required=True, index=True, ondelete='cascade')
+    cache_key = fields.Char(required=True)
+    column_group_key = fields.Char()
+    company_ids = fields.Json(help="Ids of the companies whose journal items were used to compute these totals.")
+    date_to = fields.Date(index=True, help="Last date of the journal items used to compute these totals.")
+    totals = fields.Json()
+    snapshot = fields.Char(help="Snapshot of the transaction computing these totals (txid_snapshot).")
+    xid = fields.Char(help="Id of the transaction computing these totals, if it wrote anything.")
+
+    _sql_constraints = [
+        ('cache_key_uniq', 'unique (cache_key)', "Only one cache entry can exist per key."),
+    ]
+
+    @api.model
+    def _get_stale_condition(self, company_ids, date_to, snapshot, xid):
+        """ Returns the SQL condition telling whether totals computed in a transaction are stale: a change of the journal items
+        they depend on was made by another transaction, not visible in the snapshot they were computed with. This is checked
+        both when storing and reading the totals, as such a change may be committed between the computation of the totals
+        and their storage, after its own invalidation of the entries.
+        """
+        return SQL(
+            """
+            EXISTS (
+                SELECT 1
+                FROM account_report_totals_cache_invalidation invalidation
+                WHERE invalidation.company_id IN (SELECT company_id::integer FROM jsonb_array_elements_text(%(company_ids)s) AS company(company_id))
+                AND invalidation.date_from <= %(date_to)s
+                AND invalidation.xid::bigint != COALESCE(%(xid)s::bigint, 0)
+                AND NOT txid_visible_in_snapshot(invalidation.xid::bigint, %(snapshot)s::txid_snapshot)
+            )
+            """,
+            company_ids=company_ids,
+            date_to=date_to,
+            snapshot=snapshot,
+            xid=xid,
+        )
+
+    @api.model
+    def _get_cache_key(self, report, column_group_options, grouped_formulas):
+        """ Builds the key identifying the totals computed by report for a given column group, so that two users opening the same report
+        with equivalent options share the same entry.
+
+        :param report: The account.report being computed.
+        :param column_group_options: The options of the column group, as returned by _split_options_per_column_group.
+        :param grouped_formulas: The formulas to compute, as built by _compute_expression_totals_for_each_column_group.
+        :return: A string, or None if those totals cannot be cached.
+        """
+        if not TOTALS_CACHE_ENGINES.issuperset(grouped_formulas):
+            return None
+
+        formulas_signature = []
+        for engine, formulas_by_grouping_key in grouped_formulas.items():
+            for grouping_key, formulas_dict in formulas_by_grouping_key.items():
+                for formula, expressions in formulas_dict.items():
+                    formulas_signature.append([
+                        engine,
+                        list(grouping_key),
+                        formula,
+                        sorted(
+                            (expr.id, expr.subformula or '', expr.date_scope, expr.figure_type or '', str(expr.write_date))
+                            for expr in expressions
+                        ),
+                    ])
+
+        hashed_options = {key: value for key, value in column_group_options.items() if key not in TOTALS_CACHE_IGNORED_OPTIONS}
+        to_hash = {
+            'report': report.id,
+            'options': hashed_options,
+            'formulas': sorted(formulas_signature, key=str),
+            # Record rules on journal items depend on the groups of the user
+            'groups': sorted(self.env.user.groups_id.ids),
+        }
+        try:
+            serialized = json.dumps(to_hash, sort_keys=True, default=str)
+        except (TypeError, ValueError):
+            return None
+        return hashlib.sha256(serialized.encode()).hexdigest()
+
+    @api.model
+    def _get_totals(self, cache_key):
+        """ Returns the totals stored for cache_key, in the format of _compute_expression_totals_for_single_column_group, or None
+        if there is none.
+        """
+        self.env.cr.execute(SQL(
+            """
+            SELECT cache.totals
+            FROM account_report_totals_cache cache
+            WHERE cache.cache_key = %s
+            AND NOT %s
+            """,
+            cache_key,
+            self._get_stale_condition(SQL("cache.company_ids"), SQL("cache.date_to"), SQL("cache.snapshot"), SQL("cache.xid")),
+        ))
+        row = self.env.cr.fetchone()
+        if not row:
+            return None
+
+        expressions = self.env['account.report.expression'].browse([int(expr_id) for expr_id in row[0]]).exists()
+        expressions_by_id = {expr.id: expr for expr in expressions}
+        totals = {}
+        for expr_id, expression_result in row[0].items():
+            expression = expressions_by_id.get(int(expr_id))
+            if not expression:
+                # The configuration changed since the entry was stored
+                return None
+            value = expression_result['value']
+            if isinstance(value, list):
+                value = [tuple(grouped_value) for grouped_value in value]
+            totals[expression] = {'value': value, 'has_sublines': expression_result['has_sublines']}
+        return totals
+
+    @api.model
+    def _store_totals(self, report, cache_key, column_group_options, totals):
+        """ Stores the totals computed for a column group, so that they can be reused by subsequent calls with the same cache_key.
+        """
+        try:
+            serialized_totals = json.dumps({
+                str(expression.id): {'value': result['value'], 'has_sublines': bool(result.get('has_sublines'))}
+                for expression, result in totals.items()
+            })
+        except (TypeError, ValueError):
+            # Some values cannot be stored (e.g. dates); don't cache them.
+            return
+
+        # The totals were computed with the snapshot of the current transaction (repeatable read)
+        self.env.cr.execute(SQL("SELECT txid_current_snapshot()::text, txid_current_if_assigned()::text"))
+        snapshot, xid = self.env.cr.fetchone()
+        company_ids = json.dumps(report.get_report_company_ids(column_group_options))
+        date_to = column_group_options['date']['date_to']
+        query = SQL(
+            """
+            INSERT INTO account_report_totals_cache (report_id, cache_key, column_group_key, company_ids, date_to, totals, snapshot, xid, create_date, create_uid, write_date, write_uid)
+            SELECT %(report_id)s, %(cache_key)s, %(column_group_key)s, %(company_ids)s, %(date_to)s, %(totals)s, %(snapshot)s, %(xid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s
+            WHERE NOT %(stale_condition)s
+            ON CONFLICT (cache_key) DO NOTHING
+            """,
+            report_id=report.id,
+            cache_key=cache_key,
+            column_group_key=column_group_options.get('owner_column_group'),
+            company_ids=company_ids,
+            date_to=date_to,
+            totals=serialized_totals,
+            snapshot=snapshot,
+            xid=xid,
+            uid=self.env.uid,
+            stale_condition=self._get_stale_condition(SQL("%s::jsonb", company_ids), SQL("%s::date", date_to), snapshot, xid),
+        )
+
+        if self.env.cr.readonly:
+            # Reports are typically rendered on a readonly cursor; the entry is stored using a separate one.
+            with self.env.registry.cursor() as cr:
+                cr.execute(query)
+        else:
+            self.env.cr.execute(query)
+
+    @api.model
+    def _invalidate(self, company_ids, date_from=None):
+        """ Removes the cache entries possibly impacted by a change of the journal items of the provided companies.
+
+        :param company_ids: Ids of the companies whose journal items changed.
+        :param date_from: The smallest date of the changed journal items. All entries ending before this date remain valid.
+                          If None, all the entries of those companies are removed.
+        """
+        if not company_ids:
+            return
+
+        # Record the change, so that the totals computed by concurrent transactions not seeing it are not stored nor read.
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO account_report_totals_cache_invalidation (company_id, date_from, xid, invalidation_date)
+            SELECT company_id, %(date_from)s, txid_current()::text, NOW() AT TIME ZONE 'UTC'
+            FROM unnest(%(company_ids)s::integer[]) AS company(company_id)
+            ON CONFLICT (company_id, xid) DO UPDATE
+            SET date_from = LEAST(account_report_totals_cache_invalidation.date_from, EXCLUDED.date_from)
+            """,
+            date_from=date_from or '0001-01-01',
+            company_ids=list(company_ids),
+        ))
+
+        self.env.cr.execute(SQL(
+            """
+            DELETE FROM account_report_totals_cache cache
+            WHERE %(date_condition)s
+            AND EXISTS (
+                SELECT 1
+                FROM jsonb_array_elements_text(cache.company_ids) AS cache_company(id)
+                WHERE cache_company.id::integer = ANY(%(company_ids)s)
+            )
+            """,
+            date_condition=SQL("cache.date_to >= %s", date_from) if date_from else SQL("TRUE"),
+            company_ids=list(company_ids),
+        ))
+
+    @api.autovacuum
+    def _gc_totals_cache(self):
+        self.env.cr.execute(SQL(
+            "DELETE FROM account_report_totals_cache WHERE create_date < %s",
+            fields.Datetime.subtract(fields.Datetime.now(), days=7),
+        ))
+        # The invalidations older than all the entries can't make any of them stale anymore.
+        self.env.cr.execute(SQL(
+            "DELETE FROM account_report_totals_cache_invalidation WHERE invalidation_date < %s",
+            fields.Datetime.subtract(fields.Datetime.now(), days=8),
+        ))
+
+
+class AccountReportTotalsCacheInvalidation(models.Model):
+    """ Changes of the journal items invalidating the cached totals, by transaction. They tell which totals computed by
+    concurrent transactions were computed without these changes (see _get_stale_condition). """
+    _name = 'account.report.totals.cache.invalidation'
+    _description = "Account Report Expression Totals Cache Invalidation"
+    _log_access = False
+
+    company_id = fields.Many2one(comodel_name='res.company', required=True, ondelete='cascade')
+    date_from = fields.Date(required=True, help="The smallest date of the changed journal items.")
+    xid = fields.Char(required=True, help="Id of the transaction changing the journal items.")
+    invalidation_date = fields.Datetime(required=True, index=True)
+
+    _sql_constraints = [
+        ('company_xid_uniq', 'unique (company_id, xid)', "Only one invalidation can exist per company and transaction."),
+    ]
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import logging
+import threading
+import types
+from datetime import timedelta
+
+from odoo import _, api, fields, models
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+# Crons processing the export jobs. Each of them can run in a different cron worker at the same time, the jobs being
+# claimed with SKIP LOCKED so that a job is never processed twice.
+EXPORT_JOB_CRON_XMLIDS = (
+    'account_reports.ir_cron_account_report_export_job_1',
+    'account_reports.ir_cron_account_report_export_job_2',
+    'account_reports.ir_cron_account_report_export_job_3',
+)
+# A job in progress whose progress was not reported for that long is considered lost (e.g. its worker was killed), and
+# processed again, at most EXPORT_JOB_MAX_ATTEMPTS times.
+EXPORT_JOB_TIMEOUT = timedelta(hours=1)
+EXPORT_JOB_MAX_ATTEMPTS = 3
+
+
+class AccountReportExportJob(models.Model):
+    _name = 'account.report.export.job'
+    _description = "Account Report Background Export"
+    _order = 'id desc'
+
+    report_id = fields.Many2one(comodel_name='account.report', required=True, readonly=True, ondelete='cascade')
+    options = fields.Json(required=True, readonly=True)
+    file_generator = fields.Char(required=True, readonly=True)
+    allowed_company_ids = fields.Json(readonly=True, help="Ids of the companies the export was requested with.")
+    state = fields.Selection(
+        selection=[
+            ('pending', "Pending"),
+            ('in_progress', "In Progress"),
+            ('done', "Done"),
+            ('failed', "Failed"),
+        ],
+        required=True,
+        default='pending',
+        readonly=True,
+        index=True,
+    )
+    progress_done = fields.Integer(string="Processed Lines", compute='_compute_progress')
+    progress_total = fields.Integer(string="Total Lines", compute='_compute_progress', help="Number of lines to export, or 0 if it is not known in advance.")
+    progress = fields.Float(compute='_compute_progress')
+    attempt_count = fields.Integer(readonly=True)
+    attachment_id = fields.Many2one(comodel_name='ir.attachment', readonly=True)
+    file_content = fields.Binary(related='attachment_id.datas')
+    file_name = fields.Char(related='attachment_id.name')
+    error_message = fields.Text(readonly=True)
+
+    @api.depends('state')
+    def _compute_progress(self):
+        # The progress is kept out of the job's row: it is written by other cursors while the job is processed.
+        progress_by_job = {
+            progress.job_id.id: progress
+            for progress in self.env['account.report.export.job.progress'].sudo().search([('job_id', 'in', self.ids)])
+        }
+        for job in self:
+            progress = progress_by_job.get(job.id)
+            job.progress_done = progress.done if progress else 0
+            job.progress_total = progress.total if progress else 0
+            if job.state == 'done':
+                job.progress = 100.0
+            elif job.progress_total:
+                job.progress = min(100.0, 100.0 * job.progress_done / job.progress_total)
+            else:
+                job.progress = 0.0
+
+    @api.model
+    def _enqueue(self, report, options, file_generator):
+        """ Creates a job generating the file of report returned by file_generator, and wakes up the crons processing them. """
+        job = self.create({
+            'report_id': report.id,
+            'options': options,
+            'file_generator': file_generator,
+            'allowed_company_ids': self.env.companies.ids,
+        })
+        for cron_xmlid in EXPORT_JOB_CRON_XMLIDS:
+            self.env.ref(cron_xmlid)._trigger()
+        return job
+
+    def get_status(self):
+        """ Called by the client to follow the progress of its exports. """
+        return [
+            {
+                'id': job.id,
+                'state': job.state,
+                'progress_done': job.progress_done,
+                'progress_total': job.progress_total,
+                'error_message': job.error_message,
+                'download_url': f'/web/content/{job.attachment_id.id}?download=true' if job.attachment_id else None,
+            }
+            for job in self
+        ]
+
+    def _update_progress(self, done_increment, total_increment=0):
+        """ Increments the progress of the job. As the job is processed in a single transaction, the progress is written using
+        a separate cursor, so that the client can see it while the export is still running. It is written in its own table,
+        as the job's row is written by the transaction processing it.
+        """
+        self.ensure_one()
+        query = SQL(
+            """
+            UPDATE account_report_export_job_progress
+            SET done = done + %s, total = total + %s, heartbeat = NOW() AT TIME ZONE 'UTC'
+            WHERE job_id = %s
+            """,
+            done_increment, total_increment, self.id,
+        )
+        if getattr(threading.current_thread(), 'testing', False):
+            self.env['account.report.export.job.progress'].flush_model()
+            self.env.cr.execute(query)
+            self.env['account.report.export.job.progress'].invalidate_model(['done', 'total', 'heartbeat'])
+            self.invalidate_recordset(['progress_done', 'progress_total', 'progress'])
+        else:
+            with self.env.registry.cursor() as cr:
+                cr.execute(query)
+
+    @api.model
+    def _claim_pending_job(self):
+        """ Marks the oldest pending job as in progress and returns it, skipping the ones currently being claimed by another worker. """
+        self.env.cr.execute(SQL(
+            """
+            WITH claimed_job AS (
+                UPDATE account_report_export_job
+                SET state = 'in_progress', attempt_count = COALESCE(attempt_count, 0) + 1, write_date = NOW() AT TIME ZONE 'UTC'
+                WHERE id = (
+                    SELECT id
+                    FROM account_report_export_job
+                    WHERE state = 'pending'
+                    ORDER BY id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id
+            )
+            INSERT INTO account_report_export_job_progress (job_id, done, total, heartbeat)
+            SELECT id, 0, 0, NOW() AT TIME ZONE 'UTC'
+            FROM claimed_job
+            ON CONFLICT (job_id) DO UPDATE SET done = 0, total = 0, heartbeat = EXCLUDED.heartbeat
+            RETURNING job_id
+            """
+        ))
+        row = self.env.cr.fetchone()
+        self.invalidate_model(['state', 'attempt_count', 'progress_done', 'progress_total', 'progress'])
+        self.env['account.report.export.job.progress'].invalidate_model()
+        return self.browse(row[0] if row else [])
+
+    @api.model
+    def _recover_lost_jobs(self):
+        """ Processes again the jobs in progress whose progress was not reported for EXPORT_JOB_TIMEOUT, as their worker is
+        most likely gone: they are pending again, or failed once they were attempted EXPORT_JOB_MAX_ATTEMPTS times.
+        """
+        self.env.cr.execute(SQL(
+            """
+            UPDATE account_report_export_job AS job
+            SET state = CASE WHEN job.attempt_count >= %(max_attempts)s THEN 'failed' ELSE 'pending' END,
+                error_message = CASE WHEN job.attempt_count >= %(max_attempts)s THEN %(error_message)s END,
+                write_date = NOW() AT TIME ZONE 'UTC'
+            FROM account_report_export_job_progress AS progress
+            WHERE progress.job_id = job.id
+              AND job.state = 'in_progress'
+              AND progress.heartbeat < %(heartbeat_limit)s
+            RETURNING job.id
+            """,
+            max_attempts=EXPORT_JOB_MAX_ATTEMPTS,
+            error_message=_("The export did not complete in time."),
+            heartbeat_limit=fields.Datetime.now() - EXPORT_JOB_TIMEOUT,
+        ))
+        lost_job_ids = [job_id for job_id, in self.env.cr.fetchall()]
+        if lost_job_ids:
+            _logger.warning("Export jobs %s were lost while in progress.", lost_job_ids)
+            self.invalidate_model(['state', 'error_message'])
+
+    @api.model
+    def _cron_process_export_jobs(self, job_count=5):
+        """ Generates the files of the pending export jobs.
+        :param job_count: maximum number of jobs to process before giving the worker back; the cron is retriggered if some remain.
+        """
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        self._recover_lost_jobs()
+        for dummy in range(job_count):
+            job = self._claim_pending_job()
+            if not job:
+                return
+
+            if auto_commit:
+                # Release the job row, so that its progress can be updated from another cursor.
+                self.env.cr.commit()
+
+            job._process()
+
+            if auto_commit:
+                self.env.cr.commit()
+
+        if self.search_count([('state', '=', 'pending')], limit=1):
+            self.env.ref(EXPORT_JOB_CRON_XMLIDS[0])._trigger()
+
+    def _process(self):
+        self.ensure_one()
+        report = self.report_id.with_user(self.create_uid).with_context(
+            allowed_company_ids=self.allowed_company_ids or self.create_uid.company_ids.ids,
+            account_report_export_job_id=self.id,
+            xlsx_streaming=True,
+        )
+
+        try:
+            with self.env.cr.savepoint():
+                export_result = report.dispatch_report_action(self.options, self.file_generator)
+                file_content = export_result['file_content']
+                if isinstance(file_content, types.GeneratorType):
+                    file_content = b''.join(file_content)
+                attachment = self.env['ir.attachment'].create({
+                    'name': export_result['file_name'],
+                    'raw': file_content,
+                    'mimetype': report.get_export_mime_type(export_result['file_type']),
+                    'res_model': self._name,
+                    'res_id': self.id,
+                })
+        except Exception as e:  # noqa: BLE001
+            _logger.exception("Export of report %s (job %s) failed.", self.report_id.id, self.id)
+            self.write({'state': 'failed', 'error_message': str(e)})
+            self.create_uid._bus_send('simple_notification', {
+                'type': 'danger',
+                'title': _("Export failed"),
+                'message': _("The export of %s could not be generated.", self.report_id.name),
+            })
+            return
+
+        self.write({'state': 'done', 'attachment_id': attachment.id})
+        self.create_uid._bus_send('simple_notification', {
+            'type': 'success',
+            'title': _("Export ready"),
+            'message': _("%s is ready to be downloaded from the report exports.", export_result['file_name']),
+        })
+
+    @api.autovacuum
+    def _gc_export_jobs(self):
+        """ Removes the old jobs, together with their attachment. """
+        self.search([('create_date', '<', fields.Datetime.subtract(fields.Datetime.now(), days=7))]).unlink()
+
+
+class AccountReportExportJobProgress(models.Model):
+    """ Progress of an export job being processed. It is updated by separate cursors while the job's row is written by
+    the transaction processing it, hence its own table: updating the job's row concurrently would make that transaction
+    fail on a serialization error. """
+    _name = 'account.report.export.job.progress'
+    _description = "Account Report Background Export Progress"
+    _log_access = False
+
+    job_id = fields.Many2one(comodel_name='account.report.export.job', required=True, readonly=True, ondelete='cascade')
+    done = fields.Integer(readonly=True)
+    total = fields.Integer(readonly=True)
+    heartbeat = fields.Datetime(readonly=True, help="Last time the progress was reported.")
+
+    _sql_constraints = [
+        ('job_uniq', 'UNIQUE(job_id)', "An export job has a single progress."),
+    ]
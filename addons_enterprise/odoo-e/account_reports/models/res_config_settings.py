@@ -19,6 +19,13 @@ class ResConfigSettings(models.TransientModel):
     account_tax_periodicity_journal_id = fields.Many2one(related='company_id.account_tax_periodicity_journal_id', string='Journal', readonly=False)
 
     account_reports_show_per_company_setting = fields.Boolean(compute="_compute_account_reports_show_per_company_setting")
+    account_reports_balance_store = fields.Boolean(string="Pre-aggregated Balances", config_parameter='account_reports.balance_store')
+
+    def set_values(self):
+        balance_store_was_enabled = self.env['account.report.balance']._is_enabled()
+        super().set_values()
+        if self.env['account.report.balance']._is_enabled() != balance_store_was_enabled:
+            self.env['account.report.balance']._rebuild()
 
     def open_tax_group_list(self):
         self.ensure_one()
@@ -86,6 +86,31 @@ class ResPartner(models.Model):
             },
         ])
 
+    def _get_partners_account_report_attachments(self, report, options):
+        """ Batch version of _get_partner_account_report_attachment, generating the report of each partner of self with
+        the provided options.
+
+        :return: A dict {partner_id: ir.attachment}
+        """
+        attachments_vals = []
+        for lang, partners in self.grouped('lang').items():
+            # Print the reports in the customers' language
+            lang_report = report.with_context(lang=lang) if lang else report
+            files_by_partner = lang_report._export_to_pdf_by_partner(options, partners)
+            for partner in partners:
+                attachment_file = files_by_partner[partner.id]
+                attachments_vals.append({
+                    'name': f"{partner.name} - {attachment_file['file_name']}",
+                    'res_model': self._name,
+                    'res_id': partner.id,
+                    'type': 'binary',
+                    'raw': attachment_file['file_content'],
+                    'mimetype': 'application/pdf',
+                })
+
+        attachments = self.env['ir.attachment'].create(attachments_vals)
+        return {attachment.res_id: attachment for attachment in attachments}
+
     def set_commercial_partner_main(self):
         self.ensure_one()
 
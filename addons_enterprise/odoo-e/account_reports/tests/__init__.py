@@ -34,3 +34,7 @@ from . import test_report_sections
 from . import test_budget
 from . import test_currency_table
 from . import test_followup_report
+from . import test_report_totals_cache
+from . import test_report_balance_store
+from . import test_report_xlsx_streaming
+from . import test_report_export_job
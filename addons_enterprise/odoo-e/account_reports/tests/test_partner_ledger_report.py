@@ -712,3 +712,18 @@ class TestPartnerLedgerReport(TestAccountReportsCommon):
             ],
             options,
         )
+
+    def test_split_lines_by_partner(self):
+        """ The lines of the report computed for several partners, split per partner, are the ones of the report computed for each of them. """
+        def get_lines_values(lines):
+            return [(line['id'], [column.get('no_format') for column in line['columns']]) for line in lines]
+
+        partners = self.partner_a + self.partner_b
+        options = self._generate_options(self.report, '2017-01-01', '2017-12-31', default_options={'partner_ids': partners.ids, 'unfold_all': True})
+        lines_by_partner = self.report._split_lines_by_partner(options, self.report._filter_out_folded_children(self.report._get_lines(options)))
+        self.assertEqual(set(lines_by_partner), set(partners.ids))
+
+        for partner in partners:
+            partner_options = self._generate_options(self.report, '2017-01-01', '2017-12-31', default_options={'partner_ids': partner.ids, 'unfold_all': True})
+            partner_lines = self.report._filter_out_folded_children(self.report._get_lines(partner_options))
+            self.assertEqual(get_lines_values(lines_by_partner[partner.id]), get_lines_values(partner_lines))
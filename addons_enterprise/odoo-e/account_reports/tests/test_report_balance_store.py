@@ -0,0 +1,114 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+from unittest.mock import patch
+
+from .common import TestAccountReportsCommon
+
+from odoo import Command, fields
+from odoo.tests import tagged
+
+
+@tagged('post_install', '-at_install')
+class TestReportBalanceStore(TestAccountReportsCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company_data['company'].totals_below_sections = False
+
+        cls.account_1 = cls.env['account.account'].create({'code': '101801', 'name': "Stored 1", 'account_type': 'asset_current'})
+        cls.account_2 = cls.env['account.account'].create({'code': '201801', 'name': "Stored 2", 'account_type': 'liability_current'})
+
+        cls.report = cls.env['account.report'].create({
+            'name': "Balance store report",
+            'filter_date_range': True,
+            'column_ids': [Command.create({'name': 'balance', 'expression_label': 'balance'})],
+            'line_ids': [
+                Command.create({
+                    'name': "codes",
+                    'expression_ids': [Command.create({
+                        'label': 'balance',
+                        'engine': 'account_codes',
+                        'formula': '101801',
+                        'date_scope': 'strict_range',
+                    })],
+                }),
+                Command.create({
+                    'name': "domain",
+                    'expression_ids': [Command.create({
+                        'label': 'balance',
+                        'engine': 'domain',
+                        'formula': "[('account_id.code', '=', '201801')]",
+                        'subformula': 'sum',
+                        'date_scope': 'from_beginning',
+                    })],
+                }),
+            ],
+        })
+        cls.report = cls.report.with_context(account_report_no_totals_cache=True)
+
+    def _create_posted_move(self, date, amount):
+        move = self.env['account.move'].create({
+            'date': date,
+            'line_ids': [
+                Command.create({'account_id': self.account_1.id, 'debit': amount, 'credit': 0.0}),
+                Command.create({'account_id': self.account_2.id, 'debit': 0.0, 'credit': amount}),
+            ],
+        })
+        move.action_post()
+        return move
+
+    def test_balance_store_maintained_and_used(self):
+        self._create_posted_move('2020-01-10', 100.0)
+        self.env['ir.config_parameter'].set_param('account_reports.balance_store', True)
+        self.env['account.report.balance']._rebuild()
+
+        # Maintained when posting and resetting to draft
+        self._create_posted_move('2020-01-20', 30.0)
+        self._create_posted_move('2020-02-20', 50.0).button_draft()
+        self.assertRecordValues(
+            self.env['account.report.balance'].search([('account_id', 'in', (self.account_1 + self.account_2).ids)], order='account_id'),
+            [
+                {'account_id': self.account_1.id, 'date': fields.Date.from_string('2020-01-01'), 'balance': 130.0, 'aml_count': 2},
+                {'account_id': self.account_2.id, 'date': fields.Date.from_string('2020-01-01'), 'balance': -130.0, 'aml_count': 2},
+            ],
+        )
+
+        # Month-aligned dates are computed from the store
+        options = self._generate_options(self.report, '2020-01-01', '2020-01-31')
+        report_class = self.env.registry['account.report']
+        with patch.object(report_class, '_get_report_query', autospec=True, side_effect=AssertionError("Journal items should not be queried")):
+            self.assertLinesValues(self.report._get_lines(options), [0, 1], [('codes', 130.0), ('domain', -130.0)], options)
+
+        # Other dates fall back on the journal items
+        options = self._generate_options(self.report, '2020-01-15', '2020-01-31')
+        self.assertLinesValues(self.report._get_lines(options), [0, 1], [('codes', 30.0), ('domain', -130.0)], options)
+
+    def test_balance_store_disabled(self):
+        self._create_posted_move('2020-01-10', 100.0)
+        self.assertFalse(self.env['account.report.balance'].search_count([]))
+
+        options = self._generate_options(self.report, '2020-01-01', '2020-01-31')
+        self.assertLinesValues(self.report._get_lines(options), [0, 1], [('codes', 100.0), ('domain', -100.0)], options)
+
+    def test_balance_store_deltas(self):
+        self.env['ir.config_parameter'].set_param('account_reports.balance_store', True)
+        self.env['account.report.balance']._rebuild()
+        move = self._create_posted_move('2020-01-10', 100.0)
+        self._create_posted_move('2020-01-20', 30.0)
+
+        # Changing a journal item moves its balance to another bucket
+        move.line_ids.filtered(lambda line: line.account_id == self.account_1).partner_id = self.partner_a
+        balances = self.env['account.report.balance'].search([('account_id', 'in', (self.account_1 + self.account_2).ids)], order='account_id, partner_id')
+        self.assertRecordValues(balances, [
+            {'account_id': self.account_1.id, 'partner_id': self.partner_a.id, 'balance': 100.0, 'aml_count': 1},
+            {'account_id': self.account_1.id, 'partner_id': False, 'balance': 30.0, 'aml_count': 1},
+            {'account_id': self.account_2.id, 'partner_id': False, 'balance': -130.0, 'aml_count': 2},
+        ])
+
+        # Emptied buckets are removed
+        move.button_draft()
+        balances = self.env['account.report.balance'].search([('account_id', 'in', (self.account_1 + self.account_2).ids)], order='account_id, partner_id')
+        self.assertRecordValues(balances, [
+            {'account_id': self.account_1.id, 'partner_id': False, 'balance': 30.0, 'aml_count': 1},
+            {'account_id': self.account_2.id, 'partner_id': False, 'balance': -30.0, 'aml_count': 1},
+        ])
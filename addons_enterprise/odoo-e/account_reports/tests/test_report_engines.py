@@ -561,6 +561,38 @@ class TestReportEngines(TestAccountReportsCommon):
                 action_dict = report.action_audit_cell(options, self._get_audit_params_from_report_line(options, report_line, report_line_dict))
                 self.assertEqual(move.line_ids.filtered_domain(action_dict['domain']), expected_amls)
 
+    def test_parse_account_codes_formula(self):
+        parse = self.env['account.report']._parse_account_codes_formula
+        self.assertEqual(
+            parse(r'101D\(1011,1012) - 2C + tag(account.demo_tag)'),
+            (
+                (1, '101', ('1011', '1012'), 'D'),
+                (-1, '2', (), 'C'),
+                (1, 'tag(account.demo_tag)', (), ''),
+            ),
+        )
+        # The same formula is parsed only once
+        self.assertIs(parse('10.20 - 101'), parse('10.20 - 101'))
+
+    def test_account_codes_prefix_map(self):
+        accounts = self.env['account.account'].create([
+            {'code': code, 'name': code, 'account_type': 'asset_current'}
+            for code in ('909001', '909002', '90910', '9092')
+        ])
+        report = self.env['account.report'].create({'name': "prefix map"})
+        options = self._generate_options(report, '2020-01-01', '2020-01-01')
+
+        prefix_map = report._get_account_codes_prefix_map(options, {('909', ('9092',)), ('9090', ())})
+        self.assertEqual(
+            {account.code: sorted(prefix_map[account.id]) for account in accounts},
+            {
+                '909001': [('909', '9092'), ('9090',)],
+                '909002': [('909', '9092'), ('9090',)],
+                '90910': [('909', '9092')],
+                '9092': [],
+            },
+        )
+
     def test_engine_external(self):
         # Create the report.
         test_line_1 = self._prepare_test_report_line(
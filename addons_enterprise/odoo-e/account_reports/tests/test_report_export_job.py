@@ -0,0 +1,82 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+from unittest.mock import patch
+
+from .common import TestAccountReportsCommon
+
+from odoo import Command
+from odoo.tests import tagged
+from odoo.tools import mute_logger
+
+
+@tagged('post_install', '-at_install')
+class TestReportExportJob(TestAccountReportsCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.report = cls.env.ref('account_reports.general_ledger_report')
+
+        cls.env['account.move'].create({
+            'date': '2020-01-10',
+            'line_ids': [
+                Command.create({'account_id': cls.company_data['default_account_revenue'].id, 'debit': 0.0, 'credit': 100.0}),
+                Command.create({'account_id': cls.company_data['default_account_receivable'].id, 'debit': 100.0, 'credit': 0.0}),
+            ],
+        }).action_post()
+
+    def test_export_job(self):
+        options = self._generate_options(self.report, '2020-01-01', '2020-12-31', default_options={'unfold_all': True})
+        action = self.report.export_file_async(options, 'export_to_xlsx')
+        self.assertEqual(action['tag'], 'display_notification')
+
+        job = self.env['account.report.export.job'].search([('report_id', '=', self.report.id)])
+        self.assertRecordValues(job, [{'state': 'pending', 'file_generator': 'export_to_xlsx', 'attachment_id': False}])
+
+        self.env['account.report.export.job']._cron_process_export_jobs()
+        self.assertEqual(job.state, 'done')
+        self.assertTrue(job.progress_done)
+        self.assertEqual(job.attachment_id.name, 'general_ledger.xlsx')
+        self.assertEqual(job.get_status()[0]['download_url'], f'/web/content/{job.attachment_id.id}?download=true')
+
+    def test_export_job_failure(self):
+        options = self._generate_options(self.report, '2020-01-01', '2020-12-31')
+        self.report.export_file_async(options, 'export_to_xlsx')
+        job = self.env['account.report.export.job'].search([('report_id', '=', self.report.id)])
+
+        report_class = self.env.registry['account.report']
+        with patch.object(report_class, 'export_to_xlsx', autospec=True, side_effect=ValueError("Export error")), \
+             mute_logger('odoo.addons.account_reports.models.account_report_export_job'):
+            self.env['account.report.export.job']._cron_process_export_jobs()
+
+        self.assertRecordValues(job, [{'state': 'failed', 'error_message': "Export error", 'attachment_id': False}])
+
+    def test_export_job_lost(self):
+        options = self._generate_options(self.report, '2020-01-01', '2020-12-31')
+        self.report.export_file_async(options, 'export_to_xlsx')
+        job = self.env['account.report.export.job'].search([('report_id', '=', self.report.id)])
+
+        # the worker processing the job was killed without reporting any progress for too long
+        self.assertEqual(job._claim_pending_job(), job)
+        self.env.cr.execute(
+            "UPDATE account_report_export_job_progress SET heartbeat = heartbeat - INTERVAL '2 hours' WHERE job_id = %s",
+            [job.id],
+        )
+        self.env['account.report.export.job']._cron_process_export_jobs()
+        self.assertRecordValues(job, [{'state': 'done', 'attempt_count': 2}])
+
+        # a job lost too many times fails
+        self.report.export_file_async(options, 'export_to_xlsx')
+        job = self.env['account.report.export.job'].search([('report_id', '=', self.report.id), ('state', '=', 'pending')])
+        self.assertEqual(job._claim_pending_job(), job)
+        self.env.cr.execute(
+            """
+            UPDATE account_report_export_job SET attempt_count = 3 WHERE id = %(job_id)s;
+            UPDATE account_report_export_job_progress SET heartbeat = heartbeat - INTERVAL '2 hours' WHERE job_id = %(job_id)s;
+            """,
+            {'job_id': job.id},
+        )
+        self.env.invalidate_all()
+        with mute_logger('odoo.addons.account_reports.models.account_report_export_job'):
+            self.env['account.report.export.job']._cron_process_export_jobs()
+        self.assertEqual(job.state, 'failed')
+        self.assertTrue(job.error_message)
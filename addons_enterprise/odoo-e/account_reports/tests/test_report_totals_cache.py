@@ -0,0 +1,109 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+from unittest.mock import patch
+
+from .common import TestAccountReportsCommon
+
+from odoo import Command
+from odoo.tests import tagged
+
+
+@tagged('post_install', '-at_install')
+class TestReportTotalsCache(TestAccountReportsCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company_data['company'].totals_below_sections = False
+
+        cls.account_1 = cls.env['account.account'].create({'code': '101901', 'name': "Cached 1", 'account_type': 'asset_current'})
+        cls.account_2 = cls.env['account.account'].create({'code': '201901', 'name': "Cached 2", 'account_type': 'liability_current'})
+
+        cls.report = cls.env['account.report'].create({
+            'name': "Cached report",
+            'filter_date_range': True,
+            'column_ids': [Command.create({'name': 'balance', 'expression_label': 'balance'})],
+            'line_ids': [
+                Command.create({
+                    'name': "line_101",
+                    'expression_ids': [Command.create({
+                        'label': 'balance',
+                        'engine': 'account_codes',
+                        'formula': '101901',
+                        'date_scope': 'from_beginning',
+                    })],
+                }),
+            ],
+        })
+
+    def _create_move(self, date, amount):
+        return self.env['account.move'].create({
+            'date': date,
+            'line_ids': [
+                Command.create({'account_id': self.account_1.id, 'debit': amount, 'credit': 0.0}),
+                Command.create({'account_id': self.account_2.id, 'debit': 0.0, 'credit': amount}),
+            ],
+        })
+
+    def _get_cache_entries_count(self):
+        self.env.cr.execute("SELECT COUNT(*) FROM account_report_totals_cache WHERE report_id = %s", [self.report.id])
+        return self.env.cr.fetchone()[0]
+
+    def test_totals_cache_hit_and_invalidation(self):
+        self._create_move('2020-01-15', 100.0).action_post()
+        options = self._generate_options(self.report, '2020-01-01', '2020-01-31')
+
+        self.assertLinesValues(self.report._get_lines(options), [0, 1], [('line_101', 100.0)], options)
+        self.assertEqual(self._get_cache_entries_count(), 1)
+
+        # Opening the report again with the same options is served from the cache
+        report_class = self.env.registry['account.report']
+        with patch.object(report_class, '_compute_expression_totals_for_single_column_group', autospec=True) as compute_mock:
+            self.assertLinesValues(self.report._get_lines(options), [0, 1], [('line_101', 100.0)], options)
+            compute_mock.assert_not_called()
+
+        # Posting an entry after the period does not impact the cached totals
+        self._create_move('2020-02-15', 50.0).action_post()
+        self.assertEqual(self._get_cache_entries_count(), 1)
+
+        # Posting an entry within the period invalidates them
+        move = self._create_move('2020-01-20', 30.0)
+        move.action_post()
+        self.assertEqual(self._get_cache_entries_count(), 0)
+        self.assertLinesValues(self.report._get_lines(options), [0, 1], [('line_101', 130.0)], options)
+
+        # Resetting it to draft as well
+        move.button_draft()
+        self.assertEqual(self._get_cache_entries_count(), 0)
+        self.assertLinesValues(self.report._get_lines(options), [0, 1], [('line_101', 100.0)], options)
+
+    def test_totals_cache_disabled_with_draft_entries(self):
+        self._create_move('2020-01-15', 100.0)
+        options = self._generate_options(self.report, '2020-01-01', '2020-01-31', default_options={'all_entries': True})
+
+        self.assertLinesValues(self.report._get_lines(options), [0, 1], [('line_101', 100.0)], options)
+        self.assertEqual(self._get_cache_entries_count(), 0)
+
+    def test_totals_cache_concurrent_invalidation(self):
+        self._create_move('2020-01-15', 100.0).action_post()
+        options = self._generate_options(self.report, '2020-01-01', '2020-01-31')
+        self.assertLinesValues(self.report._get_lines(options), [0, 1], [('line_101', 100.0)], options)
+        self.assertEqual(self._get_cache_entries_count(), 1)
+
+        # Simulate a change of the period committed by a transaction not visible in the snapshot of this one, after its
+        # deletion of the entries: the cached totals must not be read anymore, nor stored again.
+        self.env.cr.execute(
+            """
+            INSERT INTO account_report_totals_cache_invalidation (company_id, date_from, xid, invalidation_date)
+            VALUES (%s, '2020-01-20', (txid_current() + 1000)::text, NOW() AT TIME ZONE 'UTC')
+            """,
+            [self.company_data['company'].id],
+        )
+        report_class = self.env.registry['account.report']
+        compute_totals = report_class._compute_expression_totals_for_single_column_group
+        with patch.object(report_class, '_compute_expression_totals_for_single_column_group', autospec=True, side_effect=compute_totals) as compute_mock:
+            self.assertLinesValues(self.report._get_lines(options), [0, 1], [('line_101', 100.0)], options)
+            compute_mock.assert_called()
+
+        self.env.cr.execute("DELETE FROM account_report_totals_cache WHERE report_id = %s", [self.report.id])
+        self.assertLinesValues(self.report._get_lines(options), [0, 1], [('line_101', 100.0)], options)
+        self.assertEqual(self._get_cache_entries_count(), 0)
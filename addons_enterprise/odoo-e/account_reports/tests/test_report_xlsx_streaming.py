@@ -0,0 +1,48 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+import io
+import unittest
+from unittest.mock import patch
+
+from .common import TestAccountReportsCommon, load_workbook
+
+from odoo import Command
+from odoo.tests import tagged
+
+
+@tagged('post_install', '-at_install')
+class TestReportXlsxStreaming(TestAccountReportsCommon):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.report = cls.env.ref('account_reports.general_ledger_report')
+
+        for date, amount in (('2020-01-10', 100.0), ('2020-02-10', 200.0), ('2020-03-10', 300.0)):
+            cls.env['account.move'].create({
+                'date': date,
+                'line_ids': [
+                    Command.create({'account_id': cls.company_data['default_account_revenue'].id, 'debit': 0.0, 'credit': amount}),
+                    Command.create({'account_id': cls.company_data['default_account_receivable'].id, 'debit': amount, 'credit': 0.0}),
+                ],
+            }).action_post()
+
+    def _get_sheet_values(self, file_content):
+        if load_workbook is None:
+            raise unittest.SkipTest("openpyxl not available")
+
+        return list(load_workbook(filename=io.BytesIO(file_content), data_only=True).worksheets[0].values)
+
+    def test_xlsx_streaming_same_content(self):
+        options = self._generate_options(self.report, '2020-01-01', '2020-12-31', default_options={'unfold_all': True})
+
+        expected_values = self._get_sheet_values(self.report.export_to_xlsx(options)['file_content'])
+        streamed_report = self.report.with_context(xlsx_streaming=True)
+        with patch('odoo.addons.account_reports.models.account_report.XLSX_STREAMING_SAMPLE_SIZE', 2):
+            streamed_values = self._get_sheet_values(streamed_report.export_to_xlsx(options)['file_content'])
+
+        self.assertEqual(streamed_values, expected_values)
+
+    def test_xlsx_streaming_not_possible_with_sorting(self):
+        options = self._generate_options(self.report, '2020-01-01', '2020-12-31')
+        self.assertTrue(self.report._can_stream_xlsx_export(options))
+        self.assertFalse(self.report._can_stream_xlsx_export({**options, 'order_column': {'expression_label': 'balance', 'direction': 'ASC'}}))
@@ -221,8 +221,8 @@ class AccountReportSend(models.TransientModel):
         }
 
     def _process_send_and_print(self, report, options, recipient_partner_ids=None, wizard=None):
-        """ Generate a report for one partner based on the options (send_and_print_values stored on the report).
-        :param options: dict of report options (should contain one partner id in options['partner_ids'])
+        """ Generate a report for each partner based on the options (send_and_print_values stored on the report).
+        :param options: dict of report options (options['partner_ids'] containing the partners to process)
         :param recipient_partner_ids: list of partner ids that will receive the mail message.
         :param wizard: account.report.send wizard if exists. Indicates if sending by cron.
         """
@@ -240,17 +240,19 @@ class AccountReportSend(models.TransientModel):
 
         partner_ids = options.get('partner_ids', [])
         partners = self.env['res.partner'].browse(partner_ids)
-        if not recipient_partner_ids:
+        if not recipient_partner_ids and wizard:
             recipient_partner_ids = partners.filtered('email').ids
 
         email_from = mail_template_id._render_field('email_from', partner_ids) if mail_template_id else {}
         downloadable_attachments = self.env['ir.attachment']
+        report_attachments = partners._get_partners_account_report_attachments(report, options)
 
         for partner in partners:
-            options['partner_ids'] = partner.ids
-            report_attachment = partner._get_partner_account_report_attachment(report, options)
+            report_attachment = report_attachments[partner.id]
+            # When sending by cron, each statement is only sent to its own partner
+            partner_recipient_ids = recipient_partner_ids or partner.filtered('email').ids
 
-            if to_email and recipient_partner_ids:
+            if to_email and partner_recipient_ids:
                 if wizard and wizard.mode == 'single':
                     subject = self.mail_subject
                     body = self.mail_body
@@ -262,7 +264,7 @@ class AccountReportSend(models.TransientModel):
                     body=body,
                     subject=subject,
                     email_from=email_from.get(partner.id),
-                    partner_ids=recipient_partner_ids,
+                    partner_ids=partner_recipient_ids,
                     attachment_ids=attachments_ids + report_attachment.ids,
                     email_add_signature=False,
                 )
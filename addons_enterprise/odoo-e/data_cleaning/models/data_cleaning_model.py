@@ -2,6 +2,7 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 import ast
+import timeit
 from dateutil.relativedelta import relativedelta
 
 from odoo import api, fields, models
@@ -47,8 +48,21 @@ class DataCleaningModel(models.Model):
         ('months', 'Months')], string='Notify Frequency Period', default='weeks')
     last_notification = fields.Datetime(readonly=True)
 
+    # Incremental scan of the scheduled action
+    full_scan_interval = fields.Integer(
+        string='Full Scan Every', default=7,
+        help='Number of days between two scans of all the records by the scheduled action. The other scans only look '
+             'at the records created or modified since the last scan.')
+    last_scan_date = fields.Datetime(readonly=True, copy=False)
+    last_full_scan_date = fields.Datetime(readonly=True, copy=False)
+    last_scan_mode = fields.Selection([
+        ('full', 'Full'),
+        ('incremental', 'Incremental')], readonly=True, copy=False)
+    last_scan_duration = fields.Float(string='Last Scan Duration (s)', readonly=True, copy=False)
+
     _sql_constraints = [
         ('check_notif_freq', 'CHECK(notify_frequency > 0)', 'The notification frequency should be greater than 0'),
+        ('check_full_scan_interval', 'CHECK(full_scan_interval >= 0)', 'The full scan interval cannot be negative'),
     ]
 
     @api.onchange('res_model_id')
@@ -73,9 +87,24 @@ class DataCleaningModel(models.Model):
             cm_model.records_to_clean_count = counts[cm_model.id] if cm_model.id in counts else 0
 
     def _cron_clean_records(self):
-        self.sudo().search([])._clean_records(batch_commits=True)
+        self.sudo().search([])._clean_records(batch_commits=True, incremental=True)
         self.sudo()._notify_records_to_clean()
 
+    def _get_incremental_scan_date(self):
+        """
+        Return the date since when the records created or modified have to be scanned, or False if all the records
+        have to be: when they were never scanned, when their model has no write date, or when a full scan is due.
+
+        The write date is not indexed, for the same reasons as in the deduplication (see the data_merge.model method):
+        the filter on it is evaluated during the sequential scan of the cleaned table.
+        """
+        self.ensure_one()
+        if not self.last_scan_date or not self.last_full_scan_date or not self.env[self.res_model_name]._log_access:
+            return False
+        if self.last_full_scan_date + relativedelta(days=self.full_scan_interval) <= fields.Datetime.now():
+            return False
+        return self.last_scan_date
+
     def _clean_records_format_phone(self, **kwargs):
         self.ensure_one()
 
@@ -87,7 +116,10 @@ class DataCleaningModel(models.Model):
         existing_rows = self._cr.fetchall()
 
         field = kwargs['field_name']
-        records = self.env[self.res_model_name].search([(field, 'not in', [False, ''])])
+        domain = [(field, 'not in', [False, ''])]
+        if kwargs.get('since'):
+            domain.append(('write_date', '>=', kwargs['since']))
+        records = self.env[self.res_model_name].search(domain)
         records = records.with_context(prefetch_fields=False)
         # Avoids multiple select queries when reading fields in _get_country_id and record[field].
         records.read([fname for fname in ['country_id', 'company_id'] if fname in records] + [field])
@@ -107,18 +139,27 @@ class DataCleaningModel(models.Model):
         return result
 
 
-    def _clean_records(self, batch_commits=False):
+    def _clean_records(self, batch_commits=False, incremental=False):
+        """
+        :param bool batch_commits: If set, will automatically commit every X records
+        :param bool incremental: If set, only the records created or modified since the last scan are checked, unless
+            a full scan is due (see `_get_incremental_scan_date`)
+        """
         self.env.flush_all()
 
         records_to_clean = []
         cleaning_record_table = SQL.identifier(self.env['data_cleaning.record']._table)
         for cleaning_model in self:
+            scan_start = timeit.default_timer()
+            scan_date = self.env.cr.now()
+            since = incremental and cleaning_model._get_incremental_scan_date()
             records_to_create = []
             active_model = self.env[cleaning_model.res_model_name]
             active_name = active_model._active_name
 
             table = SQL.identifier(active_model._table)
             active_cond = SQL("AND %s", SQL.identifier(active_name)) if active_name else SQL()
+            since_cond = SQL("AND %s >= %s", SQL.identifier(active_model._table, 'write_date'), since) if since else SQL()
 
             field_actions = cleaning_model.rule_ids._action_to_sql()
             for field_name, field_action in field_actions.items():
@@ -126,7 +167,7 @@ class DataCleaningModel(models.Model):
                 operator = field_action['operator']
                 if operator is False:  # special case for ACTIONS_SQL
                     cleaner = getattr(cleaning_model, '_clean_records_%s' % action)
-                    values = cleaner(**field_action)
+                    values = cleaner(**field_action, since=since)
                     records_to_create += values
                 else:
                     query = SQL(
@@ -144,6 +185,7 @@ class DataCleaningModel(models.Model):
                                     res_id = %(table)s.id
                                     AND cleaning_model_id = %(cleaning_model_id)s)
                             %(active_cond)s
+                            %(since_cond)s
                         ORDER BY id
                         """,
                         table=table,
@@ -155,7 +197,8 @@ class DataCleaningModel(models.Model):
                         cleaned_field_expr=SQL(action, field) if field_action['composable'] else SQL(action),
                         cleaning_record_table=cleaning_record_table,
                         cleaning_model_id=cleaning_model.id,
-                        active_cond=active_cond
+                        active_cond=active_cond,
+                        since_cond=since_cond,
                     )
                     self._cr.execute(query)
                     for r in self._cr.fetchall():
@@ -175,6 +218,12 @@ class DataCleaningModel(models.Model):
                         self.env.cr.commit()
             else:
                 records_to_clean = records_to_clean + records_to_create
+            cleaning_model.write({
+                'last_scan_date': scan_date,
+                'last_full_scan_date': cleaning_model.last_full_scan_date if since else scan_date,
+                'last_scan_mode': 'incremental' if since else 'full',
+                'last_scan_duration': timeit.default_timer() - scan_start,
+            })
         for records_to_clean_batch in split_every(DR_CREATE_STEP_MANUAL, records_to_clean):
             self.env['data_cleaning.record'].create(records_to_clean_batch)
             if batch_commits:
@@ -232,6 +281,9 @@ class DataCleaningModel(models.Model):
     def write(self, vals):
         if 'active' in vals and not vals['active']:
             self.env['data_cleaning.record'].search([('cleaning_model_id', 'in', self.ids)]).unlink()
+        if any(fname in vals for fname in ('res_model_id', 'rule_ids')):
+            # The records have to be checked again, according to the new rules
+            vals = dict(vals, last_scan_date=False)
         return super().write(vals)
 
     ##########
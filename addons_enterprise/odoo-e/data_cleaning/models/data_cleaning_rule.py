@@ -125,6 +125,25 @@ class DataCleaningRule(models.Model):
         self.ensure_one()
         return ACTIONS_PYTHON.get(self.action_technical)
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        # The records have to be checked again, according to the new rules
+        rules.cleaning_model_id.write({'last_scan_date': False})
+        return rules
+
+    def write(self, vals):
+        if any(fname in vals for fname in ('cleaning_model_id', 'field_id', 'action', 'action_trim', 'action_case')):
+            self.cleaning_model_id.write({'last_scan_date': False})
+        res = super().write(vals)
+        if 'cleaning_model_id' in vals:
+            self.cleaning_model_id.write({'last_scan_date': False})
+        return res
+
+    def unlink(self):
+        self.cleaning_model_id.write({'last_scan_date': False})
+        return super().unlink()
+
     @api.onchange('action')
     def _onchange_action(self):
         if self.action == 'phone':
@@ -40,16 +40,23 @@ class DataMergeGroup(models.Model):
 
     @api.depends('record_ids')
     def _compute_similarity(self):
+        # The records of all the groups of a model are read at once
+        records_by_res_model_name = {}
+        for res_model_name, groups in self.filtered('record_ids').grouped('res_model_name').items():
+            read_fields = groups[0]._get_similarity_fields()
+            records = self.env[res_model_name].browse(set(groups.record_ids.mapped('res_id'))).read(read_fields)
+            records_by_res_model_name[res_model_name] = (read_fields, {record['id']: record for record in records})
+
         for group in self:
             if not group.record_ids:
                 group.divergent_fields = ''
                 group.similarity = 1
                 continue
 
-            read_fields = group._get_similarity_fields()
+            read_fields, records_by_id = records_by_res_model_name[group.res_model_name]
 
             record_ids = group.record_ids.mapped('res_id')
-            records = self.env[group.res_model_name].browse(record_ids).read(read_fields)
+            records = [records_by_id[record_id] for record_id in record_ids]
             # YTI What about unaccent ? Should be taken into account IMO if the
             # rule was computed from that.
             data = set(records[0].items())
@@ -79,20 +86,30 @@ class DataMergeGroup(models.Model):
         This method will look for a `_elect_method()` on the model.
         If it exists, this method is responsible to return the master record, otherwise, a generic method is used.
         """
-        for group in self:
-            if hasattr(self.env[group.res_model_name], '_elect_method'):
-                elect_master = getattr(self.env[group.res_model_name], '_elect_method')
+        master_records = self.env['data_merge.record']
+        for res_model_name, groups in self.grouped('res_model_name').items():
+            if hasattr(self.env[res_model_name], '_elect_method'):
+                elect_master = getattr(self.env[res_model_name], '_elect_method')
             else:
-                elect_master = group._elect_method
+                elect_master = groups._elect_method
 
-            records = group.record_ids._original_records()
-            if not records:
-                return
+            # The original records of all the groups are fetched at once, and share their prefetching
+            all_records = groups.record_ids._original_records()
+            if not all_records:
+                continue
+            existing_ids = set(all_records.ids)
+
+            for group in groups:
+                records = all_records.browse(
+                    [res_id for res_id in group.record_ids.mapped('res_id') if res_id in existing_ids]
+                ).with_prefetch(all_records._prefetch_ids)
+                if not records:
+                    continue
 
-            master = elect_master(records)
-            if master:
-                master_record = group.record_ids.filtered(lambda r: r.res_id == master.id)
-                master_record.is_master = True
+                master = elect_master(records)
+                if master:
+                    master_records |= group.record_ids.filtered(lambda r: r.res_id == master.id)
+        master_records.write({'is_master': True})
 
     ## Generic master
     def _elect_method(self, records):
@@ -4,38 +4,48 @@ import ast
 import timeit
 import logging
 import re
+from collections import defaultdict
 
 import psycopg2.errors
 from dateutil.relativedelta import relativedelta
 
 from odoo import api, fields, models
 from odoo.exceptions import UserError, ValidationError
-from odoo.tools import SQL
+from odoo.tools import SQL, split_every
 
 _logger = logging.getLogger(__name__)
 
+DM_CREATE_BATCH_SIZE = 1000
+
 # Merge list of list based on their common element
 #   Input: [['a', 'b'], ['b', 'c'], ['d', 'e']]
 #   Output: [['a', 'b', 'c'], ['d', 'e']]
-# https://stackoverflow.com/a/9112588
+# The lists are merged with a union-find, so that the many pairs found by the
+# similarity rules are merged in quasi-linear time.
 def merge_common_lists(lsts):
-    sets = [set(lst) for lst in lsts if lst]
-    merged = True
-    while merged:
-        merged = False
-        results = []
-        while sets:
-            common, rest = sets[0], sets[1:]
-            sets = []
-            for x in rest:
-                if x.isdisjoint(common):
-                    sets.append(x)
-                else:
-                    merged = True
-                    common |= x
-            results.append(common)
-        sets = results
-    return sets
+    parents = {}
+
+    def find(x):
+        root = x
+        while parents[root] != root:
+            root = parents[root]
+        while parents[x] != root:
+            parents[x], x = root, parents[x]
+        return root
+
+    for lst in lsts:
+        if not lst:
+            continue
+        root = find(parents.setdefault(lst[0], lst[0]))
+        for x in lst[1:]:
+            x_root = find(parents.setdefault(x, x))
+            if x_root != root:
+                parents[x_root] = root
+
+    sets = defaultdict(set)
+    for x in parents:
+        sets[find(x)].add(x)
+    return list(sets.values())
 
 
 class DataMergeModel(models.Model):
@@ -77,12 +87,25 @@ class DataMergeModel(models.Model):
     merge_threshold = fields.Integer(string='Similarity Threshold', default=75, help='Records with a similarity percentage above this threshold will be automatically merged')
     create_threshold = fields.Integer(string='Suggestion Threshold', default=0, help='Duplicates with a similarity below this threshold will not be suggested', groups='base.group_no_one')
 
+    ### Incremental scan of the scheduled action
+    full_scan_interval = fields.Integer(
+        string='Full Scan Every', default=7,
+        help='Number of days between two scans of all the records by the scheduled action. The other scans only look for '
+             'the duplicates of the records created or modified since the last scan.')
+    last_scan_date = fields.Datetime(readonly=True, copy=False)
+    last_full_scan_date = fields.Datetime(readonly=True, copy=False)
+    last_scan_mode = fields.Selection([
+        ('full', 'Full'),
+        ('incremental', 'Incremental')], readonly=True, copy=False)
+    last_scan_duration = fields.Float(string='Last Scan Duration (s)', readonly=True, copy=False)
+
     ### Contextual menu action
     is_contextual_merge_action = fields.Boolean(string='Merge action attached', help='If True, this record is used for contextual menu action "Merge" on the target model.')
 
     _sql_constraints = [
         ('uniq_name', 'UNIQUE(name)', 'This name is already taken'),
         ('check_notif_freq', 'CHECK(notify_frequency > 0)', 'The notification frequency should be greater than 0'),
+        ('check_full_scan_interval', 'CHECK(full_scan_interval >= 0)', 'The full scan interval cannot be negative'),
     ]
 
     @api.depends('res_model_id')
@@ -171,19 +194,39 @@ class DataMergeModel(models.Model):
         """
         Identify duplicate records for each active model and either notify the users or automatically merge the duplicates
         """
-        self.env['data_merge.model'].sudo().search([]).find_duplicates(batch_commits=True)
+        self.env['data_merge.model'].sudo().search([]).find_duplicates(batch_commits=True, incremental=True)
         self._notify_new_duplicates()
 
-    def find_duplicates(self, batch_commits=False):
+    def _get_incremental_scan_date(self):
+        """
+        Return the date since when the records created or modified have to be scanned, or False if all the records
+        have to be: when they were never scanned, when their model has no write date, or when a full scan is due.
+
+        No index is created on the write date of the deduplicated models: they can be any model, every write of their
+        records would maintain it for a scan running daily, and the records sharing a blocking key with the changed ones
+        are searched by a sequential scan of the table anyway (see `_get_similar_records_ids`).
+        """
+        self.ensure_one()
+        if not self.last_scan_date or not self.last_full_scan_date or not self.env[self.res_model_name]._log_access:
+            return False
+        if self.last_full_scan_date + relativedelta(days=self.full_scan_interval) <= fields.Datetime.now():
+            return False
+        return self.last_scan_date
+
+    def find_duplicates(self, batch_commits=False, incremental=False):
         """
         Search for duplicate records and create the data_merge.group along with its data_merge.record
 
         :param bool batch_commits: If set, will automatically commit every X records
+        :param bool incremental: If set, only the records created or modified since the last scan are compared with
+            the other records, unless a full scan is due (see `_get_incremental_scan_date`)
         """
         unaccent = self.env.registry.unaccent
         self.env.flush_all()
         for dm_model in self:
-            t1 = timeit.default_timer()
+            t1 = scan_start = timeit.default_timer()
+            scan_date = self.env.cr.now()
+            since = incremental and dm_model._get_incremental_scan_date()
             ids = []
             res_model = self.env[dm_model.res_model_name]
             table = res_model._table
@@ -202,11 +245,28 @@ class DataMergeModel(models.Model):
                     # Since unaccent is case sensitive, we must add a lower to make sql_field insensitive
                     sql_field = unaccent(SQL('lower(%s)', sql_field))
 
-                sql_group_by = SQL()
+                sql_company = None
                 multi_company = self.env['res.company'].with_context(active_test=False).search_count([]) > 1
                 company_field = res_model._fields.get('company_id')
                 if multi_company and company_field and not dm_model.mix_by_company:
-                    sql_group_by = SQL(', %s', res_model._field_to_sql(table, 'company_id', query))
+                    sql_company = res_model._field_to_sql(table, 'company_id', query)
+
+                if rule.match_mode == 'similar':
+                    ids += dm_model._get_similar_records_ids(rule, query, sql_field, sql_company, since=since)
+                    continue
+
+                # Only the values of the records created or modified since the last scan can have new duplicates,
+                # which are then searched among all the records through the value.
+                sql_changed_values = SQL()
+                if since:
+                    sql_changed_values = SQL(
+                        "AND %(field)s IN (SELECT %(field)s FROM %(tables)s WHERE %(where_clause)s AND %(write_date)s >= %(since)s)",
+                        field=sql_field,
+                        tables=query.from_clause,
+                        where_clause=query.where_clause or SQL("TRUE"),
+                        write_date=res_model._field_to_sql(table, 'write_date', query),
+                        since=since,
+                    )
 
                 # Get all the rows matching the rule defined
                 # (e.g. exact match of the name) having at least 2 records
@@ -217,7 +277,7 @@ class DataMergeModel(models.Model):
                     SELECT %(field)s AS group_field_name,
                         array_agg(%(table_id)s ORDER BY %(table_id)s ASC)
                     FROM %(tables)s
-                    WHERE length(%(field)s) > 0 AND %(where_clause)s
+                    WHERE length(%(field)s) > 0 AND %(where_clause)s %(changed_values)s
                     GROUP BY group_field_name %(group_by)s
                     HAVING COUNT(%(field)s) > 1
                     """,
@@ -225,7 +285,8 @@ class DataMergeModel(models.Model):
                     table_id=SQL.identifier(table, 'id'),
                     tables=query.from_clause,
                     where_clause=query.where_clause or SQL("TRUE"),
-                    group_by=sql_group_by,
+                    changed_values=sql_changed_values,
+                    group_by=SQL(', %s', sql_company) if sql_company else SQL(),
                 )
 
                 try:
@@ -236,16 +297,15 @@ class DataMergeModel(models.Model):
                 rows = self._cr.fetchall()
                 ids = ids + [row[1] for row in rows]
 
-            # Fetches the IDs of all the records who already matched (and are not merged),
+            # Fetches the groups of all the records who already matched (and are not merged),
             # as well as the discarded ones.
             # This prevents creating twice the same groups.
             self._cr.execute("""
-                SELECT
-                    ARRAY_AGG(res_id ORDER BY res_id ASC)
+                SELECT res_id, ARRAY_AGG(group_id)
                 FROM data_merge_record
                 WHERE model_id = %s
-                GROUP BY group_id""", [dm_model.id])
-            done_groups_res_ids = [set(x[0]) for x in self._cr.fetchall()]
+                GROUP BY res_id""", [dm_model.id])
+            done_group_ids_by_res_id = {res_id: set(group_ids) for res_id, group_ids in self._cr.fetchall()}
 
             _logger.info('Query identification done after %s' % str(timeit.default_timer() - t1))
             t1 = timeit.default_timer()
@@ -257,40 +317,166 @@ class DataMergeModel(models.Model):
             _logger.info('Merging lists done after %s' % str(timeit.default_timer() - t1))
             t1 = timeit.default_timer()
             _logger.info('Record creation started at %s', str(t1))
+
+            # Check if the IDs of the group to create is already part of an existing group
+            # e.g.
+            #   The group with records A B C already exists:
+            #       1/ If group_to_create equals A B, do not create a new group
+            #       2/ If group_to_create equals A D, create the new group (A D is not a subset of A B C)
+            # A group is part of an existing group if all its records share one of their existing groups.
+            def is_done(group_to_create):
+                common_group_ids = None
+                for res_id in group_to_create:
+                    group_ids = done_group_ids_by_res_id.get(res_id)
+                    if not group_ids:
+                        return False
+                    common_group_ids = group_ids if common_group_ids is None else common_group_ids & group_ids
+                    if not common_group_ids:
+                        return False
+                return True
+
+            groups_to_create = [group_to_create for group_to_create in groups_to_create if not is_done(group_to_create)]
             groups_created = 0
             groups_to_create_count = len(groups_to_create)
-            for group_to_create in groups_to_create:
-                groups_created += 1
-                if groups_created % 100 == 0:
-                    _logger.info('Created groups %s / %s' % (groups_created, groups_to_create_count))
-
-                # Check if the IDs of the group to create is already part of an existing group
-                # e.g.
-                #   The group with records A B C already exists:
-                #       1/ If group_to_create equals A B, do not create a new group
-                #       2/ If group_to_create equals A D, create the new group (A D is not a subset of A B C)
-                if any(group_to_create <= x for x in done_groups_res_ids):
-                    continue
+            for batch in split_every(DM_CREATE_BATCH_SIZE, groups_to_create):
+                groups = self.env['data_merge.group'].with_context(prefetch_fields=False).create([
+                    {'model_id': dm_model.id} for dummy in batch
+                ])
+                self.env['data_merge.record'].with_context(prefetch_fields=False).create([
+                    {'group_id': group.id, 'res_id': rec}
+                    for group, group_to_create in zip(groups, batch)
+                    for rec in sorted(group_to_create)
+                ])
+                groups_created += len(batch)
+                _logger.info('Created groups %s / %s' % (groups_created, groups_to_create_count))
+
+                groups._elect_master_record()
+
+                if dm_model.create_threshold > 0:
+                    groups_below_threshold = groups.filtered(lambda g: g.similarity * 100 <= dm_model.create_threshold)
+                    groups_below_threshold.unlink()
+                    groups -= groups_below_threshold
 
-                group = self.env['data_merge.group'].with_context(prefetch_fields=False).create({'model_id': dm_model.id})
-                d = [{'group_id': group.id, 'res_id': rec} for rec in group_to_create]
-                self.env['data_merge.record'].with_context(prefetch_fields=False).create(d)
+                if dm_model.merge_mode == 'automatic':
+                    for group in groups.filtered(lambda g: g.similarity * 100 >= dm_model.merge_threshold):
+                        group.merge_records()
+                        group.unlink()
 
-                if groups_created % 1000 == 0 and batch_commits:
+                if batch_commits:
                     self.env.cr.commit()
 
-                group._elect_master_record()
+            _logger.info('Record creation done after %s' % str(timeit.default_timer() - t1))
+            dm_model.write({
+                'last_scan_date': scan_date,
+                'last_full_scan_date': dm_model.last_full_scan_date if since else scan_date,
+                'last_scan_mode': 'incremental' if since else 'full',
+                'last_scan_duration': timeit.default_timer() - scan_start,
+            })
+
+    def _get_similar_records_ids(self, rule, query, sql_field, sql_company=None, since=None):
+        """
+        Find the records whose values of the rule's field are similar, i.e. having a trigram similarity of their
+        normalized values of at least the rule's similarity threshold. The values are normalized in lower case, without
+        accents, punctuation nor extra spaces, and with their words sorted.
 
-                if dm_model.create_threshold > 0 and group.similarity * 100 <= dm_model.create_threshold:
-                    group.unlink()
-                    continue
+        The values are compared only within blocks of records sharing the same first characters of their normalized
+        value (and company, if any), using a trigram index on these values.
 
-                if dm_model.merge_mode == 'automatic':
-                    if group.similarity * 100 >= dm_model.merge_threshold:
-                        group.merge_records()
-                        group.unlink()
+        :param datetime since: if set, only the pairs having a record created or modified since then are returned
+        :return: list of pairs of similar record IDs
+        """
+        self.ensure_one()
+        if not self.env.registry.has_trigram:
+            raise UserError(self.env._('Missing required PostgreSQL extension: pg_trgm'))
+
+        value = SQL('lower(%s)', sql_field)
+        if self.env.registry.has_unaccent:
+            value = self.env.registry.unaccent(value)
+        normalized_value = SQL(
+            r"""
+            ARRAY_TO_STRING(ARRAY(
+                SELECT token
+                FROM UNNEST(REGEXP_SPLIT_TO_ARRAY(BTRIM(REGEXP_REPLACE(%s, '[^[:alnum:]]+', ' ', 'g')), ' ')) AS token
+                ORDER BY token
+            ), ' ')
+            """,
+            value,
+        )
+
+        def select_values(condition):
+            return SQL(
+                """
+                SELECT record_value.id, record_value.company_id, LEFT(record_value.value, 3) AS blocking_key, record_value.value,
+                       TRUE AS is_changed
+                FROM (
+                    SELECT %(table_id)s AS id, %(company)s AS company_id, %(normalized_value)s AS value
+                    FROM %(tables)s
+                    WHERE length(%(field)s) > 0 AND %(where_clause)s AND %(condition)s
+                ) AS record_value
+                WHERE record_value.value != ''
+                """,
+                table_id=SQL.identifier(query.table, 'id'),
+                company=sql_company or SQL("NULL::int"),
+                normalized_value=normalized_value,
+                tables=query.from_clause,
+                field=sql_field,
+                where_clause=query.where_clause or SQL("TRUE"),
+                condition=condition,
+            )
 
-            _logger.info('Record creation done after %s' % str(timeit.default_timer() - t1))
+        # The changed records are only compared with the records of their blocks: the other ones are left out of the
+        # table, and thus of its trigram index.
+        write_date = self.env[self.res_model_name]._field_to_sql(query.table, 'write_date', query) if since else None
+        self._cr.execute("DROP TABLE IF EXISTS data_merge_similar_value")
+        self._cr.execute(SQL(
+            "CREATE TEMPORARY TABLE data_merge_similar_value ON COMMIT DROP AS %s",
+            select_values(SQL("%s >= %s", write_date, since) if since else SQL("TRUE")),
+        ))
+        if since:
+            self._cr.execute("SELECT DISTINCT blocking_key FROM data_merge_similar_value")
+            blocking_keys = [blocking_key for blocking_key, in self._cr.fetchall()]
+            if blocking_keys:
+                # The first token of a blocking key is part of the lowered value of the records of the block: the other
+                # records are discarded with a LIKE before their value is normalized.
+                self._cr.execute(SQL(
+                    """
+                    INSERT INTO data_merge_similar_value (id, company_id, blocking_key, value, is_changed)
+                    SELECT id, company_id, blocking_key, value, FALSE
+                    FROM (%s) AS block_value
+                    WHERE blocking_key = ANY(%s)
+                    """,
+                    select_values(SQL(
+                        "(%s < %s OR %s IS NULL) AND %s LIKE ANY(%s)",
+                        write_date, since, write_date, value,
+                        [f"%{blocking_key.split(' ')[0]}%" for blocking_key in blocking_keys],
+                    )),
+                    blocking_keys,
+                ))
+        self._cr.execute("CREATE INDEX ON data_merge_similar_value (blocking_key)")
+        self._cr.execute("CREATE INDEX ON data_merge_similar_value USING gin (value gin_trgm_ops)")
+        self._cr.execute("ANALYZE data_merge_similar_value")
+
+        threshold = rule.similarity_threshold / 100
+        self._cr.execute(SQL("SELECT set_config('pg_trgm.similarity_threshold', %s, true)", str(threshold)))
+        # The % operator uses the trigram index, with the session threshold set above; the similarity is then
+        # compared to the rule's threshold itself.
+        self._cr.execute(SQL(
+            """
+            SELECT ARRAY[candidate.id, duplicate.id]
+            FROM data_merge_similar_value AS candidate
+            JOIN data_merge_similar_value AS duplicate
+              ON duplicate.value %% candidate.value
+             AND duplicate.blocking_key = candidate.blocking_key
+             AND duplicate.company_id IS NOT DISTINCT FROM candidate.company_id
+             AND candidate.is_changed
+             AND (duplicate.id > candidate.id OR NOT duplicate.is_changed)
+            WHERE similarity(duplicate.value, candidate.value) >= %s
+            """,
+            threshold,
+        ))
+        pairs = [row[0] for row in self._cr.fetchall()]
+        self._cr.execute("DROP TABLE data_merge_similar_value")
+        return pairs
 
     ##############
     ### Overrides
@@ -310,6 +496,10 @@ class DataMergeModel(models.Model):
         if 'active' in vals and not vals['active']:
             self.env['data_merge.group'].search([('model_id', 'in', self.ids)]).unlink()
 
+        if any(fname in vals for fname in ('res_model_id', 'domain', 'mix_by_company', 'rule_ids')):
+            # The records have to be scanned again, according to the new rules
+            vals = dict(vals, last_scan_date=False)
+
         if 'create_threshold' in vals and vals['create_threshold']:
             self.env['data_merge.group'].search([('model_id', 'in', self.ids), ('similarity', '<=', vals['create_threshold'] / 100)]).unlink()
 
@@ -4,6 +4,7 @@
 import ast
 import itertools
 import logging
+from collections import defaultdict
 from collections.abc import Iterable
 from datetime import datetime, date
 
@@ -553,13 +554,15 @@ class DataMergeRecord(models.Model):
     #############
     @api.model_create_multi
     def create(self, vals_list):
+        res_ids_by_model = defaultdict(set)
         for vals in vals_list:
             group = self.env['data_merge.group'].browse(vals['group_id'])
             if 'res_id' not in vals:
                 raise ValidationError(_('There is not referenced record'))
-            record = self.env[group.res_model_name].browse(vals['res_id'])
+            res_ids_by_model[group.res_model_name].add(vals['res_id'])
 
-            if not record.exists():
+        for res_model_name, res_ids in res_ids_by_model.items():
+            if len(self.env[res_model_name].browse(res_ids).exists()) != len(res_ids):
                 raise ValidationError(_('The referenced record does not exist'))
         return super().create(vals_list)
 
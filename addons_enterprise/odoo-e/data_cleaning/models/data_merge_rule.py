@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
-from odoo import fields, models
+from odoo import api, fields, models
 
 
 class DataMergeRule(models.Model):
@@ -17,10 +17,14 @@ class DataMergeRule(models.Model):
     match_mode = fields.Selection(
         lambda self: self._available_match_modes(),
         default='exact', string='Merge If', required=True)
+    similarity_threshold = fields.Integer(
+        string='Similarity Threshold', default=80,
+        help='Minimum similarity percentage of the normalized values of two records for them to be suggested as duplicates')
     sequence = fields.Integer(string='Sequence', default=1)
 
     _sql_constraints = [
         ('uniq_model_id_field_id', 'unique(model_id, field_id)', 'A field can only appear once!'),
+        ('check_similarity_threshold', 'CHECK(similarity_threshold > 0 AND similarity_threshold <= 100)', 'The similarity threshold should be between 1 and 100'),
     ]
 
     def _available_match_modes(self):
@@ -28,8 +32,29 @@ class DataMergeRule(models.Model):
         # can't conditionally set demo data...
         if self.env.context.get('install_mode') or self.env.registry.has_unaccent:
             modes.append(('accent', self.env._("Case/Accent Insensitive Match")))
+        if self.env.context.get('install_mode') or self.env.registry.has_trigram:
+            modes.append(('similar', self.env._("Similar")))
         return modes
 
     def _update_default_rules(self):
         if self.env.registry.has_unaccent:
             self.match_mode = 'accent'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rules = super().create(vals_list)
+        # The records have to be scanned again, according to the new rules
+        rules.model_id.write({'last_scan_date': False})
+        return rules
+
+    def write(self, vals):
+        if any(fname in vals for fname in ('model_id', 'field_id', 'match_mode', 'similarity_threshold')):
+            self.model_id.write({'last_scan_date': False})
+        res = super().write(vals)
+        if 'model_id' in vals:
+            self.model_id.write({'last_scan_date': False})
+        return res
+
+    def unlink(self):
+        self.model_id.write({'last_scan_date': False})
+        return super().unlink()
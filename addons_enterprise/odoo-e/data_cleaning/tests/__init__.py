@@ -6,3 +6,4 @@ from . import test_deduplication
 from . import test_merge
 from . import test_merge_account
 from . import test_filter
+from . import test_deduplication_benchmark
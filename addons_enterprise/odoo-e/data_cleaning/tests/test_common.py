@@ -82,6 +82,8 @@ class TestCommon(TransactionCase):
         model = self.MyModel if model_name == 'x_dm_test_model' else self.MyModel2
         if mode == 'accent' and not self.registry.has_unaccent:
             raise unittest.SkipTest("Unaccent rules require unaccent to be enabled")
+        if mode == 'similar' and not self.registry.has_trigram:
+            raise unittest.SkipTest("Similarity rules require pg_trgm to be enabled")
         self.DMRule.create({
             'model_id': model.id,
             'field_id': self.env['ir.model.fields']._get(model_name, field_name).id,
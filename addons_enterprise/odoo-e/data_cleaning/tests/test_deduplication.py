@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+from dateutil.relativedelta import relativedelta
+
 from . import test_common
 
 class TestDeduplication(test_common.TestCommon):
@@ -38,6 +40,91 @@ class TestDeduplication(test_common.TestCommon):
 
         self.assertEqual(self.MyModel.records_to_merge_count, 2, '2 records should have been found')
 
+    def test_deduplication_similar(self):
+        self._create_rule('x_name', 'similar')
+
+        self._create_record('x_dm_test_model', x_name='John Smith')
+        self._create_record('x_dm_test_model', x_name='Peter Parker')
+        self._create_record('x_dm_test_model', x_name='Mary Jane')
+        self.MyModel.find_duplicates()
+        self.MyModel._compute_records_to_merge_count()
+
+        self.assertEqual(self.MyModel.records_to_merge_count, 0, '0 record should have been found')
+
+        self._create_record('x_dm_test_model', x_name='SMITH, John')
+        self._create_record('x_dm_test_model', x_name='Peter Parkers')
+        self.MyModel.find_duplicates()
+        self.MyModel._compute_records_to_merge_count()
+
+        self.assertEqual(self.MyModel.records_to_merge_count, 4, '4 records should have been found')
+        self.assertEqual(self.DMGroup.search_count([('model_id', '=', self.MyModel.id)]), 2, '2 groups should have been created')
+
+        self.MyModel.rule_ids.similarity_threshold = 90
+        self.DMGroup.search([('model_id', '=', self.MyModel.id)]).unlink()
+        self.MyModel.find_duplicates()
+        self.MyModel._compute_records_to_merge_count()
+
+        self.assertEqual(self.MyModel.records_to_merge_count, 2, 'Only the records with the same words should have been found')
+
+    def test_deduplication_incremental(self):
+        self._create_rule('x_name', 'exact')
+
+        self._create_record('x_dm_test_model', x_name='toto')
+        self._create_record('x_dm_test_model', x_name='titi')
+        self.MyModel.find_duplicates(incremental=True)
+        self.MyModel._compute_records_to_merge_count()
+
+        self.assertEqual(self.MyModel.last_scan_mode, 'full', 'The records should have been scanned for the first time')
+        self.assertEqual(self.MyModel.records_to_merge_count, 0, '0 record should have been found')
+
+        # Duplicates already there at the last scan are not looked for by the incremental scans
+        self._create_record('x_dm_test_model', x_name='tutu')
+        self._create_record('x_dm_test_model', x_name='tutu')
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE x_dm_test_model SET write_date = %s",
+            [self.MyModel.last_scan_date - relativedelta(days=1)],
+        )
+        self.env.invalidate_all()
+
+        self._create_record('x_dm_test_model', x_name='toto')
+        self.MyModel.find_duplicates(incremental=True)
+        self.MyModel._compute_records_to_merge_count()
+
+        self.assertEqual(self.MyModel.last_scan_mode, 'incremental')
+        self.assertEqual(self.MyModel.records_to_merge_count, 2, 'Only the duplicates of the new record should have been found')
+
+        self.MyModel.last_full_scan_date = self.MyModel.last_full_scan_date - relativedelta(days=self.MyModel.full_scan_interval + 1)
+        self.MyModel.find_duplicates(incremental=True)
+        self.MyModel._compute_records_to_merge_count()
+
+        self.assertEqual(self.MyModel.last_scan_mode, 'full', 'A full scan should have been done once due')
+        self.assertEqual(self.MyModel.records_to_merge_count, 4, '4 records should have been found')
+
+    def test_deduplication_similar_incremental(self):
+        self._create_rule('x_name', 'similar')
+
+        self._create_record('x_dm_test_model', x_name='John Smith')
+        self._create_record('x_dm_test_model', x_name='Peter Parker')
+        self._create_record('x_dm_test_model', x_name='Peter Parkers')
+        self.MyModel.find_duplicates(incremental=True)
+        self.env.flush_all()
+        self.env.cr.execute("UPDATE x_dm_test_model SET write_date = %s", [self.MyModel.last_scan_date - relativedelta(days=1)])
+        self.DMGroup.search([('model_id', '=', self.MyModel.id)]).unlink()
+        self.env.invalidate_all()
+
+        # The new record is only compared with the records of its block, even with a punctuated value
+        self._create_record('x_dm_test_model', x_name='Smith, John')
+        self.MyModel.find_duplicates(incremental=True)
+        self.MyModel._compute_records_to_merge_count()
+
+        self.assertEqual(self.MyModel.last_scan_mode, 'incremental')
+        self.assertEqual(self.MyModel.records_to_merge_count, 2, 'Only the duplicates of the new record should have been found')
+        self.assertEqual(
+            set(self.DMGroup.search([('model_id', '=', self.MyModel.id)]).record_ids._original_records().mapped('x_name')),
+            {'John Smith', 'Smith, John'},
+        )
+
     def test_deduplication_multiple(self):
         self._create_rule('x_name', 'exact')
         self._create_rule('x_email', 'exact')
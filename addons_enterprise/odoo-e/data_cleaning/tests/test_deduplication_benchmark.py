@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+import logging
+import time
+
+from odoo.addons.data_cleaning.models.data_merge_model import merge_common_lists
+from odoo.tests.common import tagged
+
+from . import test_common
+
+_logger = logging.getLogger(__name__)
+
+RECORDS_COUNT = 1000000
+# one record every DUPLICATE_STEP has a near-duplicate
+DUPLICATE_STEP = 100
+
+
+def _merge_common_lists_quadratic(lsts):
+    # former implementation of merge_common_lists, see https://stackoverflow.com/a/9112588
+    sets = [set(lst) for lst in lsts if lst]
+    merged = True
+    while merged:
+        merged = False
+        results = []
+        while sets:
+            common, rest = sets[0], sets[1:]
+            sets = []
+            for x in rest:
+                if x.isdisjoint(common):
+                    sets.append(x)
+                else:
+                    merged = True
+                    common |= x
+            results.append(common)
+        sets = results
+    return sets
+
+
+@tagged('post_install', '-at_install', '-standard', 'data_cleaning_perf')
+class TestSimilarDeduplicationPerf(test_common.TestCommon):
+
+    def _get_groups_res_ids(self):
+        self.env.flush_all()
+        self.env.cr.execute("""
+            SELECT ARRAY_AGG(res_id ORDER BY res_id)
+              FROM data_merge_record
+             WHERE model_id = %s
+          GROUP BY group_id
+        """, [self.MyModel.id])
+        return [tuple(res_ids) for res_ids, in self.env.cr.fetchall()]
+
+    def test_similar_duplicates_perf(self):
+        self._create_rule('x_name', 'similar')
+
+        # 1M random names, and the same names without their last character for some of them. Inserted in SQL, the ORM
+        # would be way too slow.
+        self.env.cr.execute(
+            """
+                INSERT INTO x_dm_test_model (x_name)
+                SELECT md5(i::text) FROM generate_series(1, %(count)s) AS i
+                 UNION ALL
+                SELECT LEFT(md5(i::text), 31) FROM generate_series(%(step)s, %(count)s, %(step)s) AS i
+            """,
+            {'count': RECORDS_COUNT, 'step': DUPLICATE_STEP},
+        )
+        self.env.cr.execute("ANALYZE x_dm_test_model")
+        self.env.cr.execute("""
+            SELECT ARRAY[original.id, duplicate.id]
+              FROM x_dm_test_model original
+              JOIN x_dm_test_model duplicate ON duplicate.x_name = LEFT(original.x_name, 31)
+             WHERE length(original.x_name) = 32
+        """)
+        expected_pairs = [pair for pair, in self.env.cr.fetchall()]
+        self.assertEqual(len(expected_pairs), RECORDS_COUNT // DUPLICATE_STEP)
+
+        start = time.perf_counter()
+        self.MyModel.find_duplicates()
+        elapsed = time.perf_counter() - start
+        _logger.info("find_duplicates with a 'similar' rule on %s records: %.2fs", RECORDS_COUNT, elapsed)
+
+        groups_res_ids = self._get_groups_res_ids()
+        self.assertEqual(sorted(groups_res_ids), sorted(tuple(sorted(pair)) for pair in expected_pairs))
+
+        # the groups found again are recognized as existing ones
+        self.MyModel.find_duplicates()
+        self.assertEqual(len(self._get_groups_res_ids()), len(groups_res_ids))
+
+        # Chain some of the pairs together, so that merging the lists has to join them. A sample is used, as the former
+        # implementation is quadratic.
+        sample = [list(pair) for pair in expected_pairs[:2000]]
+        lists = sample + [[sample[i][1], sample[i + 1][0]] for i in range(0, len(sample) - 1, 3)]
+        self.assertEqual(
+            sorted(sorted(merged) for merged in merge_common_lists(lists)),
+            sorted(sorted(merged) for merged in _merge_common_lists_quadratic(lists)),
+        )
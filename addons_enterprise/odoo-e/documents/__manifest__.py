@@ -25,6 +25,7 @@ App to upload and manage your documents.
         'data/mail_template_data.xml',
         'data/mail_activity_type_data.xml',
         'data/documents_tag_data.xml',
+        'data/ir_cron_data.xml',
         'data/documents_document_data.xml',
         'data/ir_config_parameter_data.xml',
         'data/documents_tour.xml',
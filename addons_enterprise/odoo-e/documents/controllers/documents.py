@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 
 import base64
+import hashlib
 import io
 import json
 import logging
 import pathlib
+import struct
 import zipfile
+import zlib
 from collections import defaultdict
 from contextlib import ExitStack
 from http import HTTPStatus
@@ -14,7 +17,7 @@ from urllib.parse import quote
 
 from werkzeug.exceptions import BadRequest, Forbidden
 
-from odoo import conf, fields, http, _
+from odoo import SUPERUSER_ID, api, conf, fields, http, _
 from odoo.exceptions import MissingError
 from odoo.http import request, content_disposition
 from odoo.osv import expression
@@ -24,6 +27,207 @@ from odoo.addons.mail.controllers.attachment import AttachmentController
 
 logger = logging.getLogger(__name__)
 
+# Size of the chunks in which the files are read from the filestore and the
+# zip files are sent to the client.
+ZIP_CHUNK_SIZE = 1 << 20  # 1MiB
+# Files of these types are already compressed: deflating them again takes
+# time for hardly any gain, they are stored as is in the zip files.
+ZIP_STORED_MIMETYPES = {
+    'application/gzip',
+    'application/pdf',
+    'application/vnd.oasis.opendocument.presentation',
+    'application/vnd.oasis.opendocument.spreadsheet',
+    'application/vnd.oasis.opendocument.text',
+    'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'application/vnd.rar',
+    'application/x-7z-compressed',
+    'application/x-bzip2',
+    'application/x-rar-compressed',
+    'application/x-xz',
+    'application/zip',
+}
+ZIP_DEFLATED_MIMETYPES = {'image/bmp', 'image/svg+xml', 'image/tiff'}
+# Number of CRC-32 of the files sent in a resumable zip file stored at once.
+ZIP_CRC_BATCH_SIZE = 100
+
+
+class _ZipStream(io.RawIOBase):
+    """ Write-only, non-seekable file in which a zip file is written while it
+    is sent to the client: the written bytes are kept until they are popped. """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def __len__(self):
+        return self._size
+
+    def pop(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        self._size = 0
+        return data
+
+
+class _StoredZip:
+    """ Zip file whose entries are all stored as is, laid out before any file
+    is read: its size is known up front and any range of its bytes can be
+    generated, so that its downloads can be resumed.
+
+    The checksums of the files are written after their content (in data
+    descriptors) and in the central directory, at the end: when the range
+    includes the central directory, the files before it whose checksum is
+    not given are read to compute it.
+
+    :param items: the entries, with the path, the stream (None for folders)
+        and the date of each of them; the size of the streams must be known
+    :param dict crcs: the known CRC-32 of the files, by path
+    """
+
+    def __init__(self, items, crcs=None):
+        self.crcs = crcs or {}
+        self.entries = []  # [(zip_info, stream, local_header, zip64)]
+        offset = 0
+        for item in items:
+            zip_info = zipfile.ZipInfo(item.path, item.date_time)
+            zip_info.create_system = 3  # the same archive whatever the platform
+            zip_info.compress_type = zipfile.ZIP_STORED
+            zip_info.header_offset = offset
+            zip_info.CRC = 0
+            if item.stream is None:
+                zip_info.external_attr = 0o40775 << 16 | 0x10  # same as ZipFile.writestr
+            else:
+                zip_info.external_attr = 0o600 << 16
+                zip_info.flag_bits |= 0x08  # the checksum follows the content
+                zip_info.file_size = zip_info.compress_size = item.stream.size
+            zip64 = zip_info.file_size > zipfile.ZIP64_LIMIT
+            local_header = zip_info.FileHeader(zip64)
+            self.entries.append((zip_info, item.stream, local_header, zip64))
+            offset += len(local_header) + zip_info.file_size + self._get_descriptor_size(zip_info, zip64)
+        self.central_directory_offset = offset
+        # the checksums do not change the size of the central directory
+        self.size = offset + len(self._get_central_directory())
+
+    @classmethod
+    def _get_descriptor_size(cls, zip_info, zip64):
+        if not zip_info.flag_bits & 0x08:
+            return 0
+        return 24 if zip64 else 16
+
+    def _get_central_directory(self):
+        """ Return the central directory and the end records, as written by
+        zipfile.ZipFile. """
+        central_directory = []
+        for zip_info, _stream, _local_header, _zip64 in self.entries:
+            dt = zip_info.date_time
+            dosdate = (dt[0] - 1980) << 9 | dt[1] << 5 | dt[2]
+            dostime = dt[3] << 11 | dt[4] << 5 | (dt[5] // 2)
+            zip64_extra = []
+            file_size = compress_size = zip_info.file_size
+            if zip_info.file_size > zipfile.ZIP64_LIMIT:
+                zip64_extra += [zip_info.file_size, zip_info.compress_size]
+                file_size = compress_size = 0xffffffff
+            header_offset = zip_info.header_offset
+            if zip_info.header_offset > zipfile.ZIP64_LIMIT:
+                zip64_extra.append(zip_info.header_offset)
+                header_offset = 0xffffffff
+            extra = b''
+            version = zip_info.create_version
+            if zip64_extra:
+                extra = struct.pack('<HH' + 'Q' * len(zip64_extra), 1, 8 * len(zip64_extra), *zip64_extra)
+                version = max(version, zipfile.ZIP64_VERSION)
+            try:
+                filename, flag_bits = zip_info.filename.encode('ascii'), zip_info.flag_bits
+            except UnicodeEncodeError:
+                filename, flag_bits = zip_info.filename.encode(), zip_info.flag_bits | 0x800
+            central_directory += [
+                struct.pack(
+                    zipfile.structCentralDir, zipfile.stringCentralDir, version, zip_info.create_system,
+                    max(version, zip_info.extract_version), zip_info.reserved, flag_bits, zip_info.compress_type,
+                    dostime, dosdate, zip_info.CRC, compress_size, file_size, len(filename), len(extra), 0, 0,
+                    zip_info.internal_attr, zip_info.external_attr, header_offset,
+                ),
+                filename,
+                extra,
+            ]
+
+        count = len(self.entries)
+        size = sum(len(data) for data in central_directory)
+        offset = self.central_directory_offset
+        if count > zipfile.ZIP_FILECOUNT_LIMIT or offset > zipfile.ZIP64_LIMIT or size > zipfile.ZIP64_LIMIT:
+            central_directory += [
+                struct.pack(
+                    zipfile.structEndArchive64, zipfile.stringEndArchive64, 44, 45, 45, 0, 0,
+                    count, count, size, offset,
+                ),
+                struct.pack(zipfile.structEndArchive64Locator, zipfile.stringEndArchive64Locator, 0, offset + size, 1),
+            ]
+            count, size, offset = min(count, 0xffff), min(size, 0xffffffff), min(offset, 0xffffffff)
+        central_directory.append(struct.pack(
+            zipfile.structEndArchive, zipfile.stringEndArchive, 0, 0, count, count, size, offset, 0,
+        ))
+        return b''.join(central_directory)
+
+    def generate(self, read_chunks, start=0, stop=None, on_crc=None):
+        """ Generate the bytes of the zip file from start (included) to stop
+        (excluded, the end by default).
+
+        :param read_chunks: function returning the chunks of the content of
+            a stream
+        :param on_crc: function called with the path and the CRC-32 of each
+            file read entirely
+        """
+        stop = self.size if stop is None else stop
+        with_central_directory = stop > self.central_directory_offset
+        for zip_info, stream, local_header, zip64 in self.entries:
+            entry_start = zip_info.header_offset
+            entry_stop = entry_start + len(local_header) + zip_info.file_size + self._get_descriptor_size(zip_info, zip64)
+            if entry_stop <= start and not with_central_directory or entry_start >= stop:
+                continue
+            if entry_stop <= start and zip_info.filename in self.crcs:
+                # only its checksum is needed, in the central directory
+                zip_info.CRC = self.crcs[zip_info.filename]
+                continue
+
+            position = entry_start
+            yield local_header[max(start - position, 0):max(stop - position, 0)]
+            position += len(local_header)
+            if stream is None:
+                continue
+
+            crc = 0
+            read_size = 0
+            for chunk in read_chunks(stream):
+                crc = zlib.crc32(chunk, crc)
+                read_size += len(chunk)
+                if position < stop and position + len(chunk) > start:
+                    yield chunk[max(start - position, 0):stop - position]
+                position += len(chunk)
+                if position >= stop and not with_central_directory:
+                    return
+            if read_size != zip_info.file_size:
+                raise OSError(f"the size of {zip_info.filename!r} changed")
+            zip_info.CRC = crc
+            if on_crc:
+                on_crc(zip_info.filename, crc)
+            descriptor = struct.pack('<LLQQ' if zip64 else '<LLLL', 0x08074b50, crc, read_size, read_size)
+            yield descriptor[max(start - position, 0):max(stop - position, 0)]
+
+        if with_central_directory:
+            position = self.central_directory_offset
+            yield self._get_central_directory()[max(start - position, 0):stop - position]
+
 
 class ShareRoute(http.Controller):
 
@@ -144,19 +348,28 @@ class ShareRoute(http.Controller):
 
         return document_sudo
 
-    def _make_zip(self, name, documents):
+    def _make_zip(self, name, documents, resumable=False):
         """
-        Create a zip file in memory out of the given ``documents``,
-        recursively exploring the folders, get an HTTP response to
-        download that zip file.
+        Create a zip file out of the given ``documents``, recursively
+        exploring the folders, get an HTTP response to download that
+        zip file. The zip file is streamed: it is written on-the-fly
+        while it is sent, reading the files in chunks, so that whatever
+        the size of the documents, they are never loaded all at once.
+
+        When the download is resumable, or when a range of the zip file
+        is requested, all the files are stored as is in it: its size is
+        known up front and its ranges can be sent (see _StoredZip).
 
         :param str name: the name to give to the zip file
         :param odoo.models.Model documents: documents to load in the ZIP
+        :param bool resumable: whether to send a zip file whose download
+            can be resumed
         :return: a http response to download the zip file
         """
         class Item(NamedTuple):
             path: str
-            content: str
+            stream: object  # odoo.http.Stream, None for folders
+            date_time: tuple
 
         seen_folders = set()  # because of shortcuts, we can have loops
         # many documents can have the same name
@@ -179,13 +392,18 @@ class ShareRoute(http.Controller):
                 document_name = document.name.replace('/', '_')
                 # it is the ending slash that makes it appears as a
                 # folder inside the zip file.
-                return Item(unique(f'{folder.path}{document_name}') + '/', '')
+                return Item(unique(f'{folder.path}{document_name}') + '/', None, date_time(document))
             try:
                 stream = self._documents_content_stream(document.shortcut_document_id or document)
                 download_name = stream.download_name.replace('/', '_')
             except (ValueError, MissingError):
                 return None  # skip
-            return Item(unique(f'{folder.path}{download_name}'), stream.read())
+            if stream.type == 'url':
+                return None  # skip
+            return Item(unique(f'{folder.path}{download_name}'), stream, date_time(document.shortcut_document_id or document))
+
+        def date_time(document):
+            return max(document.write_date or document.create_date, fields.Datetime.from_string('1980-01-01')).timetuple()[:6]
 
         def generate_zip_items(documents_sudo, folder):
             documents_sudo = documents_sudo.sorted(lambda d: d.id)
@@ -205,26 +423,138 @@ class ShareRoute(http.Controller):
                 for sub_document_sudo in self._get_folder_children(folder_sudo):
                     yield from generate_zip_items(sub_document_sudo, sub_folder)
 
-        # TODO: zip on-the-fly while streaming instead of loading the
-        #       entire zip in memory and sending it all at once.
-
-        stream = io.BytesIO()
-        root_folder = Item('', '')
-        try:
-            with zipfile.ZipFile(stream, 'w') as doc_zip:
-                for (path, content) in generate_zip_items(documents, root_folder):
-                    doc_zip.writestr(path, content, compress_type=zipfile.ZIP_DEFLATED)
-        except zipfile.BadZipfile:
-            logger.exception("BadZipfile exception")
+        def read_chunks(stream):
+            if stream.type == 'path':
+                with open(stream.path, 'rb') as file:
+                    while chunk := file.read(ZIP_CHUNK_SIZE):
+                        yield chunk
+            elif stream.data:
+                yield stream.data
+
+        def generate_zip_chunks(items):
+            # The zip file is written in a non-seekable file: the sizes
+            # and checksums of its files are written after their content.
+            zip_stream = _ZipStream()
+            try:
+                with zipfile.ZipFile(zip_stream, 'w') as doc_zip:
+                    for item in items:
+                        zip_info = zipfile.ZipInfo(item.path, item.date_time)
+                        if item.stream is None:
+                            zip_info.external_attr = 0o40775 << 16 | 0x10  # same as ZipFile.writestr
+                            doc_zip.writestr(zip_info, '')
+                            continue
+                        zip_info.external_attr = 0o600 << 16
+                        zip_info.compress_type = self._get_zip_compress_type(item.stream.mimetype)
+                        if item.stream.size is not None:
+                            zip_info.file_size = item.stream.size
+                        with doc_zip.open(zip_info, 'w', force_zip64=item.stream.size is None) as zip_file:
+                            for chunk in read_chunks(item.stream):
+                                zip_file.write(chunk)
+                                if len(zip_stream) >= ZIP_CHUNK_SIZE:
+                                    yield zip_stream.pop()
+            except (zipfile.BadZipfile, OSError):
+                # the response is already being sent, it can only be cut short
+                logger.exception("Error while streaming the zip file %r", name)
+                return
+            yield zip_stream.pop()
+
+        # The documents and their files are resolved beforehand, as the
+        # response is streamed once the request's cursor is closed.
+        items = list(generate_zip_items(documents, Item('', None, None)))
+        if (
+            (resumable or request.httprequest.range)
+            and all(item.stream is None or item.stream.size is not None for item in items)
+        ):
+            return self._make_resumable_zip_response(name, items, read_chunks)
 
-        content = stream.getvalue()
         headers = [
             ('Content-Type', 'zip'),
             ('X-Content-Type-Options', 'nosniff'),
-            ('Content-Length', len(content)),
             ('Content-Disposition', content_disposition(name))
         ]
-        return request.make_response(content, headers)
+        return request.make_response(generate_zip_chunks(items), headers)
+
+    def _make_resumable_zip_response(self, name, items, read_chunks):
+        """ Get an HTTP response to download the zip file of the given items
+        (see _make_zip) or the range of it requested, if any. The same
+        documents always give the same zip file, identified by its ETag.
+
+        The CRC-32 of the files are kept by checksum once they are read, so
+        that a resumed download does not read again the files already sent.
+        """
+        checksums = {item.path: item.stream.etag for item in items if item.stream and item.stream.etag}
+        ZipCrc = request.env['documents.zip.crc'].sudo()
+        known_crcs = ZipCrc._get_crcs(set(checksums.values()))
+        stored_zip = _StoredZip(items, crcs={
+            path: known_crcs[checksum] for path, checksum in checksums.items() if checksum in known_crcs
+        })
+        etag = hashlib.sha1(repr([
+            (item.path, item.date_time, item.stream and (item.stream.size, item.stream.etag))
+            for item in items
+        ]).encode()).hexdigest()
+        headers = [
+            ('Content-Type', 'zip'),
+            ('X-Content-Type-Options', 'nosniff'),
+            ('Content-Disposition', content_disposition(name)),
+            ('Accept-Ranges', 'bytes'),
+            ('ETag', f'"{etag}"'),
+        ]
+
+        byte_range = request.httprequest.range
+        if_range = request.httprequest.if_range
+        if byte_range and (len(byte_range.ranges) > 1 or if_range.date or (if_range.etag and if_range.etag != etag)):
+            # several ranges, or the zip file changed since the download
+            # started: it is sent as a whole
+            byte_range = None
+        start, stop = 0, stored_zip.size
+        status = HTTPStatus.OK
+        if byte_range:
+            if not (range_for_length := byte_range.range_for_length(stored_zip.size)):
+                headers.append(('Content-Range', f'bytes */{stored_zip.size}'))
+                return request.make_response('', headers, status=HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            start, stop = range_for_length
+            headers.append(('Content-Range', f'bytes {start}-{stop - 1}/{stored_zip.size}'))
+            status = HTTPStatus.PARTIAL_CONTENT
+        headers.append(('Content-Length', str(stop - start)))
+
+        # The response is streamed once the request's cursor is closed
+        registry = request.env.registry
+        new_crcs = {}
+
+        def store_crcs():
+            if new_crcs:
+                with registry.cursor() as cr:
+                    api.Environment(cr, SUPERUSER_ID, {})['documents.zip.crc']._store_crcs(new_crcs)
+                new_crcs.clear()
+
+        def on_crc(path, crc):
+            if (checksum := checksums.get(path)) and checksum not in known_crcs:
+                known_crcs[checksum] = new_crcs[checksum] = crc
+                if len(new_crcs) >= ZIP_CRC_BATCH_SIZE:
+                    store_crcs()
+
+        def generate_zip_chunks():
+            try:
+                yield from stored_zip.generate(read_chunks, start, stop, on_crc=on_crc)
+            except OSError:
+                # the response is already being sent, it can only be cut short
+                logger.exception("Error while streaming the zip file %r", name)
+            finally:
+                # also when the download is interrupted, to resume it
+                store_crcs()
+
+        return request.make_response(generate_zip_chunks(), headers, status=status)
+
+    @classmethod
+    def _get_zip_compress_type(cls, mimetype):
+        """ Return how a file of the given mimetype is compressed in the zip
+        files: stored as is when it is already compressed, deflated otherwise. """
+        mimetype = (mimetype or '').split(';')[0].strip().lower()
+        if mimetype in ZIP_DEFLATED_MIMETYPES:
+            return zipfile.ZIP_DEFLATED
+        if mimetype in ZIP_STORED_MIMETYPES or mimetype.startswith(('audio/', 'image/', 'video/')):
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
 
     # Download & upload routes #####################################################################
     @http.route('/documents/pdf_split', type='http', methods=['POST'], auth="user")
@@ -421,12 +751,14 @@ class ShareRoute(http.Controller):
 
     @http.route('/documents/content/<access_token>',
                 type='http', auth='public', readonly=True)
-    def documents_content(self, access_token, download=True):
+    def documents_content(self, access_token, download=True, resumable=False):
         """Serve the file of the document.
 
         :param access_token: the access token to the document record
         :param download: whether to download the document on the user's
             file system or to preview the document within the browser
+        :param resumable: for folders, whether to send a zip file whose
+            download can be resumed
         """
         document_sudo = self._from_access_token(access_token, skip_log=True)
         if not document_sudo:
@@ -441,9 +773,12 @@ class ShareRoute(http.Controller):
             return request.redirect(
                 document_sudo.url, code=HTTPStatus.TEMPORARY_REDIRECT, local=False)
         if document_sudo.type == 'folder':
+            with replace_exceptions(ValueError, by=BadRequest):
+                resumable = str2bool(resumable)
             return self._make_zip(
                 f'{document_sudo.name}.zip',
                 self._get_folder_children(document_sudo),
+                resumable=resumable,
             )
         if document_sudo.type == 'binary':
             if not document_sudo.attachment_id:
@@ -514,11 +849,15 @@ class ShareRoute(http.Controller):
 
         :param file_ids: if of the files to zip.
         :param zip_name: name of the zip file.
+        :param resumable: whether to send a zip file whose download can be
+            resumed.
         """
         ids_list = [int(x) for x in file_ids.split(',')]
         documents = request.env['documents.document'].browse(ids_list)
         documents.check_access('read')
-        return self._make_zip(zip_name, documents)
+        with replace_exceptions(ValueError, by=BadRequest):
+            resumable = str2bool(kw.get('resumable', False))
+        return self._make_zip(zip_name, documents, resumable=resumable)
 
     @http.route([
         '/document/download/all/<int:share_id>/<access_token>',
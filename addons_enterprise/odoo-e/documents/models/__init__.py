@@ -10,6 +10,7 @@ from . import documents_access
 from . import documents_document
 from . import documents_redirect
 from . import documents_tag
+from . import documents_zip_crc
 
 # orm
 from . import ir_attachment
@@ -5,6 +5,8 @@ import contextlib
 import io
 import logging
 import re
+import subprocess
+import threading
 import uuid
 from ast import literal_eval
 from collections import Counter, OrderedDict, defaultdict
@@ -19,20 +21,36 @@ import odoo
 from odoo import _, api, Command, fields, models
 from odoo.exceptions import AccessError, MissingError, UserError, ValidationError
 from odoo.osv import expression
-from odoo.tools import groupby, image_process, SQL, create_index
+from odoo.tools import groupby, image_process, split_every, SQL, create_index
 from odoo.tools.mimetypes import get_extension
-from odoo.tools.misc import clean_context
+from odoo.tools.misc import clean_context, find_in_path
 from odoo.tools.pdf import PdfFileReader
 from odoo.addons.mail.tools import link_preview
 
 _logger = logging.getLogger(__name__)
 
+# Number of pending thumbnails generated by the scheduled action between two commits, and in one run.
+THUMBNAIL_BATCH_SIZE = 100
+THUMBNAIL_CRON_LIMIT = 1000
+
 
 def _sanitize_file_extension(extension):
     """ Remove leading and trailing spacing + Remove leading "." """
     return re.sub(r'^[\s.]+|\s+$', '', extension)
 
 
+# Path of the poppler's pdftoppm binary, rendering the thumbnails of the PDFs on the server, None if it is not installed,
+# in which case they are rendered by the browsers. Resolved once, as the wkhtmltopdf binary of the reports.
+try:
+    PDFTOPPM_BIN = find_in_path('pdftoppm')
+except OSError:
+    PDFTOPPM_BIN = None
+
+
+def _get_pdftoppm_bin():
+    return PDFTOPPM_BIN
+
+
 class Document(models.Model):
     _name = 'documents.document'
     _description = 'Document'
@@ -77,6 +95,7 @@ class Document(models.Model):
             ('present', 'Present'),  # Document has a thumbnail
             ('error', 'Error'),  # Error when generating the thumbnail
             ('client_generated', 'Client Generated'),  # The PDF thumbnail is generated by the user browser
+            ('pending', 'Pending'),  # The thumbnail is waiting to be generated by the scheduled action
             ('restricted', 'Inaccessible'),  # Shortcut to no-permission source
         ], compute="_compute_thumbnail", store=True, readonly=False, recursive=True,
     )
@@ -329,57 +348,109 @@ class Document(models.Model):
                  'company_id', 'folder_id.access_ids', 'folder_id.access_internal', 'folder_id.access_via_link',
                  'folder_id.owner_id', 'folder_id.company_id')
     def _compute_user_permission(self):
-        for document in self:
-            if self.env.user.has_group('documents.group_documents_system'):
+        user = self.env.user
+        active_user_companies = user.with_context(active_test=True).company_ids
+        if user.has_group('documents.group_documents_system'):
+            for document in self:
                 document.user_permission = (
                     'edit' if not (company := document.company_id)
                     or company in self.env.companies
-                    or company not in self.env.user.with_context(active_test=True).company_ids
+                    or company not in active_user_companies
                     else 'none')
-                continue
-            if document.company_id and not document.company_id.active:
-                document.user_permission = 'none'
-                continue
-            document.user_permission = document._get_permission_without_token()
-            if document.user_permission == 'view' and document.access_via_link == 'edit':
-                document.user_permission = 'edit'
-            elif document.user_permission == 'none' and document.folder_id and document.access_via_link != 'none' \
-                    and not document.is_access_via_link_hidden \
-                    and (document.company_id in self.env.companies or document.company_id not in self.env.user.with_context(active_test=True).company_ids):
-                # If the user can access the parent, they have the link.
-                # This only works one level up, as it mimics accessing through the interface.
-                with contextlib.suppress(AccessError):
-                    if document.folder_id._get_permission_without_token() != 'none':
-                        document.user_permission = document.access_via_link
+            return
+
+        documents = self.filtered(lambda d: not d.company_id or d.company_id.active)
+        for document in self - documents:
+            document.user_permission = 'none'
+        permissions = documents._get_permissions_without_token()
+        for document in documents:
+            permission = permissions[document.id]
+            if permission == 'view' and document.access_via_link == 'edit':
+                permission = 'edit'
+            document.user_permission = permission
+
+        # If the user can access the parent, they have the link.
+        # This only works one level up, as it mimics accessing through the interface.
+        linked_documents = documents.filtered(
+            lambda d: d.user_permission == 'none' and d.folder_id and d.access_via_link != 'none'
+            and not d.is_access_via_link_hidden
+            and (d.company_id in self.env.companies or d.company_id not in active_user_companies)
+        )
+        if not linked_documents:
+            return
+        # The unreadable folders give no link, without impacting the others
+        folder_permissions = linked_documents.folder_id._filtered_access('read')._get_permissions_without_token()
+        for document in linked_documents:
+            if folder_permissions.get(document.folder_id.id, 'none') != 'none':
+                document.user_permission = document.access_via_link
 
     def _get_permission_without_token(self):
         self.ensure_one()
-        is_user_company = self.company_id and self.company_id in self.env.user.with_context(active_test=False).company_ids
-        is_disabled_company = is_user_company and self.company_id not in self.env.companies
-        if is_disabled_company:
-            return 'none'
-
-        # own documents
-        if self.owner_id == self.env.user:
-            return 'edit'
-
-        user_permission = 'none'
-        # access with <documents.access>
-        if access := self.access_ids.filtered(
-            lambda a: a.partner_id == self.env.user.partner_id
-            and (not a.expiration_date or a.expiration_date > fields.Datetime.now())
-        ):
-            user_permission = access.role or self.access_via_link
-
-        # access as internal
-        if not self.env.user.share and user_permission != "edit" and self.access_internal != 'none':
-            if not self.company_id or self.company_id in self.env.companies:
-                user_permission = (
-                    'edit' if self.env.user.has_group('documents.group_documents_manager')
-                    else self.access_internal
-                )
+        return self._get_permissions_without_token()[self.id]
+
+    def _get_permissions_without_token(self):
+        """ Return the permission of the current user on each of the documents,
+        regardless of the access they may have through a token or a parent
+        folder, as {document_id: permission}. """
+        user = self.env.user
+        user_companies = user.with_context(active_test=False).company_ids
+        is_manager = user.has_group('documents.group_documents_manager')
+        access_roles = self._get_access_roles()
+
+        permissions = {}
+        for document in self:
+            is_user_company = document.company_id and document.company_id in user_companies
+            is_disabled_company = is_user_company and document.company_id not in self.env.companies
+            if is_disabled_company:
+                permissions[document.id] = 'none'
+                continue
 
-        return user_permission
+            # own documents
+            if document.owner_id == user:
+                permissions[document.id] = 'edit'
+                continue
+
+            user_permission = 'none'
+            # access with <documents.access>
+            if document.id in access_roles:
+                user_permission = access_roles[document.id] or document.access_via_link
+
+            # access as internal
+            if not user.share and user_permission != "edit" and document.access_internal != 'none':
+                if not document.company_id or document.company_id in self.env.companies:
+                    user_permission = 'edit' if is_manager else document.access_internal
+
+            permissions[document.id] = user_permission
+        return permissions
+
+    def _get_access_roles(self):
+        """ Return the roles given to the current user by the valid
+        <documents.access> of the documents, as {document_id: role}, in one
+        query. The role is empty for the accesses only keeping track of the
+        last access of the user. """
+        partner = self.env.user.partner_id
+        now = fields.Datetime.now()
+        documents = self.filtered('id')
+        access_roles = {}
+        if documents:
+            self.env['documents.access'].flush_model(['document_id', 'partner_id', 'role', 'expiration_date'])
+            access_roles = dict(self.env.execute_query(SQL(
+                """
+                SELECT document_id, COALESCE(role, '')
+                  FROM documents_access
+                 WHERE document_id = ANY(%s)
+                   AND partner_id = %s
+                   AND (expiration_date IS NULL OR expiration_date > %s)
+                """,
+                documents.ids, partner.id, now,
+            )))
+        # new documents, not in the database yet
+        for document in self - documents:
+            if access := document.access_ids.filtered(
+                lambda a: a.partner_id == partner and (not a.expiration_date or a.expiration_date > now)
+            ):
+                access_roles[document.id] = access.role
+        return access_roles
 
     def _search_user_permission(self, operator, value):
         if operator not in ('=', '!='):
@@ -519,6 +590,8 @@ class Document(models.Model):
     @api.depends('checksum', 'shortcut_document_id.thumbnail', 'shortcut_document_id.thumbnail_status',
                  'shortcut_document_id.user_permission')
     def _compute_thumbnail(self):
+        # The thumbnails are generated in background by the scheduled action (see '_cron_generate_thumbnails').
+        has_pending_thumbnails = False
         for document in self:
             if document.shortcut_document_id:
                 if document.shortcut_document_id.user_permission != 'none':
@@ -528,19 +601,88 @@ class Document(models.Model):
                     document.thumbnail = False
                     document.thumbnail_status = 'restricted'
             elif document.mimetype and document.mimetype.startswith('application/pdf'):
-                # Thumbnails of pdfs are generated by the client. To force the generation, we invalidate the thumbnail.
                 document.thumbnail = False
-                document.thumbnail_status = 'client_generated'
+                if document.checksum and _get_pdftoppm_bin():
+                    document.thumbnail_status = 'pending'
+                    has_pending_thumbnails = True
+                else:
+                    # Thumbnails of pdfs are generated by the client. To force the generation, we invalidate the thumbnail.
+                    document.thumbnail_status = 'client_generated'
             elif document.mimetype and document.mimetype.startswith('image/'):
-                try:
-                    document.thumbnail = base64.b64encode(image_process(document.raw, size=(200, 140), crop='center'))
-                    document.thumbnail_status = 'present'
-                except (UserError, TypeError):
-                    document.thumbnail = False
-                    document.thumbnail_status = 'error'
+                document.thumbnail = False
+                document.thumbnail_status = 'pending' if document.checksum else 'error'
+                has_pending_thumbnails = has_pending_thumbnails or bool(document.checksum)
             else:
                 document.thumbnail = False
                 document.thumbnail_status = False
+        if has_pending_thumbnails and (cron := self.env.ref('documents.ir_cron_generate_thumbnails', raise_if_not_found=False)):
+            cron._trigger()
+
+    @api.model
+    def _cron_generate_thumbnails(self):
+        """ Generate the pending thumbnails, committing them by batch. The scheduled action is run again right away while
+        thumbnails are pending. """
+        Document = self.sudo().with_context(active_test=False)
+        # The shortcuts have no file: their thumbnail mirrors the one of their target
+        pending_domain = [('thumbnail_status', '=', 'pending'), ('shortcut_document_id', '=', False)]
+        documents = Document.search(pending_domain, order='id', limit=THUMBNAIL_CRON_LIMIT)
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        for documents_batch in split_every(THUMBNAIL_BATCH_SIZE, documents.ids, Document.browse):
+            documents_batch._generate_thumbnails()
+            if auto_commit:
+                self.env.cr.commit()
+        if auto_commit:
+            remaining = Document.search_count(pending_domain)
+            self.env['ir.cron']._notify_progress(done=len(documents), remaining=remaining)
+
+    def _generate_thumbnails(self):
+        """ Generate the thumbnails of the pending documents. The thumbnail of a file is generated once and shared by
+        the documents having the same file (i.e. the same checksum), reusing the thumbnail of a document already having
+        one if any. """
+        documents = self.filtered(lambda d: d.thumbnail_status == 'pending' and not d.shortcut_document_id)
+        if not documents:
+            return
+        Document = self.sudo().with_context(active_test=False)
+        thumbnails = {}
+        for document in Document.search([
+            ('attachment_id.checksum', 'in', list(set(documents.mapped('checksum')))),
+            ('thumbnail_status', '=', 'present'),
+            ('shortcut_document_id', '=', False),
+        ], order='id'):
+            if document.checksum not in thumbnails:
+                thumbnails[document.checksum] = document.thumbnail
+        for checksum, checksum_documents in documents.grouped('checksum').items():
+            if checksum not in thumbnails:
+                thumbnails[checksum] = checksum_documents[0]._generate_thumbnail()
+            if thumbnails[checksum]:
+                thumbnail_status = 'present'
+            elif checksum_documents[0].mimetype and checksum_documents[0].mimetype.startswith('application/pdf'):
+                # not rendered by the server, the browsers can still render it
+                thumbnail_status = 'client_generated'
+            else:
+                thumbnail_status = 'error'
+            checksum_documents.write({
+                'thumbnail': thumbnails[checksum],
+                'thumbnail_status': thumbnail_status,
+            })
+
+    def _generate_thumbnail(self):
+        """ Return the base64 encoded thumbnail of the file of the document, False if it cannot be generated. """
+        self.ensure_one()
+        if not self.mimetype or not self.raw:
+            return False
+        try:
+            if self.mimetype.startswith('application/pdf'):
+                # Render the top of the first page, as the browsers would do
+                image = subprocess.run(
+                    [_get_pdftoppm_bin(), '-f', '1', '-l', '1', '-singlefile', '-png', '-scale-to', '400', '-'],
+                    input=self.raw, capture_output=True, check=True, timeout=60,
+                ).stdout
+                return base64.b64encode(image_process(image, size=(200, 140), crop='top'))
+            return base64.b64encode(image_process(self.raw, size=(200, 140), crop='center'))
+        except (UserError, TypeError, OSError, subprocess.SubprocessError):
+            _logger.info("Cannot generate the thumbnail of the document %s", self.id, exc_info=True)
+            return False
 
     @api.depends('type')
     def _compute_deletion_delay(self):
@@ -0,0 +1,51 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+
+class DocumentZipCrc(models.Model):
+    """CRC-32 of the files sent in the resumable zip files, by checksum of the
+    files. The CRC-32 of all the files of a zip file are written at its end:
+    they are kept so that a resumed download does not read again the files
+    already sent (see ShareRoute._make_resumable_zip_response)."""
+
+    _name = "documents.zip.crc"
+    _description = "Document Zip CRC"
+    _log_access = False
+
+    checksum = fields.Char(required=True)
+    crc = fields.Integer(required=True, help="CRC-32 of the file, as a signed integer.")
+
+    _sql_constraints = [
+        ('checksum_unique', 'unique(checksum)', 'The CRC of a file is only kept once.'),
+    ]
+
+    @api.model
+    def _get_crcs(self, checksums):
+        """Return the known CRC-32 of the files having the given checksums, as {checksum: crc}."""
+        if not checksums:
+            return {}
+        return {
+            checksum: crc & 0xffffffff
+            for checksum, crc in self.env.execute_query(SQL(
+                "SELECT checksum, crc FROM documents_zip_crc WHERE checksum = ANY(%s)", list(checksums),
+            ))
+        }
+
+    @api.model
+    def _store_crcs(self, crcs):
+        """Keep the CRC-32 of the files given as {checksum: crc}."""
+        if not crcs:
+            return
+        self.env.cr.execute(SQL(
+            """
+            INSERT INTO documents_zip_crc (checksum, crc)
+                 SELECT checksum, crc
+                   FROM UNNEST(%s::varchar[], %s::integer[]) AS file_crc(checksum, crc)
+            ON CONFLICT (checksum) DO NOTHING
+            """,
+            list(crcs),
+            # stored as signed 32 bits integers
+            [crc - (1 << 32) if crc >= 1 << 31 else crc for crc in crcs.values()],
+        ))
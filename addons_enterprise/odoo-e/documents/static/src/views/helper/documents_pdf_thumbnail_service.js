@@ -18,6 +18,46 @@ export const documentsPdfThumbnailService = {
 
         let queue = Promise.resolve();
 
+        // Records whose thumbnail is generated by the server, polled until it is done.
+        const pendingRecords = new Map(); // record -> remaining polls
+        const pollDelay = 3000;
+        const maxPolls = 40;
+        let pollTimeout = false;
+
+        const pollPendingThumbnails = async () => {
+            pollTimeout = false;
+            const records = [...pendingRecords.keys()];
+            const resIds = [...new Set(records.map((record) => record.resId))];
+            let statuses = {};
+            try {
+                const data = await orm.read("documents.document", resIds, ["thumbnail_status"]);
+                statuses = Object.fromEntries(data.map((d) => [d.id, d.thumbnail_status]));
+            } catch {
+                // retried at the next poll
+            }
+            for (const record of records) {
+                const status = statuses[record.resId];
+                const remainingPolls = pendingRecords.get(record) - 1;
+                if (status && status !== "pending") {
+                    pendingRecords.delete(record);
+                    record.data.thumbnail_status = status;
+                    if (status === "client_generated") {
+                        enqueueRecord(record);
+                    }
+                } else if (remainingPolls <= 0) {
+                    pendingRecords.delete(record);
+                } else {
+                    pendingRecords.set(record, remainingPolls);
+                }
+            }
+            schedulePoll();
+        };
+        const schedulePoll = () => {
+            if (!pollTimeout && pendingRecords.size) {
+                pollTimeout = setTimeout(pollPendingThumbnails, pollDelay);
+            }
+        };
+
         const checkForThumbnail = async (record) => {
             let initialWorkerSrc = false;
             if (
@@ -84,6 +124,12 @@ export const documentsPdfThumbnailService = {
 
         return {
             enqueueRecords(records) {
+                for (const record of records) {
+                    if (record.data.thumbnail_status === "pending" && record.resId) {
+                        pendingRecords.set(record, maxPolls);
+                    }
+                }
+                schedulePoll();
                 if (!enabled || env.isSmall) {
                     return;
                 }
@@ -1,6 +1,7 @@
 import base64
 import json
 import zipfile
+import zlib
 from base64 import b64decode, b64encode
 from datetime import timedelta
 from http import HTTPStatus
@@ -499,6 +500,7 @@ class TestDocumentsControllers(HttpCaseWithUserDemo):
         self.assertIn("This document has been requested.", res.text)
 
     def test_doc_ctrl_thumbnail(self):
+        self.env['documents.document']._cron_generate_thumbnails()
         placeholder = self.env['ir.binary']._placeholder(
             self.internal_file._get_placeholder_filename('thumbnail'))
 
@@ -835,6 +837,91 @@ class TestDocumentsControllers(HttpCaseWithUserDemo):
             self.assertEqual(reszip.namelist(), ['public-file.png'])
             self.assertEqual(reszip.read('public-file.png'), self.doc_icon)
 
+    def test_doc_ctrl_zip_stream(self):
+        # bigger than a chunk of the streamed zip file
+        text_file = self.env['documents.document'].create({
+            'type': 'binary',
+            'name': "internal-file.txt",
+            'access_internal': 'edit',
+            'owner_id': self.user_admin.id,
+            'folder_id': self.internal_folder.id,
+            'raw': b"Lorem ipsum dolor sit amet.\n" * 100_000,
+            'mimetype': 'text/plain',
+        })
+        self.authenticate('admin', 'admin')
+        res = self.url_open('/documents/zip?' + urlencode({
+            'zip_name': 'file.zip',
+            'file_ids': f'{self.internal_file.id},{text_file.id},{self.public_folder.id}',
+        }))
+        res.raise_for_status()
+        with BytesIO(res.content) as resfile, zipfile.ZipFile(resfile) as reszip:
+            self.assertIsNone(reszip.testzip())
+            self.assertEqual(reszip.namelist(), [
+                'internal-file.png', 'internal-file.txt', 'public folder/', 'public folder/public-file.png',
+            ])
+            self.assertEqual(reszip.read('internal-file.txt'), text_file.raw)
+            self.assertEqual(reszip.read('public folder/public-file.png'), self.doc_icon)
+            # already compressed files are stored as is
+            self.assertEqual(reszip.getinfo('internal-file.png').compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(reszip.getinfo('internal-file.txt').compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_doc_ctrl_zip_resumable(self):
+        text_file = self.env['documents.document'].create({
+            'type': 'binary',
+            'name': "internal-file.txt",
+            'access_internal': 'edit',
+            'owner_id': self.user_admin.id,
+            'folder_id': self.internal_folder.id,
+            'raw': b"Lorem ipsum dolor sit amet.\n" * 100_000,
+            'mimetype': 'text/plain',
+        })
+        self.authenticate('admin', 'admin')
+        url = '/documents/zip?' + urlencode({
+            'zip_name': 'file.zip',
+            'file_ids': f'{self.internal_file.id},{text_file.id},{self.public_folder.id}',
+            'resumable': 1,
+        })
+        res = self.url_open(url)
+        res.raise_for_status()
+        self.assertEqual(res.headers['Accept-Ranges'], 'bytes')
+        self.assertEqual(int(res.headers['Content-Length']), len(res.content))
+        with BytesIO(res.content) as resfile, zipfile.ZipFile(resfile) as reszip:
+            self.assertIsNone(reszip.testzip())
+            self.assertEqual(reszip.namelist(), [
+                'internal-file.png', 'internal-file.txt', 'public folder/', 'public folder/public-file.png',
+            ])
+            self.assertEqual(reszip.read('internal-file.txt'), text_file.raw)
+            self.assertEqual(reszip.getinfo('internal-file.txt').compress_type, zipfile.ZIP_STORED)
+
+        # the download is resumed where it stopped, on the same zip file
+        res_range = self.url_open(url, headers={'Range': 'bytes=1000-', 'If-Range': res.headers['ETag']})
+        self.assertEqual(res_range.status_code, 206)
+        self.assertEqual(res_range.headers['Content-Range'], f'bytes 1000-{len(res.content) - 1}/{len(res.content)}')
+        self.assertEqual(res_range.content, res.content[1000:])
+
+        res_range = self.url_open(url, headers={'Range': 'bytes=100-199'})
+        self.assertEqual(res_range.status_code, 206)
+        self.assertEqual(res_range.content, res.content[100:200])
+
+        # the zip file changed since the download started: it is sent again
+        res_range = self.url_open(url, headers={'Range': 'bytes=1000-', 'If-Range': '"outdated"'})
+        self.assertEqual(res_range.status_code, 200)
+        self.assertEqual(res_range.content, res.content)
+
+        res_range = self.url_open(url, headers={'Range': f'bytes={len(res.content)}-'})
+        self.assertEqual(res_range.status_code, 416)
+
+        # the CRC-32 of the files sent are kept, the files already sent are not read again to resume the download
+        crcs = self.env['documents.zip.crc']._get_crcs([text_file.attachment_id.checksum])
+        self.assertEqual(crcs, {text_file.attachment_id.checksum: zlib.crc32(text_file.raw)})
+        self.env['documents.zip.crc'].search([('checksum', '=', text_file.attachment_id.checksum)]).crc = 0
+        self.env.flush_all()
+        with BytesIO(res.content) as resfile, zipfile.ZipFile(resfile) as reszip:
+            central_directory_offset = reszip.start_dir
+        res_range = self.url_open(url, headers={'Range': f'bytes={central_directory_offset}-'})
+        self.assertEqual(res_range.status_code, 206)
+        self.assertNotEqual(res_range.content, res.content[central_directory_offset:], "The kept CRC-32 should have been used")
+
     def test_web_ctrl_documents(self):
         public_url = f'/web/content/documents.document/{self.public_file.id}/raw'
         internal_url = f'/web/content/documents.document/{self.internal_file.id}/raw'
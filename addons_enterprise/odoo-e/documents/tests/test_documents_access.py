@@ -702,6 +702,31 @@ class TestDocumentsAccess(TransactionCaseDocuments):
         # As we did update children
         self._assert_raises_check_access_rule(first_child_as_portal, 'read')
 
+    @mute_logger('odoo.addons.base.models.ir_rule')
+    def test_access_via_link_from_parent_folders_mixed(self):
+        """Check that an unreadable parent folder only removes the access via link of its own documents, when the
+        permissions of documents in several folders are computed together."""
+        readable_folder, private_folder = self.env['documents.document'].create([
+            {'type': 'folder', 'name': name, 'owner_id': self.doc_user.id, 'access_internal': access_internal}
+            for name, access_internal in (('Readable', 'view'), ('Private', 'none'))
+        ])
+        documents = self.env['documents.document'].create([
+            {'name': f'{folder.name} file.txt', 'folder_id': folder.id, 'owner_id': self.doc_user.id}
+            for folder in (readable_folder, private_folder)
+        ])
+        documents.action_update_access_rights(access_internal='none', access_via_link='view')
+
+        self.assertEqual((readable_folder | private_folder).with_user(self.internal_user).mapped('user_permission'), ['view', 'none'])
+        documents_as_internal = documents.with_user(self.internal_user)
+        self.assertEqual(documents_as_internal.mapped('user_permission'), ['view', 'none'])
+        self.env.invalidate_all()
+        Document = self.env['documents.document'].with_user(self.internal_user)
+        self.assertEqual(
+            [Document.browse(document_id).user_permission for document_id in documents.ids],
+            documents_as_internal.mapped('user_permission'),
+            "The documents should have the same permission computed one by one",
+        )
+
     @mute_logger('odoo.addons.base.models.ir_rule')
     def test_access_via_link_from_parent_folder(self):
         """Check that a document accessible via link is accessible to users having access to the parent folder.
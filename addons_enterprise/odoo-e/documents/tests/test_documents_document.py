@@ -10,6 +10,7 @@ from odoo import Command, http
 from odoo.exceptions import AccessError, UserError, ValidationError
 from odoo.tests.common import new_test_user
 from odoo.tests import users
+from odoo.addons.documents.models.documents_document import _get_pdftoppm_bin
 
 from .test_documents_common import TransactionCaseDocuments, GIF, TEXT
 
@@ -519,7 +520,8 @@ class TestCaseDocuments(TransactionCaseDocuments):
                     'folder_id': self.folder_b.id,
                 })
                 self.assertEqual(pdf_document.thumbnail, False)
-                self.assertEqual(pdf_document.thumbnail_status, 'client_generated')
+                # rendered by the server if it can, by the browser otherwise
+                self.assertEqual(pdf_document.thumbnail_status, 'pending' if _get_pdftoppm_bin() else 'client_generated')
 
             word_document = self.env['documents.document'].create({
                 'name': 'Test DOC',
@@ -536,9 +538,83 @@ class TestCaseDocuments(TransactionCaseDocuments):
                     'datas': GIF,
                     'folder_id': self.folder_b.id,
                 })
+                self.assertEqual(image_document.thumbnail, False)
+                self.assertEqual(image_document.thumbnail_status, 'pending')
+                self.env['documents.document']._cron_generate_thumbnails()
                 self.assertEqual(image_document.thumbnail, GIF)
                 self.assertEqual(image_document.thumbnail_status, 'present')
 
+    def test_document_thumbnail_generation(self):
+        """ The thumbnails are generated by the scheduled action, once for the identical files. """
+        documents = self.env['documents.document'].create([{
+            'name': f'Test image doc {i}',
+            'datas': GIF,
+            'mimetype': 'image/gif',
+            'folder_id': self.folder_b.id,
+        } for i in range(3)])
+        broken_document = self.env['documents.document'].create({
+            'name': 'Test broken image doc',
+            'datas': TEXT,
+            'mimetype': 'image/png',
+            'folder_id': self.folder_b.id,
+        })
+        self.assertEqual(set((documents | broken_document).mapped('thumbnail_status')), {'pending'})
+
+        with patch.object(self.env.registry['documents.document'], '_generate_thumbnail', autospec=True,
+                          side_effect=lambda document: GIF if document.checksum == documents[0].checksum else False) as generate:
+            self.env['documents.document']._cron_generate_thumbnails()
+        self.assertEqual(generate.call_count, 2, 'The thumbnail of identical files should have been generated once')
+        self.assertEqual(documents.mapped('thumbnail_status'), ['present'] * 3)
+        self.assertEqual(documents.mapped('thumbnail'), [GIF] * 3)
+        self.assertEqual(broken_document.thumbnail_status, 'error')
+
+        # the thumbnail of an already known file is reused
+        new_document = self.env['documents.document'].create({
+            'name': 'Test image doc copy',
+            'datas': GIF,
+            'mimetype': 'image/gif',
+            'folder_id': self.folder_b.id,
+        })
+        self.assertEqual(new_document.thumbnail_status, 'pending')
+        with patch.object(self.env.registry['documents.document'], '_generate_thumbnail', autospec=True) as generate:
+            self.env['documents.document']._cron_generate_thumbnails()
+        generate.assert_not_called()
+        self.assertEqual(new_document.thumbnail, GIF)
+        self.assertEqual(new_document.thumbnail_status, 'present')
+
+    def test_document_thumbnail_shortcut(self):
+        """ The shortcuts of a pending document are left to the scheduled action generating the thumbnail of their target. """
+        document = self.env['documents.document'].create({
+            'name': 'Test image doc',
+            'datas': GIF,
+            'mimetype': 'image/gif',
+            'folder_id': self.folder_b.id,
+        })
+        shortcut = document.action_create_shortcut(self.folder_a.id)
+        self.assertEqual(shortcut.thumbnail_status, 'pending')
+
+        with patch.object(self.env.registry['documents.document'], '_generate_thumbnail', autospec=True, return_value=GIF) as generate:
+            self.env['documents.document']._cron_generate_thumbnails()
+        generate.assert_called_once_with(document)
+        self.assertEqual(shortcut.thumbnail_status, 'present')
+        self.assertEqual(shortcut.thumbnail, GIF)
+
+        # even if called on it, nothing is generated for a shortcut
+        self.assertFalse(shortcut._generate_thumbnail())
+
+    def test_document_thumbnail_pdf_fallback(self):
+        """ The PDFs the server fails to render are left to the browsers. """
+        pdf_document = self.env['documents.document'].create({
+            'name': 'Test PDF doc',
+            'mimetype': 'application/pdf',
+            'datas': "JVBERi0gRmFrZSBQREYgY29udGVudA==",
+            'folder_id': self.folder_b.id,
+        })
+        pdf_document.thumbnail_status = 'pending'
+        with patch.object(self.env.registry['documents.document'], '_generate_thumbnail', autospec=True, return_value=False):
+            self.env['documents.document']._cron_generate_thumbnails()
+        self.assertEqual(pdf_document.thumbnail_status, 'client_generated')
+
     def test_document_max_upload_limit(self):
         Doc = self.env['documents.document']
         ICP = self.env['ir.config_parameter']
@@ -685,6 +761,7 @@ class TestCaseDocuments(TransactionCaseDocuments):
 
     def test_thumbnail_fix(self):
         """Test the thumbnail fix that force the status to "present" for image when it is False."""
+        self.env['documents.document']._cron_generate_thumbnails()
         read = (self.document_gif | self.document_txt).web_read({'thumbnail_status': {}, 'mimetype': {}})
         self.assertEqual(self.document_gif.thumbnail_status, 'present')
         self.assertEqual(self.document_txt.thumbnail_status, False)
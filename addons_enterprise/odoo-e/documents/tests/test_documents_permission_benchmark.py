@@ -0,0 +1,129 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+import logging
+import time
+
+from odoo import fields
+from odoo.tests.common import tagged
+
+from .test_documents_common import TransactionCaseDocuments
+
+_logger = logging.getLogger(__name__)
+
+FOLDER_SIZES = (10_000, 100_000)
+
+
+@tagged('post_install', '-at_install', '-standard', 'documents_perf')
+class TestDocumentsPermissionPerf(TransactionCaseDocuments):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.large_folders = cls.env['documents.document'].create([
+            {
+                'type': 'folder',
+                'name': f"Folder of {size} documents",
+                'owner_id': cls.doc_user.id,
+                'access_internal': 'view',
+                'access_via_link': 'view',
+            }
+            for size in FOLDER_SIZES
+        ])
+        cls.env.flush_all()
+
+        # The ORM is too slow to create that many documents. They mix every kind of access: owned by the internal user,
+        # shared with a <documents.access> (some of them expired), internal, through the link of the folder or none.
+        for folder, size in zip(cls.large_folders, FOLDER_SIZES):
+            cls.env.cr.execute(
+                """
+                    INSERT INTO documents_document (
+                        name, type, folder_id, owner_id, document_token, active,
+                        access_internal, access_via_link, is_access_via_link_hidden,
+                        create_uid, write_uid, create_date, write_date
+                    )
+                    SELECT 'Document ' || n, 'binary', %(folder_id)s,
+                           CASE WHEN n %% 10 = 0 THEN %(internal_user_id)s ELSE %(owner_id)s END,
+                           md5(%(folder_id)s || '-' || n), TRUE,
+                           (ARRAY['none', 'view', 'edit'])[n %% 3 + 1],
+                           (ARRAY['none', 'view', 'edit'])[n %% 5 %% 3 + 1],
+                           n %% 4 = 0,
+                           %(owner_id)s, %(owner_id)s, NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC'
+                      FROM generate_series(1, %(size)s) AS n;
+
+                    UPDATE documents_document
+                       SET parent_path = %(folder_path)s || id || '/'
+                     WHERE folder_id = %(folder_id)s;
+
+                    INSERT INTO documents_access (document_id, partner_id, role, last_access_date, expiration_date)
+                    SELECT id, partner.id,
+                           (ARRAY[NULL, 'view', 'edit'])[id %% 3 + 1], NOW() AT TIME ZONE 'UTC',
+                           CASE WHEN id %% 13 = 0 THEN NOW() AT TIME ZONE 'UTC' - INTERVAL '1 day' END
+                      FROM documents_document,
+                           unnest(%(partner_ids)s) AS partner(id)
+                     WHERE folder_id = %(folder_id)s
+                       AND (id + partner.id) %% 7 = 0;
+                """,
+                {
+                    'folder_id': folder.id,
+                    'folder_path': folder.parent_path,
+                    'size': size,
+                    'owner_id': cls.doc_user.id,
+                    'internal_user_id': cls.internal_user.id,
+                    'partner_ids': [cls.internal_user.partner_id.id, cls.portal_user.partner_id.id],
+                },
+            )
+        cls.env.cr.execute("ANALYZE documents_document")
+        cls.env.cr.execute("ANALYZE documents_access")
+
+    def _get_expected_permission(self, document, user, companies):
+        """ Permission of the user on the document, resolved on its own, as it was before being computed in batch. """
+        def get_permission_without_token(document):
+            if document.company_id and document.company_id in user.company_ids and document.company_id not in companies:
+                return 'none'
+            if document.owner_id == user:
+                return 'edit'
+            permission = 'none'
+            if access := document.access_ids.filtered(
+                lambda a: a.partner_id == user.partner_id
+                and (not a.expiration_date or a.expiration_date > fields.Datetime.now())
+            ):
+                permission = access.role or document.access_via_link
+            if not user.share and permission != 'edit' and document.access_internal != 'none':
+                if not document.company_id or document.company_id in companies:
+                    permission = 'edit' if user.has_group('documents.group_documents_manager') else document.access_internal
+            return permission
+
+        if document.company_id and not document.company_id.active:
+            return 'none'
+        permission = get_permission_without_token(document)
+        if permission == 'view' and document.access_via_link == 'edit':
+            return 'edit'
+        if permission == 'none' and document.folder_id and document.access_via_link != 'none' \
+                and not document.is_access_via_link_hidden \
+                and (document.company_id in companies or document.company_id not in user.company_ids) \
+                and get_permission_without_token(document.folder_id) != 'none':
+            return document.access_via_link
+        return permission
+
+    def test_folder_listing_perf(self):
+        for user in (self.internal_user, self.portal_user):
+            Document = self.env['documents.document'].with_user(user)
+            for folder, size in zip(self.large_folders, FOLDER_SIZES):
+                self.env.invalidate_all()
+                start = time.perf_counter()
+                documents_data = Document.search_read([('folder_id', '=', folder.id)], ['name', 'user_permission'])
+                elapsed = time.perf_counter() - start
+                _logger.info(
+                    "%s listing a folder of %s documents (%s readable): %.2fs",
+                    user.name, size, len(documents_data), elapsed,
+                )
+
+                # the fields are read as superuser, as the reference reads documents the user cannot access
+                all_documents = self.env['documents.document'].search([('folder_id', '=', folder.id)])
+                expected_permissions = {
+                    document.id: self._get_expected_permission(document, user, Document.env.companies)
+                    for document in all_documents
+                }
+                self.assertEqual(
+                    {data['id']: data['user_permission'] for data in documents_data},
+                    {document_id: permission for document_id, permission in expected_permissions.items() if permission != 'none'},
+                )
@@ -12,7 +12,7 @@ from functools import reduce
 
 from odoo import api, Command, fields, models, _
 from odoo.exceptions import UserError, ValidationError
-from odoo.tools import float_round, date_utils, convert_file, format_amount
+from odoo.tools import SQL, float_round, date_utils, convert_file, format_amount
 from odoo.tools.float_utils import float_compare
 from odoo.tools.misc import format_date
 from odoo.tools.safe_eval import safe_eval, datetime as safe_eval_datetime, dateutil as safe_eval_dateutil
@@ -722,68 +722,94 @@ class HrPayslip(models.Model):
     def _sum(self, code, from_date, to_date=None):
         if to_date is None:
             to_date = fields.Date.today()
-        self.env.cr.execute("""
-            SELECT sum(pl.total)
-            FROM hr_payslip as hp, hr_payslip_line as pl
-            WHERE hp.employee_id = %s
-            AND hp.state in ('done', 'paid')
-            AND hp.date_from >= %s
-            AND hp.date_to <= %s
-            AND hp.id = pl.slip_id
-            AND pl.code = %s""", (self.employee_id.id, from_date, to_date, code))
-        res = self.env.cr.fetchone()
-        return res and res[0] or 0.0
+        return self._get_history_sum('rule', code, from_date, to_date) or 0.0
 
     def _sum_category(self, code, from_date, to_date=None):
         self.ensure_one()
         if to_date is None:
             to_date = fields.Date.today()
-
-        self.env['hr.payslip'].flush_model(['employee_id', 'state', 'date_from', 'date_to'])
-        self.env['hr.payslip.line'].flush_model(['total', 'slip_id', 'salary_rule_id'])
-        self.env['hr.salary.rule.category'].flush_model(['code'])
-
-        self.env.cr.execute("""
-            SELECT sum(pl.total)
-            FROM
-                hr_payslip as hp,
-                hr_payslip_line as pl,
-                hr_salary_rule_category as rc,
-                hr_salary_rule as sr
-            WHERE hp.employee_id = %s
-            AND hp.state in ('done', 'paid')
-            AND hp.date_from >= %s
-            AND hp.date_to <= %s
-            AND hp.id = pl.slip_id
-            AND sr.id = pl.salary_rule_id
-            AND rc.id = sr.category_id
-            AND rc.code = %s""", (self.employee_id.id, from_date, to_date, code))
-        res = self.env.cr.fetchone()
-        return res and res[0] or 0.0
+        return self._get_history_sum('category', code, from_date, to_date) or 0.0
 
     def _sum_worked_days(self, code, from_date, to_date=None):
         self.ensure_one()
         if to_date is None:
             to_date = fields.Date.today()
+        return self._get_history_sum('worked_days', code, from_date, to_date)
+
+    def _get_history_sum(self, kind, code, from_date, to_date):
+        """ Returns the sum of the lines of type kind ('rule', 'category' or 'worked_days') with the given code, over the done
+        and paid payslips of the employee between from_date and to_date.
+
+        When computing a batch of payslips, the 'payslip_batch_sums' context key holds the sums already fetched for all the
+        employees of the batch: each distinct sum is then computed once for the whole batch instead of once per payslip.
+        """
+        batch_sums = self.env.context.get('payslip_batch_sums')
+        if batch_sums is None or self.employee_id.id not in batch_sums['employee_ids']:
+            return self._read_history_sums(kind, code, from_date, to_date, self.employee_id.ids).get(self.employee_id.id)
+
+        key = (kind, code, from_date, to_date)
+        if key not in batch_sums['sums']:
+            batch_sums['sums'][key] = self._read_history_sums(kind, code, from_date, to_date, list(batch_sums['employee_ids']))
+        return batch_sums['sums'][key].get(self.employee_id.id)
+
+    @api.model
+    def _read_history_sums(self, kind, code, from_date, to_date, employee_ids):
+        """ Computes the sums of _get_history_sum for several employees at once.
 
-        query = """
-            SELECT sum(hwd.amount)
-            FROM hr_payslip hp, hr_payslip_worked_days hwd, hr_work_entry_type hwet
-            WHERE hp.state in ('done', 'paid')
-            AND hp.id = hwd.payslip_id
-            AND hwet.id = hwd.work_entry_type_id
-            AND hp.employee_id = %(employee)s
-            AND hp.date_to <= %(stop)s
-            AND hwet.code = %(code)s
-            AND hp.date_from >= %(start)s"""
-
-        self.env.cr.execute(query, {
-            'employee': self.employee_id.id,
-            'code': code,
-            'start': from_date,
-            'stop': to_date})
-        res = self.env.cr.fetchone()
-        return res[0] if res else 0.0
+        :return: A dictionary mapping the employees having some matching lines to their sum.
+        """
+        self.env['hr.payslip'].flush_model(['employee_id', 'state', 'date_from', 'date_to'])
+        if kind == 'worked_days':
+            self.env['hr.payslip.worked_days'].flush_model(['amount', 'payslip_id', 'work_entry_type_id'])
+            self.env['hr.work.entry.type'].flush_model(['code'])
+            query = SQL(
+                """
+                SELECT hp.employee_id, sum(hwd.amount)
+                FROM hr_payslip hp, hr_payslip_worked_days hwd, hr_work_entry_type hwet
+                WHERE hp.state in ('done', 'paid')
+                AND hp.id = hwd.payslip_id
+                AND hwet.id = hwd.work_entry_type_id
+                AND hp.employee_id = ANY(%(employee_ids)s)
+                AND hp.date_to <= %(stop)s
+                AND hwet.code = %(code)s
+                AND hp.date_from >= %(start)s
+                GROUP BY hp.employee_id
+                """,
+                employee_ids=employee_ids, code=code, start=from_date, stop=to_date,
+            )
+        else:
+            self.env['hr.payslip.line'].flush_model(['total', 'slip_id', 'salary_rule_id', 'code'])
+            if kind == 'category':
+                self.env['hr.salary.rule'].flush_model(['category_id'])
+                self.env['hr.salary.rule.category'].flush_model(['code'])
+                code_condition = SQL(
+                    """
+                    pl.salary_rule_id IN (
+                        SELECT sr.id
+                        FROM hr_salary_rule as sr
+                        JOIN hr_salary_rule_category as rc ON rc.id = sr.category_id
+                        WHERE rc.code = %s
+                    )
+                    """,
+                    code,
+                )
+            else:
+                code_condition = SQL("pl.code = %s", code)
+            query = SQL(
+                """
+                SELECT hp.employee_id, sum(pl.total)
+                FROM hr_payslip as hp, hr_payslip_line as pl
+                WHERE hp.employee_id = ANY(%(employee_ids)s)
+                AND hp.state in ('done', 'paid')
+                AND hp.date_from >= %(start)s
+                AND hp.date_to <= %(stop)s
+                AND hp.id = pl.slip_id
+                AND %(code_condition)s
+                GROUP BY hp.employee_id
+                """,
+                employee_ids=employee_ids, start=from_date, stop=to_date, code_condition=code_condition,
+            )
+        return dict(self.env.execute_query(query))
 
     def _get_base_local_dict(self):
         return {
@@ -902,6 +928,10 @@ class HrPayslip(models.Model):
     def _get_payslip_lines(self):
         line_vals = []
 
+        if 'payslip_batch_sums' not in self.env.context:
+            # The historical sums used by the rules are fetched for all the employees of the batch at once
+            self = self.with_context(payslip_batch_sums={'employee_ids': set(self.employee_id.ids), 'sums': {}})
+
         if any(self.mapped('ytd_computation')):
             last_ytd_payslips = self._get_last_ytd_payslips()
             code_set = set(self.struct_id.rule_ids.mapped('code'))
@@ -62,18 +62,22 @@ class HrSalaryRuleParameter(models.Model):
         ('_unique', 'unique (code)', "Two rule parameters cannot have the same code."),
     ]
 
+    @api.model
+    @ormcache('code', 'tuple(self.env.context.get("allowed_company_ids", []))')
+    def _get_parameter_versions(self, code):
+        """ Returns the evaluated values of all the versions of a parameter, as (date_from, value) tuples, the most recent first.
+        Each version is only evaluated once, whatever the number of dates it is requested for.
+        """
+        versions = self.env['hr.rule.parameter.value'].search_fetch([('code', '=', code)], ['date_from', 'parameter_value'])
+        return tuple((version.date_from, safe_eval(version.parameter_value)) for version in versions)
+
     @api.model
     @ormcache('code', 'date', 'tuple(self.env.context.get("allowed_company_ids", []))')
     def _get_parameter_from_code(self, code, date=None, raise_if_not_found=True):
-        if not date:
-            date = fields.Date.today()
-        # This should be quite fast as it uses a limit and fields are indexed
-        # moreover the method is cached
-        rule_parameter = self.env['hr.rule.parameter.value'].search([
-            ('code', '=', code),
-            ('date_from', '<=', date)], limit=1)
-        if rule_parameter:
-            return safe_eval(rule_parameter.parameter_value)
+        date = fields.Date.to_date(date) if date else fields.Date.today()
+        for date_from, value in self._get_parameter_versions(code):
+            if date_from <= date:
+                return value
         if raise_if_not_found:
             raise UserError(_('No rule parameter with code "%(code)s" was found for %(date)s', code=code, date=date))
         else:
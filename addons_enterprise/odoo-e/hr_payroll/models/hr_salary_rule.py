@@ -1,9 +1,11 @@
 # -*- coding:utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
-from odoo import api, fields, models, _
-from odoo.exceptions import UserError
-from odoo.tools.safe_eval import safe_eval
+from psycopg2 import OperationalError
+
+from odoo import api, fields, models, tools, _
+from odoo.exceptions import RedirectWarning, UserError
+from odoo.tools.safe_eval import _BUILTINS, _SAFE_OPCODES, check_values, test_expr, unsafe_eval
 
 
 class HrSalaryRule(models.Model):
@@ -115,6 +117,30 @@ result = contract.wage * 0.10''')
             code=self.code,
             error_message=e))
 
+    @api.model
+    @tools.ormcache('code', 'mode')
+    def _get_compiled_code(self, code, mode):
+        """ Compiles and validates the python code of a rule. The cache is keyed on the code itself, so that a modified rule
+        is compiled again, while the rules sharing the same code are compiled only once.
+        """
+        return test_expr(code, _SAFE_OPCODES, mode=mode)
+
+    @api.model
+    def _safe_eval(self, code, localdict, mode='eval'):
+        """ Evaluates the code of a rule like safe_eval(code, localdict, mode=mode, nocopy=mode == 'exec') would, but reusing
+        the code object compiled for the previous payslips.
+        """
+        code_object = self._get_compiled_code(code, mode)
+        globals_dict = localdict if mode == 'exec' else dict(localdict)
+        check_values(globals_dict)
+        globals_dict['__builtins__'] = dict(_BUILTINS)
+        try:
+            return unsafe_eval(code_object, globals_dict)
+        except (UserError, RedirectWarning, OperationalError, ZeroDivisionError):
+            raise
+        except Exception as e:
+            raise ValueError('%r while evaluating\n%r' % (e, code))
+
     def _compute_rule(self, localdict):
 
         """
@@ -126,13 +152,13 @@ result = contract.wage * 0.10''')
         localdict['localdict'] = localdict
         if self.amount_select == 'fix':
             try:
-                return self.amount_fix or 0.0, float(safe_eval(self.quantity, localdict)), 100.0
+                return self.amount_fix or 0.0, float(self._safe_eval(self.quantity, localdict)), 100.0
             except Exception as e:
                 self._raise_error(localdict, _("Wrong quantity defined for:"), e)
         if self.amount_select == 'percentage':
             try:
-                return (float(safe_eval(self.amount_percentage_base, localdict)),
-                        float(safe_eval(self.quantity, localdict)),
+                return (float(self._safe_eval(self.amount_percentage_base, localdict)),
+                        float(self._safe_eval(self.quantity, localdict)),
                         self.amount_percentage or 0.0)
             except Exception as e:
                 self._raise_error(localdict, _("Wrong percentage base or quantity defined for:"), e)
@@ -142,7 +168,7 @@ result = contract.wage * 0.10''')
             return localdict['inputs'][self.amount_other_input_id.code].amount, 1.0, 100.0
         # python code
         try:
-            safe_eval(self.amount_python_compute or 0.0, localdict, mode='exec', nocopy=True)
+            self._safe_eval(self.amount_python_compute or 0.0, localdict, mode='exec')
             return float(localdict['result']), localdict.get('result_qty', 1.0), localdict.get('result_rate', 100.0)
         except Exception as e:
             self._raise_error(localdict, _("Wrong python code defined for:"), e)
@@ -154,7 +180,7 @@ result = contract.wage * 0.10''')
             return True
         if self.condition_select == 'range':
             try:
-                result = safe_eval(self.condition_range, localdict)
+                result = self._safe_eval(self.condition_range, localdict)
                 return self.condition_range_min <= result <= self.condition_range_max
             except Exception as e:
                 self._raise_error(localdict, _("Wrong range condition defined for:"), e)
@@ -162,7 +188,7 @@ result = contract.wage * 0.10''')
             return self.condition_other_input_id.code in localdict['inputs']
         # python code
         try:
-            safe_eval(self.condition_python, localdict, mode='exec', nocopy=True)
+            self._safe_eval(self.condition_python, localdict, mode='exec')
             return localdict.get('result', False)
         except Exception as e:
             self._raise_error(localdict, _("Wrong python condition defined for:"), e)
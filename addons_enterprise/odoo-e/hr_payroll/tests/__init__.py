@@ -9,6 +9,7 @@ from . import test_multi_contract
 from . import test_rule_parameter
 from . import test_payslip_computation
 from . import test_performance
+from . import test_payslip_benchmark
 from . import test_work_entry
 from . import test_resource
 from . import test_schedule_relative_payslip
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+import logging
+import time
+from datetime import date
+from unittest.mock import patch
+
+from odoo.addons.hr_payroll.tests.common import TestPayslipBase
+from odoo.tests.common import tagged
+from odoo.tools.safe_eval import safe_eval
+
+_logger = logging.getLogger(__name__)
+
+PAYSLIP_BATCH_SIZE = 500
+
+
+def _reference_safe_eval(self, code, localdict, mode='eval'):
+    # How the salary rules were evaluated before their code got compiled once per registry
+    return safe_eval(code, localdict, mode=mode, nocopy=mode == 'exec')
+
+
+@tagged('post_install', '-at_install', '-standard', 'payslip_perf')
+class TestPayslipBatchPerformance(TestPayslipBase):
+    """ Computes a large batch of payslips with the compiled salary rules and with plain safe_eval. Too slow for the
+    standard runs, it is only executed when explicitly requested with the 'payslip_perf' tag.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        employees = cls.env['hr.employee'].create([
+            {'name': f"Employee {index}"}
+            for index in range(PAYSLIP_BATCH_SIZE)
+        ])
+        cls.env['hr.contract'].create([{
+            'date_start': date(2018, 1, 1),
+            'name': 'Contract for %s' % employee.name,
+            'wage': 5000.0 + index,
+            'state': 'open',
+            'employee_id': employee.id,
+            'structure_type_id': cls.structure_type.id,
+        } for index, employee in enumerate(employees)])
+        payslip_run = cls.env['hr.payslip.run'].create({
+            'name': 'January batch',
+            'date_start': date(2018, 1, 1),
+            'date_end': date(2018, 1, 31),
+        })
+        cls.payslips = cls.env['hr.payslip'].create([{
+            'name': 'Payslip of %s' % employee.name,
+            'employee_id': employee.id,
+            'contract_id': employee.contract_id.id,
+            'struct_id': cls.developer_pay_structure.id,
+            'payslip_run_id': payslip_run.id,
+            'date_from': date(2018, 1, 1),
+            'date_to': date(2018, 1, 31),
+        } for employee in employees])
+
+    def _compute_sheets(self):
+        """ Returns the computed lines of the batch, keyed by payslip and rule, and the time spent in compute_sheet. """
+        self.env.registry.clear_cache()
+        self.env.invalidate_all()
+        start = time.perf_counter()
+        self.payslips.compute_sheet()
+        elapsed = time.perf_counter() - start
+        lines = {
+            (line.slip_id.id, line.code): (line.amount, line.quantity, line.rate, line.total)
+            for line in self.payslips.line_ids
+        }
+        return lines, elapsed
+
+    def test_compute_sheet_compiled_rules(self):
+        with patch.object(type(self.env['hr.salary.rule']), '_safe_eval', _reference_safe_eval):
+            expected_lines, safe_eval_time = self._compute_sheets()
+        lines, compiled_time = self._compute_sheets()
+
+        self.assertEqual(len({slip_id for slip_id, code in lines if code == 'NET'}), PAYSLIP_BATCH_SIZE)
+        self.assertEqual(lines, expected_lines)
+
+        _logger.info(
+            "compute_sheet on %s payslips: %.2fs with safe_eval, %.2fs with the compiled rules",
+            PAYSLIP_BATCH_SIZE, safe_eval_time, compiled_time,
+        )
@@ -4,8 +4,11 @@
 from dateutil.rrule import rrule, DAILY
 from datetime import datetime, date, timedelta
 from dateutil.relativedelta import relativedelta
+from unittest.mock import patch
+
 from odoo.fields import Date
 from odoo.tests import Form, tagged
+from odoo.addons.hr_payroll.models import hr_salary_rule
 from odoo.addons.hr_payroll.tests.common import TestPayslipContractBase
 
 
@@ -216,6 +219,26 @@ class TestPayslipComputation(TestPayslipContractBase):
         self.richard_payslip2.compute_sheet()
         self.assertEqual(3010.13, self.richard_payslip2.line_ids.filtered(lambda x: x.code == 'SUMALW').total)
 
+    def test_sum_category_batch(self):
+        self.richard_payslip.compute_sheet()
+        self.richard_payslip.action_payslip_done()
+
+        payslips = self.env['hr.payslip'].create([{
+            'name': 'Payslip of %s' % contract.employee_id.name,
+            'employee_id': contract.employee_id.id,
+            'contract_id': contract.id,
+            'struct_id': self.developer_pay_structure.id,
+            'date_from': date(2016, 1, 1),
+            'date_to': date(2016, 1, 31)
+        } for contract in self.contract_cdi + self.contract_jules])
+
+        payslip_class = self.env.registry['hr.payslip']
+        with patch.object(payslip_class, '_read_history_sums', autospec=True, side_effect=payslip_class._read_history_sums) as read_mock:
+            payslips.compute_sheet()
+        # Only one query for the two employees
+        self.assertEqual(read_mock.call_count, 1)
+        self.assertEqual(payslips[0].line_ids.filtered(lambda x: x.code == 'SUMALW').total, 3010.13)
+
     def test_payslip_generation_with_extra_work(self):
         # /!\ this is in the weekend (Sunday) => no calendar attendance at this time
         start = datetime(2015, 11, 1, 10, 0, 0)
@@ -537,6 +560,33 @@ class TestPayslipComputation(TestPayslipContractBase):
         })
         payslip.compute_sheet()
 
+    def test_salary_rules_compiled_once(self):
+        payslips = self.richard_payslip + self.richard_payslip_quarter
+        rules = self.developer_pay_structure.rule_ids
+        rule_codes = {
+            (code, mode)
+            for rule in rules
+            for code, mode in (
+                (rule.amount_select in ('fix', 'percentage') and rule.quantity, 'eval'),
+                (rule.amount_select == 'percentage' and rule.amount_percentage_base, 'eval'),
+                (rule.amount_select == 'code' and rule.amount_python_compute, 'exec'),
+                (rule.condition_select == 'range' and rule.condition_range, 'eval'),
+                (rule.condition_select == 'python' and rule.condition_python, 'exec'),
+            )
+            if code
+        }
+
+        self.env.registry.clear_cache()
+        with patch.object(hr_salary_rule, 'test_expr', wraps=hr_salary_rule.test_expr) as test_expr_mock:
+            payslips.compute_sheet()
+        self.assertEqual(test_expr_mock.call_count, len(rule_codes))
+        self.assertEqual(self.richard_payslip.line_ids.filtered(lambda line: line.code == 'CA').total, 800.0)
+
+        # A modified rule is compiled again
+        self.conv_rule.quantity = '2.0'
+        payslips.compute_sheet()
+        self.assertEqual(self.richard_payslip.line_ids.filtered(lambda line: line.code == 'CA').total, 1600.0)
+
     def test_payslip_warning_message_without_duration_dates(self):
         payslip = self.env['hr.payslip'].create({
             'name': 'Payslip of Richard',
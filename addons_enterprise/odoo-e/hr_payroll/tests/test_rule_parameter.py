@@ -7,6 +7,7 @@ from datetime import date
 from odoo import tests
 from odoo.fields import Date
 from odoo.exceptions import UserError
+from odoo.addons.hr_payroll.models import hr_rule_parameter
 from odoo.tests.common import TransactionCase, new_test_user
 
 @tests.tagged('post_install', '-at_install')
@@ -42,6 +43,16 @@ class TestRuleParameter(TransactionCase):
         with self.assertRaises(UserError):
             value = self.env['hr.rule.parameter']._get_parameter_from_code('test_param', date=date(2014, 5, 5))
 
+    def test_versions_evaluated_once(self):
+        self.env.registry.clear_cache()
+        with patch.object(hr_rule_parameter, 'safe_eval', wraps=hr_rule_parameter.safe_eval) as safe_eval_mock:
+            values = [
+                self.env['hr.rule.parameter']._get_parameter_from_code('test_param', date=reference_date)
+                for reference_date in (date(2016, 5, 5), date(2017, 5, 5), date(2018, 5, 5), date(2021, 5, 5), date(2021, 6, 6))
+            ]
+        self.assertEqual(values, [2016, 2017, 2018, 2020, 2020])
+        self.assertEqual(safe_eval_mock.call_count, 4, "Each version should be evaluated once")
+
     def test_wrong_code(self):
         with self.assertRaises(UserError):
             value = self.env['hr.rule.parameter']._get_parameter_from_code('wrong_code')
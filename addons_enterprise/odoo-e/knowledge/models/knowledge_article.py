@@ -17,7 +17,7 @@ from odoo.exceptions import AccessError, ValidationError, UserError
 from odoo.osv import expression
 from odoo.tools import get_lang, is_html_empty, OrderedSet
 from odoo.tools.translate import html_translate
-from odoo.tools.sql import create_index, make_index_name, SQL
+from odoo.tools.sql import column_exists, create_index, drop_index, make_index_name, SQL
 
 ARTICLE_PERMISSION_LEVEL = {'none': 0, 'read': 1, 'write': 2}
 
@@ -255,19 +255,37 @@ class Article(models.Model):
                     WITH knowledge_dictionary;
             """)
 
-            # 4. Add an index to speed up the @@ match operation:
-            #
-            # When searching in a large collection of articles, the search can
-            # quickly become slow as the database has to parse the body of all
-            # articles. To speed up the search, we will use an index to quickly
-            # find potential candidates matching with the given search terms.
-
-            create_index(
-                self.env.cr,
-                make_index_name(self._table, 'body'),
-                self._table,
-                ["to_tsvector('knowledge_config', body)"],
-                method='GIN')
+        # 4. Store the documents of the articles:
+        #
+        # Parsing the body of the articles is costly: the documents of the
+        # title and of the body are stored in generated columns, maintained
+        # by PostgreSQL whenever the title or the body of an article changes.
+        # The markup of the body is ignored by the text configuration (see 3).
+
+        for column_name, field_name in (('name_tsvector', 'name'), ('body_tsvector', 'body')):
+            if not column_exists(self.env.cr, self._table, column_name):
+                self.env.cr.execute(SQL(
+                    "ALTER TABLE %s ADD COLUMN %s tsvector GENERATED ALWAYS AS (to_tsvector('knowledge_config', COALESCE(%s, ''))) STORED",
+                    SQL.identifier(self._table),
+                    SQL.identifier(column_name),
+                    SQL.identifier(field_name),
+                ))
+
+        # 5. Add an index to speed up the @@ match operation:
+        #
+        # When searching in a large collection of articles, the search can
+        # quickly become slow as the database has to go through all articles.
+        # To speed up the search, we will use an index to quickly find potential
+        # candidates matching with the given search terms. The titles are
+        # matched with ILIKE, using the trigram index of the field.
+
+        drop_index(self.env.cr, make_index_name(self._table, 'body'), self._table)
+        create_index(
+            self.env.cr,
+            make_index_name(self._table, 'body_tsvector'),
+            self._table,
+            ['body_tsvector'],
+            method='GIN')
 
     # ------------------------------------------------------------
     # CONSTRAINTS
@@ -560,7 +578,7 @@ class Article(models.Model):
                 return expression.FALSE_DOMAIN
             return expression.TRUE_DOMAIN
 
-        articles_with_access = KnowledgeArticle._get_internal_permission(filter_domain=[('internal_permission', '=', 'write')])
+        articles_with_access = KnowledgeArticle._get_internal_permission(filter_domain=[('inherited_permission', '=', 'write')])
         member_permissions = KnowledgeArticle._get_partner_member_permissions(self.env.user.partner_id)
         articles_with_member_access = [article_id for article_id, perm in member_permissions.items() if perm == 'write']
         articles_with_no_member_access = list(set(member_permissions.keys() - set(articles_with_member_access)))
@@ -963,6 +981,7 @@ class Article(models.Model):
         if any(articles.mapped('is_template')) and not self.env.user.has_group('base.group_system'):
             raise ValidationError(_('You are not allowed to create a new template.'))
 
+        self.env['knowledge.article.effective.member']._refresh(articles)
         return articles
 
     def write(self, vals):
@@ -1009,8 +1028,17 @@ class Article(models.Model):
             else:
                 _resequence = True
 
+        # articles whose effective members change, and those of their descendants
+        articles_to_refresh = self.env['knowledge.article']
+        if 'parent_id' in vals:
+            articles_to_refresh |= self.filtered(lambda article: article.parent_id.id != (vals['parent_id'] or False))
+        if 'is_desynchronized' in vals:
+            articles_to_refresh |= self.filtered(lambda article: article.is_desynchronized != bool(vals['is_desynchronized']))
+
         result = super(Article, self).write(vals)
 
+        self.env['knowledge.article.effective.member']._refresh(articles_to_refresh)
+
         # resequence only if a sequence was not already computed based on current
         # parent maximum to avoid unnecessary recomputation of sequences
         if _resequence:
@@ -1613,6 +1641,8 @@ class Article(models.Model):
             ])
 
         query = self._search(domain)
+        # the documents of the articles are generated from the values in database
+        self.flush_model(['name', 'body'])
 
         # Escape special characters recognized by the 'ILIKE' keyword
         search_pattern = '%' + re.sub(r'(%|_|\\)', r'\\\1', search_query) + '%'
@@ -1624,10 +1654,10 @@ class Article(models.Model):
             articles_matching_with_title_and_body AS (
                 SELECT knowledge_article.id AS id,
                        1 AS order,
-                       ts_rank_cd(to_tsvector('knowledge_config', knowledge_article.name), %(ts_query)s) AS score
+                       ts_rank_cd(knowledge_article.name_tsvector, %(ts_query)s) AS score
                   FROM knowledge_article
                  WHERE knowledge_article.name ILIKE %(search_pattern)s
-                   AND to_tsvector('knowledge_config', knowledge_article.body) @@ %(ts_query)s
+                   AND knowledge_article.body_tsvector @@ %(ts_query)s
                    AND %(sql_where_clause)s
                  LIMIT %(cut_off)s
             ),
@@ -1646,9 +1676,9 @@ class Article(models.Model):
             articles_matching_with_body AS (
                 SELECT knowledge_article.id AS id,
                        3 AS order,
-                       ts_rank_cd(to_tsvector('knowledge_config', knowledge_article.body), %(ts_query)s) AS score
+                       ts_rank_cd(knowledge_article.body_tsvector, %(ts_query)s) AS score
                   FROM knowledge_article
-                 WHERE to_tsvector('knowledge_config', knowledge_article.body) @@ %(ts_query)s
+                 WHERE knowledge_article.body_tsvector @@ %(ts_query)s
                    AND knowledge_article.id NOT IN (
                         SELECT id FROM articles_matching_with_title_and_body
                         UNION ALL
@@ -1669,7 +1699,7 @@ class Article(models.Model):
                 knowledge_article.id,
                 knowledge_article.icon,
                 knowledge_article.name,
-                CASE WHEN to_tsvector('knowledge_config', knowledge_article.body) @@ %(ts_query)s
+                CASE WHEN knowledge_article.body_tsvector @@ %(ts_query)s
                      THEN ts_headline('knowledge_config', knowledge_article.body, %(ts_query)s,
                             'StartSel=<strong>, StopSel=</strong>, MaxWords=20, MinWords=10, MaxFragments=3')
                      ELSE NULL END AS "headline",
@@ -2295,89 +2325,41 @@ class Article(models.Model):
 
     @api.model
     def _get_internal_permission(self, filter_domain=None):
-        """ Compute article based permissions.
+        """ Compute article based permissions, being the internal permission
+        of each article or the one it inherits from its ancestors, as stored
+        in 'inherited_permission'. The articles can be filtered using the
+        filter_domain param. """
+        self.flush_model(['inherited_permission'])
 
-        Note: we don't use domain because we cannot include properly the where clause
-        in the custom sql query. The query's output table and fields names does not match
-        the model we are working on.
-        """
-        self.flush_model()
-
-        base_where_domain = SQL()
+        domain = filter_domain or []
         if self.ids:
-            base_where_domain = SQL("WHERE id in %s", tuple(self.ids))
-
-        where_clause = SQL()
-        if filter_domain:
-            query = self.with_context(active_test=False)._where_calc(filter_domain or [])
-            where_clause = query.where_clause
-            if where_clause:
-                where_clause = SQL(where_clause.code.replace(query.table, "article_perms"), *where_clause.params)
-                where_clause = SQL('WHERE %s', where_clause)
-
-        return dict(self.env.execute_query(SQL('''
-    WITH RECURSIVE article_perms as (
-        SELECT id, id as article_id, parent_id, internal_permission, is_desynchronized
-          FROM knowledge_article
-          %s
-         UNION
-        SELECT parents.id, perms.article_id, parents.parent_id,
-               COALESCE(perms.internal_permission, parents.internal_permission),
-               perms.is_desynchronized
-          FROM knowledge_article parents
-    INNER JOIN article_perms perms
-            ON perms.parent_id=parents.id
-               AND perms.is_desynchronized IS NOT TRUE
-               AND perms.internal_permission IS NULL
-    )
-    SELECT article_id, max(internal_permission)
-      FROM article_perms
-        %s
-    GROUP BY article_id
-        ''', base_where_domain, where_clause)))
+            domain = expression.AND([[('id', 'in', self.ids)], domain])
+        query = self.with_context(active_test=False)._where_calc(domain)
+        return dict(self.env.execute_query(query.select(
+            SQL.identifier(query.table, 'id'),
+            self._field_to_sql(query.table, 'inherited_permission', query),
+        )))
 
     @api.model
     def _get_partner_member_permissions(self, partner):
-        """ Retrieve the permission for the given partner for all articles.
+        """ Retrieve the permission for the given partner for all articles,
+        based on its effective memberships (see 'knowledge.article.effective.member').
         The articles can be filtered using the article_ids param.
 
-        The member model is fully flushed before running the request. """
-        self.env['knowledge.article'].flush_model()
-        self.env['knowledge.article.member'].flush_model()
+        The member model is flushed before running the request. """
+        self.env['knowledge.article.member'].flush_model(['permission'])
 
         if self.ids:
-            where_domain = SQL("WHERE id in %s", tuple(self.ids))
+            where_domain = SQL("AND effective_member.article_id IN %s", tuple(self.ids))
         else:
             where_domain = SQL()
 
         return dict(self.env.execute_query(SQL('''
-            WITH RECURSIVE membered_articles AS (
-                -- base case: all articles the partner is member of
-                SELECT a.id,
-                       a.parent_id,
-                       a.is_desynchronized,
-                       m.permission
-                FROM knowledge_article AS a
-                     JOIN knowledge_article_member AS m ON a.id = m.article_id
-                WHERE m.partner_id = %(partner_id)s
-
-                UNION ALL
-                -- recurse into each child, that is not desync, and the partner is not a member of,
-                -- to propagate the member permission
-                SELECT a.id,
-                       a.parent_id,
-                       a.is_desynchronized,
-                       m.permission
-                FROM membered_articles AS m
-                     JOIN knowledge_article AS a ON m.id = a.parent_id
-                WHERE a.is_desynchronized IS NOT TRUE
-                  AND NOT EXISTS (SELECT 1
-                                  FROM knowledge_article_member AS mm
-                                  WHERE mm.article_id = a.id
-                                    AND mm.partner_id = %(partner_id)s))
-            SELECT id AS article_id, permission
-            FROM membered_articles
-            %(where_domain)s
+            SELECT effective_member.article_id, member.permission
+              FROM knowledge_article_effective_member AS effective_member
+              JOIN knowledge_article_member AS member ON member.id = effective_member.member_id
+             WHERE effective_member.partner_id = %(partner_id)s
+             %(where_domain)s
             ''',
             partner_id=partner.id,
             where_domain=where_domain,
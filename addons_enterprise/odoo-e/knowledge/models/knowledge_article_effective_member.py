@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models
+from odoo.tools import SQL, create_index
+
+
+class ArticleEffectiveMember(models.Model):
+    """ Membership applying to an article for a partner: the membership of the
+    partner on the article itself or, if none, on its closest ancestor, without
+    going past desynchronized articles. The effective member permission of the
+    partner on the article is the permission of that membership.
+
+    Maintained whenever the hierarchy, the synchronization or the members of
+    the articles change (see '_refresh'), it replaces the recursive walk of the
+    hierarchy when computing the permissions of the current user. """
+    _name = 'knowledge.article.effective.member'
+    _description = 'Article Effective Member'
+    _log_access = False
+
+    article_id = fields.Many2one(
+        'knowledge.article', 'Article',
+        ondelete='cascade', readonly=True, required=True)
+    partner_id = fields.Many2one(
+        'res.partner', 'Partner',
+        ondelete='cascade', readonly=True, required=True)
+    member_id = fields.Many2one(
+        'knowledge.article.member', 'Member',
+        index=True, ondelete='cascade', readonly=True, required=True)
+
+    _sql_constraints = [
+        ('unique_article_partner',
+         'unique(article_id, partner_id)',
+         'A partner has only one effective membership per article.')
+    ]
+
+    def init(self):
+        super().init()
+        create_index(
+            self.env.cr,
+            indexname='knowledge_article_effective_member_partner_id_article_id_idx',
+            tablename=self._table,
+            expressions=['partner_id', 'article_id'],
+        )
+        self._rebuild()
+
+    @api.model
+    def _rebuild(self):
+        """ Recomputes the effective memberships of all the articles. """
+        self._flush_hierarchy()
+        self.env.cr.execute(SQL("DELETE FROM %s", SQL.identifier(self._table)))
+        self._insert_memberships(SQL("TRUE"))
+
+    @api.model
+    def _refresh(self, articles, partners=None):
+        """ Recomputes the effective memberships of the given articles and of
+        all their descendants, after their parent, their synchronization or
+        their members changed.
+
+        :param <knowledge.article> articles: articles whose sub-trees are updated;
+        :param <res.partner> partners: if given, only the memberships of those
+          partners are updated;
+        """
+        if not articles or (partners is not None and not partners):
+            return
+
+        self._flush_hierarchy()
+        # Literal prefixes, as in child_of domains, so that the index on parent_path is used
+        self.env.cr.execute(SQL("SELECT parent_path FROM knowledge_article WHERE id = ANY(%s)", articles.ids))
+        subtree_paths = []
+        # sorted, the sub-trees of the articles follow them: the articles within an already refreshed sub-tree are skipped
+        for parent_path in sorted(parent_path for parent_path, in self.env.cr.fetchall()):
+            if not subtree_paths or not parent_path.startswith(subtree_paths[-1]):
+                subtree_paths.append(parent_path)
+        if not subtree_paths:
+            return
+        where_sql = SQL("(%s)", SQL(" OR ").join(
+            SQL("knowledge_article.parent_path LIKE %s", f"{parent_path}%")
+            for parent_path in subtree_paths
+        ))
+        partner_ids = partners.ids if partners is not None else None
+        self.env.cr.execute(SQL(
+            """
+                DELETE FROM knowledge_article_effective_member AS effective_member
+                      USING knowledge_article
+                      WHERE knowledge_article.id = effective_member.article_id
+                        AND %(where_sql)s
+                        AND %(partner_sql)s
+            """,
+            where_sql=where_sql,
+            partner_sql=SQL("effective_member.partner_id = ANY(%s)", partner_ids) if partner_ids is not None else SQL("TRUE"),
+        ))
+        self._insert_memberships(where_sql, partner_ids=partner_ids)
+
+    @api.model
+    def _flush_hierarchy(self):
+        self.env['knowledge.article'].flush_model(['parent_id', 'is_desynchronized'])
+        self.env['knowledge.article.member'].flush_model(['article_id', 'partner_id'])
+
+    @api.model
+    def _insert_memberships(self, where_sql, partner_ids=None):
+        """ Inserts the effective memberships of the articles matching where_sql,
+        restricted to the given partners if any. """
+        partner_sql = SQL("TRUE")
+        if partner_ids is not None:
+            partner_sql = SQL("knowledge_article_member.partner_id = ANY(%s)", partner_ids)
+        self.env.cr.execute(SQL(
+            """
+                WITH RECURSIVE article_hierarchy AS (
+                    SELECT knowledge_article.id AS article_id,
+                           knowledge_article.id AS ancestor_id,
+                           knowledge_article.parent_id,
+                           knowledge_article.is_desynchronized,
+                           0 AS level
+                      FROM knowledge_article
+                     WHERE %(where_sql)s
+
+                     UNION ALL
+                    -- go up the ancestors, stopping at the desynchronized articles
+                    SELECT article_hierarchy.article_id,
+                           parent.id,
+                           parent.parent_id,
+                           parent.is_desynchronized,
+                           article_hierarchy.level + 1
+                      FROM article_hierarchy
+                      JOIN knowledge_article AS parent
+                        ON parent.id = article_hierarchy.parent_id
+                     WHERE article_hierarchy.is_desynchronized IS NOT TRUE
+                )
+                INSERT INTO knowledge_article_effective_member (article_id, partner_id, member_id)
+                SELECT DISTINCT ON (article_hierarchy.article_id, knowledge_article_member.partner_id)
+                       article_hierarchy.article_id,
+                       knowledge_article_member.partner_id,
+                       knowledge_article_member.id
+                  FROM article_hierarchy
+                  JOIN knowledge_article_member
+                    ON knowledge_article_member.article_id = article_hierarchy.ancestor_id
+                 WHERE %(partner_sql)s
+              ORDER BY article_hierarchy.article_id, knowledge_article_member.partner_id, article_hierarchy.level
+            """,
+            where_sql=where_sql,
+            partner_sql=partner_sql,
+        ))
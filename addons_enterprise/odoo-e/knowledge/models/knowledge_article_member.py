@@ -76,11 +76,29 @@ class ArticleMember(models.Model):
                       article.display_name)
                 )
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        members = super().create(vals_list)
+        self.env['knowledge.article.effective.member']._refresh(members.article_id, members.partner_id)
+        return members
+
     def write(self, vals):
         """ Whatever rights, avoid any attempt at privilege escalation. """
         if ('article_id' in vals or 'partner_id' in vals) and not self.env.is_admin():
             raise AccessError(_("Can not update the article or partner of a member."))
-        return super().write(vals)
+        if 'article_id' not in vals and 'partner_id' not in vals:
+            return super().write(vals)
+
+        articles, partners = self.article_id, self.partner_id
+        result = super().write(vals)
+        self.env['knowledge.article.effective.member']._refresh(articles | self.article_id, partners | self.partner_id)
+        return result
+
+    def unlink(self):
+        articles, partners = self.article_id, self.partner_id
+        result = super().unlink()
+        self.env['knowledge.article.effective.member']._refresh(articles, partners)
+        return result
 
     @api.ondelete(at_uninstall=False)
     def _unlink_except_no_writer(self):
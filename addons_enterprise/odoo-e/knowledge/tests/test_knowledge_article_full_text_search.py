@@ -387,3 +387,26 @@ class TestKnowledgeArticleFullTextSearch(KnowledgeCommon):
             'is_user_favorite': False,
             'root_article_id': (self.workspace_article_hidden.id, '📄 HR')
         }])
+
+    @users('admin')
+    def test_get_user_sorted_articles_update(self):
+        """ Check that the search method uses the current title and body of the
+            articles, as their documents are stored. """
+        Article = self.env['knowledge.article']
+        article = self.workspace_article_hidden.with_env(self.env)
+        article.write({
+            'name': 'Human Resources',
+            'body': Markup('<p>The company has 60 wonderful employees</p>'),
+        })
+        self.assertNotIn(article.id, [result['id'] for result in Article.get_user_sorted_articles('amazing', hidden_mode=True)])
+        self.assertEqual(Article.get_user_sorted_articles('wonderful', hidden_mode=True), [{
+            'id': article.id,
+            'icon': False,
+            'name': 'Human Resources',
+            'headline': 'company has 60 <strong>wonderful</strong> employees',
+            'is_user_favorite': False,
+            'root_article_id': (article.id, '📄 Human Resources')
+        }])
+        self.assertEqual(
+            [result['id'] for result in Article.get_user_sorted_articles('Human', hidden_mode=True)],
+            [article.id])
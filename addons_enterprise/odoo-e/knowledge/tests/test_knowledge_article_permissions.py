@@ -252,6 +252,63 @@ class TestKnowledgeArticlePermissionsTools(KnowledgeArticlePermissionsCase):
             self.assertEqual(child.inherited_permission, 'read', 'Permission: lowering permission should lower the permission of the children')
             self.assertEqual(child.inherited_permission_parent_id, writable_as1, 'Permission: lowering permission should make the children inherit the permission from this article')
 
+    def assertEffectiveMembers(self, msg=None):
+        """ Check the maintained effective memberships of all articles match the
+        ones found by walking the hierarchy (see '_get_article_member_permissions'). """
+        articles = self.env['knowledge.article'].sudo().with_context(active_test=False).search([])
+        expected = {
+            (article_id, partner_id): values['member_id']
+            for article_id, members in articles._get_article_member_permissions().items()
+            for partner_id, values in members.items()
+            if partner_id
+        }
+        effective_members = self.env['knowledge.article.effective.member'].sudo().search([])
+        self.assertEqual(
+            {(effective_member.article_id.id, effective_member.partner_id.id): effective_member.member_id.id
+             for effective_member in effective_members},
+            expected, msg)
+
+    @mute_logger('odoo.addons.base.models.ir_rule', 'odoo.models.unlink')
+    def test_effective_members(self):
+        """ Effective memberships are updated when moving articles, desynchronizing
+        them, adding or removing members. """
+        self.assertEffectiveMembers('Effective members: should be computed for existing articles')
+
+        # move a sub-tree under an article having members
+        writable = self.article_write_contents[2]
+        readable_root = self.article_roots[1]
+        children = self.article_write_contents_children
+        writable.move_to(parent_id=readable_root.id)
+        self.assertEffectiveMembers('Effective members: moved articles should inherit members of their new parent')
+        self.assertEqual(
+            children._get_partner_member_permissions(self.partner_employee_manager),
+            dict.fromkeys(children.ids, 'write'))
+
+        # add a member, then remove an inherited one: desynchronizes the article
+        writable._add_members(self.partner_employee2, 'write')
+        self.assertEffectiveMembers('Effective members: new members should apply to the children')
+        manager_member = readable_root.article_member_ids.filtered(lambda m: m.partner_id == self.partner_employee_manager)
+        writable._remove_member(manager_member)
+        self.assertTrue(writable.is_desynchronized)
+        self.assertEffectiveMembers('Effective members: desynchronized articles should not inherit members')
+        self.assertFalse(children._get_partner_member_permissions(self.partner_employee_manager))
+
+        # update then remove a member
+        portal_member = writable.article_member_ids.filtered(lambda m: m.partner_id == self.partner_portal)
+        writable._set_member_permission(portal_member, 'write')
+        self.assertEqual(
+            children._get_partner_member_permissions(self.partner_portal),
+            dict.fromkeys(children.ids, 'write'))
+        writable._remove_member(portal_member)
+        self.assertEffectiveMembers('Effective members: removed members should not apply anymore')
+        self.assertFalse(children._get_partner_member_permissions(self.partner_portal))
+
+        # resynchronize then rebuild from scratch
+        writable.restore_article_access()
+        self.assertEffectiveMembers('Effective members: resynchronized articles should inherit members again')
+        self.env['knowledge.article.effective.member']._rebuild()
+        self.assertEffectiveMembers()
+
     @mute_logger('odoo.addons.base.models.ir_rule', 'odoo.models.unlink')
     @users('employee')
     def test_remove_member_inherited_rights(self):
@@ -1,13 +1,50 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
-from odoo import models
+from collections import defaultdict
+
+from odoo import api, models, tools
 from odoo.tools import OrderedSet
 
 
+# Fields of the BoMs and their lines the MPS explosion graph depends on
+MPS_GRAPH_BOM_FIELDS = {
+    'active', 'type', 'company_id', 'sequence', 'product_tmpl_id', 'product_id', 'product_qty', 'product_uom_id', 'bom_line_ids',
+}
+MPS_GRAPH_BOM_LINE_FIELDS = {
+    'bom_id', 'product_id', 'product_qty', 'product_uom_id', 'bom_product_template_attribute_value_ids',
+}
+
+
 class MrpBom(models.Model):
     _inherit = 'mrp.bom'
 
+    def init(self):
+        super().init()
+        # Version of the MPS explosion graph, in the keys of its cache (see _get_mps_explosion_graph): a single row
+        # updated by the transactions changing the graph, with values of a sequence, never reused even if rolled back.
+        self.env.cr.execute("""
+            CREATE SEQUENCE IF NOT EXISTS mrp_mps_explosion_graph_version;
+            CREATE TABLE IF NOT EXISTS mrp_mps_explosion_graph_state (version bigint NOT NULL);
+            INSERT INTO mrp_mps_explosion_graph_state (version)
+                 SELECT nextval('mrp_mps_explosion_graph_version')
+                  WHERE NOT EXISTS (SELECT 1 FROM mrp_mps_explosion_graph_state);
+        """)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self._invalidate_mps_explosion_graph()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if MPS_GRAPH_BOM_FIELDS.intersection(vals):
+            self._invalidate_mps_explosion_graph()
+        return super().write(vals)
+
+    def unlink(self):
+        self._invalidate_mps_explosion_graph()
+        return super().unlink()
+
     def action_open_mps_view(self):
         self.ensure_one()
         all_boms = self._get_child_boms()
@@ -27,3 +64,99 @@ class MrpBom(models.Model):
         if unknown_boms:
             return self + unknown_boms._get_child_boms(checked_ids)
         return self
+
+    @api.model
+    def _invalidate_mps_explosion_graph(self):
+        """ Makes the next calls to _get_mps_explosion_graph recompute it, without clearing the other caches of the registry.
+        The graph is cached per version, and the version is changed in the same transaction as the graph: it is used by
+        the current transaction right away, and by the other ones once committed, when their snapshot includes the change.
+        The transactions changing the graph at the same time conflict on the version: one of them is retried.
+        """
+        self.env.cr.execute("UPDATE mrp_mps_explosion_graph_state SET version = nextval('mrp_mps_explosion_graph_version')")
+
+    @api.model
+    def _get_mps_explosion_graph(self):
+        """ Return the BoM structure used by the Master Production Schedule, as product ids. It is cached until a BoM,
+        a BoM line or a variant of a product having a BoM is changed in a way impacting it.
+        - components: {product_id: ((component_id, ratio), ...)}, one item by line of the BoM found for the product
+        (see _bom_find), the ratio being the component quantity needed to produce one unit of the product.
+        - levels: {product_id: level}, the level of a product being greater than the one of all the products using it
+        in their BoM, directly or not. Products not in it are at level 0.
+        - used_in: {product_id: product_ids}, the products having a BoM using the product as component.
+        - uses: {product_id: product_ids}, the components of any BoM of the product's template that are not skipped for it.
+        """
+        self.env.cr.execute("SELECT version FROM mrp_mps_explosion_graph_state")
+        return self._compute_mps_explosion_graph(self.env.cr.fetchone()[0])
+
+    @api.model
+    @tools.ormcache('version', 'tuple(self.env.companies.ids)', 'self.env.context.get("default_company_id")')
+    def _compute_mps_explosion_graph(self, version):
+        all_boms = self.search([])
+        used_in = defaultdict(set)
+        uses = defaultdict(set)
+        products = self.env['product.product']
+        for bom in all_boms:
+            bom_products = bom.product_id | bom.product_tmpl_id.product_variant_ids
+            products |= bom_products
+            for line in bom.bom_line_ids:
+                used_in[line.product_id.id].update(bom_products.ids)
+                for product in bom_products:
+                    if not line._skip_bom_line(product):
+                        uses[product.id].add(line.product_id.id)
+
+        components = {}
+        bom_by_product = self._bom_find(products)
+        for product in products:
+            product_bom = bom_by_product.get(product)
+            if not product_bom:
+                continue
+            bom_qty = product_bom.product_uom_id._compute_quantity(product_bom.product_qty, product_bom.product_tmpl_id.uom_id)
+            components[product.id] = tuple(
+                (line.product_id.id, line.product_uom_id._compute_quantity(line.product_qty, line.product_id.uom_id) / bom_qty)
+                for line in product_bom.bom_line_ids
+                if not line._skip_bom_line(product)
+            )
+
+        # Low-level codes: the products are leveled in a topological order of the BoM graph.
+        parent_count = defaultdict(int)
+        for product_components in components.values():
+            for component_id in {component_id for component_id, dummy in product_components}:
+                parent_count[component_id] += 1
+        levels = {}
+        current_level_ids = [product_id for product_id in components if not parent_count[product_id]]
+        level = 0
+        while current_level_ids:
+            next_level_ids = []
+            for product_id in current_level_ids:
+                levels[product_id] = level
+                for component_id in {component_id for component_id, dummy in components.get(product_id, ())}:
+                    parent_count[component_id] -= 1
+                    if not parent_count[component_id]:
+                        next_level_ids.append(component_id)
+            current_level_ids = next_level_ids
+            level += 1
+
+        return {
+            'components': components,
+            'levels': levels,
+            'used_in': {product_id: frozenset(ids) for product_id, ids in used_in.items()},
+            'uses': {product_id: frozenset(ids) for product_id, ids in uses.items()},
+        }
+
+
+class MrpBomLine(models.Model):
+    _inherit = 'mrp.bom.line'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env['mrp.bom']._invalidate_mps_explosion_graph()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if MPS_GRAPH_BOM_LINE_FIELDS.intersection(vals):
+            self.env['mrp.bom']._invalidate_mps_explosion_graph()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['mrp.bom']._invalidate_mps_explosion_graph()
+        return super().unlink()
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
+from bisect import bisect_left
 from collections import defaultdict, namedtuple
 from dateutil.relativedelta import relativedelta
 from math import log10
@@ -10,7 +11,6 @@ from odoo.exceptions import ValidationError
 from odoo.tools.date_utils import add, subtract
 from odoo.tools.float_utils import float_round, float_compare
 from odoo.osv.expression import OR, AND, FALSE_DOMAIN
-from collections import OrderedDict
 
 
 class MrpProductionSchedule(models.Model):
@@ -468,6 +468,12 @@ class MrpProductionSchedule(models.Model):
         # order to compute the schedule state only once.
         indirect_demand_order = schedules_to_compute._get_indirect_demand_order(indirect_demand_trees)
         demand_qty_dict = defaultdict(lambda: defaultdict(float))
+        date_stops = [date_stop for dummy, date_stop in date_range]
+        # The quantities available are computed at once for all the products of a warehouse
+        qty_available_by_key = {}
+        for warehouse, warehouse_schedules in schedules_to_compute.grouped('warehouse_id').items():
+            for product in warehouse_schedules.product_id.with_context(warehouse_id=warehouse.id):
+                qty_available_by_key[product, warehouse] = product.qty_available
         incoming_qty, incoming_qty_done = self._get_incoming_qty(date_range)
         outgoing_qty, outgoing_qty_done = self._get_outgoing_qty(date_range)
         dummy, outgoing_qty_year_minus_1 = self._get_outgoing_qty(date_range_year_minus_1)
@@ -501,18 +507,18 @@ class MrpProductionSchedule(models.Model):
                 production_schedule_state['precision_digits'] = precision_digits
                 production_schedule_state['forecast_ids'] = []
 
-            starting_inventory_qty = production_schedule.product_id.with_context(warehouse_id=production_schedule.warehouse_id.id).qty_available
+            starting_inventory_qty = qty_available_by_key[production_schedule.product_id, production_schedule.warehouse_id]
             if len(date_range):
                 starting_inventory_qty -= incoming_qty_done.get((date_range[0], production_schedule.product_id, production_schedule.warehouse_id), 0.0)
                 starting_inventory_qty += outgoing_qty_done.get((date_range[0], production_schedule.product_id, production_schedule.warehouse_id), 0.0)
 
+            forecasts_by_period = production_schedule._get_forecasts_by_period(date_range)
             for index, (date_start, date_stop) in enumerate(date_range):
                 forecast_values = {}
                 key = ((date_start, date_stop), production_schedule.product_id, production_schedule.warehouse_id)
                 key_y_1 = (date_range_year_minus_1[index], *key[1:])
                 key_y_2 = (date_range_year_minus_2[index], *key[1:])
-                existing_forecasts = production_schedule.forecast_ids.filtered(lambda p: p.date >= date_start and p.date <= date_stop and
-                                                                                         (p.forecast_qty or p.replenish_qty or p.procurement_launched or p.replenish_qty_updated))
+                existing_forecasts = forecasts_by_period[index].filtered(lambda p: p.forecast_qty or p.replenish_qty or p.procurement_launched or p.replenish_qty_updated)
                 if production_schedule in self:
                     forecast_values['date_start'] = date_start
                     forecast_values['date_stop'] = date_stop
@@ -549,13 +555,13 @@ class MrpProductionSchedule(models.Model):
                     if demand_qty_dict.get(((date_start, date_stop), production_schedule.product_id, production_schedule.warehouse_id), False):
                         for (parent_date, parent_quantity) in demand_qty_dict[(date_start, date_stop), production_schedule.product_id, production_schedule.warehouse_id].items():
                             related_date = max(subtract(parent_date, days=lead_time_ignore_components), fields.Date.today())
-                            index = next(i for i, (dstart, dstop) in enumerate(date_range) if related_date <= dstop)
+                            index = bisect_left(date_stops, related_date)
                             related_key = (date_range[index], product, production_schedule.warehouse_id)
                             demand_qty_dict[related_key][related_date] += ratio * (parent_quantity - forecast_values['starting_inventory_qty'])
                             subproduct_indirect_demand += ratio * (parent_quantity - forecast_values['starting_inventory_qty'])
                     if float_compare((ratio * forecast_values['replenish_qty']), subproduct_indirect_demand, precision_rounding=min(rounding, product.uom_id.rounding)) != 0:
                         related_date = max(subtract(date_start, days=lead_time_ignore_components), fields.Date.today())
-                        index = next(i for i, (dstart, dstop) in enumerate(date_range) if related_date <= dstop)
+                        index = bisect_left(date_stops, related_date)
                         related_key = (date_range[index], product, production_schedule.warehouse_id)
                         demand_qty_dict[related_key][related_date] += (ratio * forecast_values['replenish_qty']) - subproduct_indirect_demand
 
@@ -581,22 +587,10 @@ class MrpProductionSchedule(models.Model):
         if domain is None:
             domain = []
 
-        def _used_in_bom(products, related_products):
-            """ Bottom up from bom line to finished products in order to get
-            all the finished products that use 'products' as component.
-            """
-            if not products:
-                return related_products
-            boms = products.bom_line_ids.mapped('bom_id')
-            products = boms.mapped('product_id') | boms.mapped('product_tmpl_id.product_variant_ids')
-            products -= related_products
-            related_products |= products
-            return _used_in_bom(products, related_products)
-
         supplying_mps = self.env['mrp.production.schedule'].search(
             AND([domain, [
                 ('warehouse_id', 'in', self.mapped('warehouse_id').ids),
-                ('product_id', 'in', _used_in_bom(self.mapped('product_id'), self.env['product.product']).ids)
+                ('product_id', 'in', self._get_bom_related_product_ids('used_in'))
             ]]))
 
         return supplying_mps
@@ -609,26 +603,30 @@ class MrpProductionSchedule(models.Model):
         if domain is None:
             domain = []
 
-        def _use_boms(products, related_products):
-            """ Explore bom line from products's BoMs in order to get components
-            used.
-            """
-            if not products:
-                return related_products
-            components = products.mapped(lambda product: product.bom_ids.bom_line_ids.filtered(lambda line: not line._skip_bom_line(product)).mapped('product_id'))
-
-            components -= related_products
-            related_products |= components
-            return _use_boms(components, related_products)
-
         supplied_mps = self.env['mrp.production.schedule'].search(
             AND([domain, [
                 ('warehouse_id', 'in', self.mapped('warehouse_id').ids),
-                ('product_id', 'in', _use_boms(self.mapped('product_id'), self.env['product.product']).ids)
+                ('product_id', 'in', self._get_bom_related_product_ids('uses'))
             ]]))
 
         return supplied_mps
 
+    def _get_bom_related_product_ids(self, relation):
+        """ Return the ids of the products related, at any BoM level, to the
+        products of self in the MPS explosion graph.
+
+        :param relation: 'used_in' for the finished products using the products
+        of self as (sub-)component, 'uses' for their (sub-)components.
+        """
+        related_ids_by_product = self.env['mrp.bom']._get_mps_explosion_graph()[relation]
+        related_ids = set()
+        product_ids = set(self.product_id.ids)
+        while product_ids:
+            product_ids = set().union(*(related_ids_by_product.get(product_id, ()) for product_id in product_ids))
+            product_ids -= related_ids
+            related_ids |= product_ids
+        return list(related_ids)
+
     def get_impacted_schedule(self, domain=False):
         """ When the user modify the demand forecast on a schedule. The new
         replenish quantity is computed from schedules that use the product in
@@ -790,11 +788,12 @@ class MrpProductionSchedule(models.Model):
         forecasts_state = defaultdict(list)
         for production_schedule in self:
             forecast_values = production_schedule_states[production_schedule.id]['forecast_ids']
+            forecasts_by_period = production_schedule._get_forecasts_by_period(date_range)
             forced_replenish = True
             for index, (date_start, date_stop) in enumerate(date_range):
                 forecast_state = {}
                 forecast_value = forecast_values[index]
-                existing_forecasts = production_schedule.forecast_ids.filtered(lambda p: p.date >= date_start and p.date <= date_stop)
+                existing_forecasts = forecasts_by_period[index]
                 procurement_launched = any(existing_forecasts.mapped('procurement_launched'))
 
                 replenish_qty = forecast_value['replenish_qty']
@@ -825,6 +824,19 @@ class MrpProductionSchedule(models.Model):
                 forecasts_state[production_schedule.id].append(forecast_state)
         return forecasts_state
 
+    def _get_forecasts_by_period(self, date_range):
+        """ Return the forecasts of self, as a list containing the forecasts of
+        each period of date_range.
+        """
+        self.ensure_one()
+        date_stops = [date_stop for dummy, date_stop in date_range]
+        forecast_ids_by_period = [[] for dummy in date_range]
+        for forecast in self.forecast_ids:
+            index = bisect_left(date_stops, forecast.date)
+            if index < len(date_range) and date_range[index][0] <= forecast.date:
+                forecast_ids_by_period[index].append(forecast.id)
+        return [self.forecast_ids.browse(forecast_ids) for forecast_ids in forecast_ids_by_period]
+
     def _get_lead_times(self):
         """ Get the lead time for each product in self. The lead times are
         based on rules lead times + produce delay or supplier info delay.
@@ -865,23 +877,18 @@ class MrpProductionSchedule(models.Model):
         incoming_qty_done = defaultdict(float)
         after_date = date_range[0][0]
         before_date = date_range[-1][1]
+        date_stops = [date_stop for dummy, date_stop in date_range]
         # Get quantity in RFQ
         rfq_domain = self._get_rfq_domain(after_date, before_date)
         rfq_lines_date_planned = self._get_rfq_and_planned_date(rfq_domain, order='date_planned')
-        rfq_lines_date_planned = sorted(rfq_lines_date_planned, key=lambda i: i[1])
-        index = 0
         for (line, date_planned) in rfq_lines_date_planned:
             # There are cases when we want to consider rfq_lines where their date_planned occurs before the after_date
             # if lead times make their stock arrive at a relevant time. Therefore we need to ignore the lines that have
             # date_planned + lead time < after_date
-            if date_planned < after_date:
+            if date_planned < after_date or date_planned > before_date:
                 continue
-            # Skip to the next time range if the planned date is not in the
-            # current time interval.
-
-            while not (date_range[index][0] <= date_planned and
-                       date_range[index][1] >= date_planned):
-                index += 1
+            # Find the time range of the planned date.
+            index = bisect_left(date_stops, date_planned)
             quantity = line.product_uom._compute_quantity(line.product_qty, line.product_id.uom_id)
             incoming_qty[date_range[index], line.product_id, line.order_id.picking_type_id.warehouse_id] += quantity
 
@@ -890,15 +897,11 @@ class MrpProductionSchedule(models.Model):
         # read_group with a group by location.
         domain_moves = self._get_moves_domain(after_date, before_date, 'incoming')
         stock_moves_and_date = self._get_moves_and_date(domain_moves)
-        stock_moves_and_date = sorted(stock_moves_and_date, key=lambda m: m[1])
-        index = 0
         for (move, date) in stock_moves_and_date:
             if date < after_date or date > before_date:
                 continue
-            # Skip to the next time range if the planned date is not in the
-            # current time interval.
-            while not (date_range[index][0] <= date and date_range[index][1] >= date):
-                index += 1
+            # Find the time range of the move date.
+            index = bisect_left(date_stops, date)
             key = (date_range[index], move.product_id, move.location_dest_id.warehouse_id)
             if move.state == 'done':
                 incoming_qty_done[key] += move.product_qty
@@ -913,35 +916,12 @@ class MrpProductionSchedule(models.Model):
         by a record before it. The purpose of this function is to define the
         states of multiple schedules only once by schedule and avoid to
         recompute a state because its indirect demand was a depend from another
-        schedule.
+        schedule. The schedules are sorted on the level of their product in the
+        MPS explosion graph, which is greater than the one of all the products
+        using it in their BoM.
         """
-        product_ids = self.mapped('product_id')
-
-        def _get_pre_order(node):
-            order_list = []
-            if node.product in product_ids:
-                order_list.append(node.product)
-            for child in node.children:
-                order_list += _get_pre_order(child)
-            return order_list
-
-        product_order_by_tree = []
-        for node in indirect_demand_trees:
-            product_order_by_tree += _get_pre_order(node)
-
-        product_order = OrderedDict()
-        for product in reversed(product_order_by_tree):
-            if product not in product_order:
-                product_order[product] = True
-
-        mps_order_by_product = defaultdict(lambda: self.env['mrp.production.schedule'])
-        for mps in self:
-            mps_order_by_product[mps.product_id] |= mps
-
-        mps_order = self.env['mrp.production.schedule']
-        for product in reversed(product_order.keys()):
-            mps_order |= mps_order_by_product[product]
-        return mps_order
+        level_by_product = self.env['mrp.bom']._get_mps_explosion_graph()['levels']
+        return self.sorted(lambda mps: level_by_product.get(mps.product_id.id, 0))
 
     def _get_indirect_demand_ratio_mps(self, indirect_demand_trees):
         """ Return {(warehouse, product): {product: ratio}} dict containing the indirect ratio
@@ -985,7 +965,7 @@ class MrpProductionSchedule(models.Model):
         indirect demand and on lowest leaves the schedules that are the most
         influenced by the others.
         """
-        bom_by_product = self.env['mrp.bom']._bom_find(self.product_id)
+        components_by_product = self.env['mrp.bom']._get_mps_explosion_graph()['components']
 
         Node = namedtuple('Node', ['product', 'ratio', 'children'])
         indirect_demand_trees = {}
@@ -997,19 +977,12 @@ class MrpProductionSchedule(models.Model):
                 return Node(product_tree.product, ratio, product_tree.children)
 
             product_tree = Node(product, ratio, [])
-            product_bom = bom_by_product.get(product)
-            if product not in bom_by_product and not product_bom:
-                product_bom = self.env['mrp.bom']._bom_find(product)[product]
-            for line in product_bom.bom_line_ids:
-                if line._skip_bom_line(product):
-                    continue
-                line_qty = line.product_uom_id._compute_quantity(line.product_qty, line.product_id.uom_id)
-                bom_qty = line.bom_id.product_uom_id._compute_quantity(line.bom_id.product_qty, line.bom_id.product_tmpl_id.uom_id)
-                ratio = line_qty / bom_qty
-                tree = _get_product_tree(line.product_id, ratio)
+            for component_id, component_ratio in components_by_product.get(product.id, ()):
+                component = self.env['product.product'].browse(component_id)
+                tree = _get_product_tree(component, component_ratio)
                 product_tree.children.append(tree)
-                if line.product_id in indirect_demand_trees:
-                    del indirect_demand_trees[line.product_id]
+                if component in indirect_demand_trees:
+                    del indirect_demand_trees[component]
             product_visited[product] = product_tree
             return product_tree
 
@@ -1106,22 +1079,19 @@ class MrpProductionSchedule(models.Model):
         outgoing_qty_done = defaultdict(float)
         after_date = date_range[0][0]
         before_date = date_range[-1][1]
+        date_stops = [date_stop for dummy, date_stop in date_range]
         # Get quantity on incoming moves
 
         domain_moves = self._get_moves_domain(after_date, before_date, 'outgoing')
         stock_moves_by_date = self._get_moves_and_date(domain_moves)
-        stock_moves_by_date = sorted(stock_moves_by_date, key=lambda m: m[1])
-        index = 0
         for (move, date) in stock_moves_by_date:
             # There are cases when we want to consider moves where their (scheduled) date occurs before the after_date
             # if lead times make their stock delivery at a relevant time. Therefore we need to ignore the lines that have
             # date + lead time < after_date. Similar logic with before_date
             if date < after_date or date > before_date:
                 continue
-            # Skip to the next time range if the planned date is not in the
-            # current time interval.
-            while not (date_range[index][0] <= date and date_range[index][1] >= date):
-                index += 1
+            # Find the time range of the move date.
+            index = bisect_left(date_stops, date)
             key = (date_range[index], move.product_id, move.location_id.warehouse_id)
             if move.state == 'done':
                 outgoing_qty_done[key] += move.product_qty
@@ -1,13 +1,31 @@
 # -*- coding: utf-8 -*-
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
-from odoo import fields, models
+from odoo import api, fields, models
 
 class ProductProduct(models.Model):
     _inherit = 'product.product'
 
     schedule_count = fields.Integer('Schedules', compute='_compute_schedule_count')
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        products = super().create(vals_list)
+        if products.product_tmpl_id.bom_ids:
+            # New variants of a product having a BoM are part of the MPS explosion graph
+            self.env['mrp.bom']._invalidate_mps_explosion_graph()
+        return products
+
+    def write(self, vals):
+        if 'active' in vals and (self.product_tmpl_id.bom_ids or self.bom_line_ids):
+            self.env['mrp.bom']._invalidate_mps_explosion_graph()
+        return super().write(vals)
+
+    def unlink(self):
+        if self.product_tmpl_id.bom_ids or self.bom_line_ids:
+            self.env['mrp.bom']._invalidate_mps_explosion_graph()
+        return super().unlink()
+
     def _compute_schedule_count(self):
         grouped_data = self.env['mrp.production.schedule']._read_group(
             [('product_id', 'in', self.ids)], ['product_id'], ['__count'])
@@ -2,3 +2,4 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 from . import test_mrp_mps
+from . import test_mrp_mps_benchmark
@@ -640,6 +640,34 @@ class TestMpsMps(common.TransactionCase):
         self.assertEqual(sorted(impacted_schedules), sorted((self.mps_table |
             self.mps_wardrobe | self.mps_table_leg | self.mps_screw | self.mps_bolt).ids))
 
+    def test_explosion_graph(self):
+        """ The BoM structure is computed once for all the schedules, and again only after a change of its structure. """
+        graph = self.env['mrp.bom']._get_mps_explosion_graph()
+        self.assertEqual(graph['components'][self.drawer.id], ((self.table_leg.id, 2.0), (self.screw.id, 4.0)))
+        levels = graph['levels']
+        self.assertLess(levels[self.table.id], levels[self.drawer.id])
+        self.assertLess(levels[self.drawer.id], levels[self.table_leg.id])
+        self.assertLess(levels[self.table_leg.id], levels[self.screw.id])
+        self.assertEqual(self.mps._get_indirect_demand_order([])[-2:], self.mps_screw | self.mps_bolt)
+
+        self.assertIs(self.env['mrp.bom']._get_mps_explosion_graph(), graph)
+        self.bom_drawer.code = "Drawer"
+        self.assertIs(self.env['mrp.bom']._get_mps_explosion_graph(), graph, "Only the changes of the BoM structure invalidate it")
+        self.bom_drawer.bom_line_ids.filtered(lambda line: line.product_id == self.screw).product_qty = 8
+        graph = self.env['mrp.bom']._get_mps_explosion_graph()
+        self.assertEqual(graph['components'][self.drawer.id], ((self.table_leg.id, 2.0), (self.screw.id, 8.0)))
+
+        # A change committed by another transaction is seen by the others
+        self.env.flush_all()
+        self.env.registry.enter_test_mode(self.cr)
+        self.addCleanup(self.env.registry.leave_test_mode)
+        with self.env.registry.cursor() as cr:
+            env = self.env(cr=cr)
+            env['mrp.bom'].browse(self.bom_drawer.id).bom_line_ids.filtered(lambda line: line.product_id.id == self.screw.id).product_qty = 6
+        self.env.invalidate_all()
+        graph = self.env['mrp.bom']._get_mps_explosion_graph()
+        self.assertEqual(graph['components'][self.drawer.id], ((self.table_leg.id, 2.0), (self.screw.id, 6.0)))
+
     def test_3_steps(self):
         self.warehouse.manufacture_steps = 'pbm_sam'
         self.table_leg.write({
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import logging
+import time
+
+from odoo.tests import common, tagged
+from odoo.tools.date_utils import add
+
+_logger = logging.getLogger(__name__)
+
+SCHEDULES_COUNT = 1000
+WEEKS_COUNT = 52
+
+
+@tagged('post_install', '-at_install', '-standard', 'mrp_mps_perf')
+class TestMpsViewStatePerf(common.TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """ Spread 1,000 schedules over two warehouses, with some stock and a
+        weekly forecast every four weeks, displayed over 52 weeks. Only run
+        with the 'mrp_mps_perf' tag.
+        """
+        super().setUpClass()
+        cls.env.company.write({
+            'manufacturing_period': 'week',
+            'manufacturing_period_to_display_week': WEEKS_COUNT,
+        })
+        cls.date_range = cls.env.company._get_date_range()
+        cls.warehouse = cls.env['stock.warehouse'].search([('company_id', '=', cls.env.company.id)], limit=1)
+        cls.second_warehouse = cls.env['stock.warehouse'].create({
+            'name': 'Second Warehouse',
+            'code': 'WH02',
+        })
+        warehouses = (cls.warehouse, cls.second_warehouse)
+
+        products = cls.env['product.product'].create([
+            {'name': 'Product %s' % index, 'is_storable': True}
+            for index in range(SCHEDULES_COUNT)
+        ])
+        cls.mps = cls.env['mrp.production.schedule'].create([
+            {'product_id': product.id, 'warehouse_id': warehouses[index % 2].id}
+            for index, product in enumerate(products)
+        ])
+        for index, product in enumerate(products[::10]):
+            for warehouse in warehouses:
+                cls.env['stock.quant']._update_available_quantity(product, warehouse.lot_stock_id, 5 + index % 3)
+        cls.env['mrp.product.forecast'].create([
+            {
+                'production_schedule_id': mps.id,
+                'date': add(date_start, days=index % 7),
+                'forecast_qty': 10.0 + index % 5,
+            }
+            for index, mps in enumerate(cls.mps)
+            for date_start, dummy in cls.date_range[::4]
+        ])
+
+    def _expected_forecast_qty(self, mps):
+        """ Forecasted demand of each period, filtering the forecasts period by period. """
+        return [
+            sum(forecast.forecast_qty for forecast in mps.forecast_ids if date_start <= forecast.date <= date_stop)
+            for date_start, date_stop in self.date_range
+        ]
+
+    def _expected_qty_available(self, mps):
+        """ Quantity available of the product alone, in the warehouse of the schedule. """
+        return self.env['product.product'].with_context(warehouse_id=mps.warehouse_id.id).browse(mps.product_id.id).qty_available
+
+    def test_production_schedule_view_state_perf(self):
+        self.env.invalidate_all()
+        start = time.perf_counter()
+        states = self.mps.get_production_schedule_view_state()
+        elapsed = time.perf_counter() - start
+        _logger.info("MPS view state of %s schedules over %s weeks: %.2fs", SCHEDULES_COUNT, WEEKS_COUNT, elapsed)
+
+        self.assertEqual([state['id'] for state in states], self.mps.ids)
+        for mps, state in zip(self.mps, states):
+            forecasts = state['forecast_ids']
+            self.assertEqual([forecast['forecast_qty'] for forecast in forecasts], self._expected_forecast_qty(mps))
+            self.assertEqual(forecasts[0]['starting_inventory_qty'], self._expected_qty_available(mps))
+
+        # Computing a sample of schedules alone gives the same cells
+        for mps, state in list(zip(self.mps, states))[::100]:
+            self.assertEqual(mps.get_production_schedule_view_state()[0]['forecast_ids'], state['forecast_ids'])
@@ -1,11 +1,14 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
+from bisect import bisect_left
 from collections import defaultdict
 from datetime import date, datetime, timedelta, time
 from dateutil.relativedelta import relativedelta
 import logging
+import psycopg2
 import pytz
 import uuid
 from math import modf, ceil
+from operator import itemgetter
 from random import randint, shuffle
 from werkzeug.urls import url_encode
 
@@ -13,7 +16,7 @@ from odoo import api, fields, models, _
 from odoo.addons.resource.models.utils import Intervals, sum_intervals
 from odoo.exceptions import UserError, AccessError
 from odoo.osv import expression
-from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT, float_utils, format_datetime, SQL
+from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT, create_index, float_utils, format_datetime, SQL
 
 _logger = logging.getLogger(__name__)
 
@@ -142,6 +145,27 @@ class Planning(models.Model):
         ('check_allocated_hours_positive', 'CHECK(allocated_hours >= 0)', 'Allocated hours and allocated time percentage cannot be negative.'),
     ]
 
+    def init(self):
+        super().init()
+        # The overlapping shifts of a resource are found using a GiST index on the period of the shifts. When
+        # available, the btree_gist extension allows to index the resource with it.
+        cr = self.env.cr
+        cr.execute("SELECT 1 FROM pg_extension WHERE extname = 'btree_gist'")
+        if not cr.rowcount:
+            try:
+                with cr.savepoint(flush=False):
+                    cr.execute("CREATE EXTENSION btree_gist")
+            except psycopg2.Error as e:
+                _logger.info("Unable to create the PostgreSQL extension btree_gist, the shifts periods are indexed without their resource: %s", e)
+        cr.execute("SELECT 1 FROM pg_extension WHERE extname = 'btree_gist'")
+        create_index(
+            cr,
+            indexname='planning_slot_resource_id_period_idx',
+            tablename=self._table,
+            expressions=(['resource_id'] if cr.rowcount else []) + ['tsrange(start_datetime, end_datetime)'],
+            method='GIST',
+        )
+
     @api.depends('role_id.color', 'resource_id.color')
     def _compute_color(self):
         for slot in self:
@@ -307,17 +331,18 @@ class Planning(models.Model):
     def _compute_overlap_slot_count(self):
         if all(self._ids):
             self.flush_model(['start_datetime', 'end_datetime', 'resource_id'])
+            # the overlapping shifts are looked up using the period index (see init)
             query = """
-                SELECT S1.id,ARRAY_AGG(DISTINCT S2.id) as conflict_ids FROM
-                    planning_slot S1, planning_slot S2
-                WHERE
-                    S1.start_datetime < S2.end_datetime
-                    AND S1.end_datetime > S2.start_datetime
-                    AND S1.id <> S2.id AND S1.resource_id = S2.resource_id
-                    AND S1.allocated_percentage + S2.allocated_percentage > 100
-                    and S1.id in %s
-                    AND (%s or S2.state = 'published')
-                GROUP BY S1.id;
+                SELECT S1.id, ARRAY_AGG(DISTINCT S2.id) as conflict_ids
+                  FROM planning_slot S1
+                  JOIN planning_slot S2
+                    ON S2.resource_id = S1.resource_id
+                   AND tsrange(S2.start_datetime, S2.end_datetime) && tsrange(S1.start_datetime, S1.end_datetime)
+                   AND S2.id <> S1.id
+                 WHERE S1.id in %s
+                   AND S1.allocated_percentage + S2.allocated_percentage > 100
+                   AND (%s or S2.state = 'published')
+              GROUP BY S1.id;
             """
             self.env.cr.execute(query, (tuple(self.ids), self.env.user.has_group('planning.group_planning_manager')))
             overlap_mapping = dict(self.env.cr.fetchall())
@@ -364,10 +389,9 @@ class Planning(models.Model):
             WHERE EXISTS (
                 SELECT 1
                   FROM planning_slot S2
-                 WHERE S1.id <> S2.id
-                   AND S1.resource_id = S2.resource_id
-                   AND S1.start_datetime < S2.end_datetime
-                   AND S1.end_datetime > S2.start_datetime
+                 WHERE S2.resource_id = S1.resource_id
+                   AND tsrange(S2.start_datetime, S2.end_datetime) && tsrange(S1.start_datetime, S1.end_datetime)
+                   AND S1.id <> S2.id
                    AND S1.allocated_percentage + S2.allocated_percentage > 100
             )
         )""")
@@ -1131,6 +1155,14 @@ class Planning(models.Model):
             for i in range(delta_days)
         ]
 
+        hours_per_day_per_resource_id = {
+            resource.id: resource.calendar_id.hours_per_day if resource.calendar_id else resource.company_id.resource_calendar_id.hours_per_day
+            for resource in resources
+        }
+
+        # The shifts are assigned in memory, then written in batch.
+        shifts_per_assignment = defaultdict(lambda: PlanningShift)
+
         def find_resource(shift):
             shift_intervals = Intervals([(
                 shift.start_datetime.astimezone(user_tz),
@@ -1140,21 +1172,22 @@ class Planning(models.Model):
             for resources_dict in [resource_ids_per_default_role_id, resource_ids_per_role_id]:
                 resource_ids = resources_dict[shift.role_id.id]
                 shuffle(resource_ids)
-                for resource in Resource.browse(resource_ids):
-                    split_shift_intervals = shift_intervals & schedule_intervals_per_resource_id[resource.id]
+                for resource_id in resource_ids:
+                    split_shift_intervals = shift_intervals & schedule_intervals_per_resource_id[resource_id]
                     # If the shift is out of resource's schedule, skip it.
                     if not split_shift_intervals:
                         continue
-                    rate = shift.allocated_hours * 3600 / sum(
+                    work_seconds = sum(
                         round((end - start).total_seconds())
                         for start, end, rec in split_shift_intervals
                     )
+                    rate = shift.allocated_hours * 3600 / work_seconds
                     # Try to add the shift to the timeline.
                     timeline = self._get_new_timeline_if_fits_in(
                         split_shift_intervals,
                         rate,
-                        resource.calendar_id.hours_per_day if resource.calendar_id else resource.company_id.resource_calendar_id.hours_per_day,
-                        timeline_and_worked_hours_per_resource_id[resource.id].copy(),
+                        hours_per_day_per_resource_id[resource_id],
+                        timeline_and_worked_hours_per_resource_id[resource_id],
                         empty_timeline,
                     )
                     # If we got a new timeline (not False), it means the shift fits for the resource
@@ -1162,22 +1195,24 @@ class Planning(models.Model):
                     # If it fits, assign the shift to the resource and update the timeline.
                     # If a timeline is found, the resource can work the allocated_hours set on the shift.
                     # so the allocated_percentage is recomputed based on the working calendar of the
-                    # resource and the allocated_hours set on the shift.
+                    # resource and the allocated_hours set on the shift. As the resources have fixed
+                    # working hours, their work hours over the shift are the ones of split_shift_intervals.
                     if timeline:
-                        original_allocated_hours = shift.allocated_hours
-                        shift.resource_id = resource
-                        timeline_and_worked_hours_per_resource_id[resource.id] = timeline
-                        start_utc = pytz.utc.localize(shift.start_datetime)
-                        end_utc = pytz.utc.localize(shift.end_datetime)
-                        resource_work_intervals, calendar_work_intervals = shift.resource_id \
-                            .filtered('calendar_id') \
-                            ._get_valid_work_intervals(start_utc, end_utc, calendars=shift.company_id.resource_calendar_id)
-                        work_hours = shift._get_working_hours_over_period(start_utc, end_utc, resource_work_intervals, calendar_work_intervals)
-                        shift.allocated_percentage = 100 * original_allocated_hours / work_hours if work_hours else 100
+                        timeline_and_worked_hours_per_resource_id[resource_id] = timeline
+                        work_hours = round(work_seconds / 3600, 2)
+                        allocated_percentage = 100 * shift.allocated_hours / work_hours if work_hours else 100
+                        shifts_per_assignment[resource_id, allocated_percentage] |= shift
                         return True
             return False
 
-        return {"open_shift_assigned": open_shifts.filtered(find_resource).ids}
+        assigned_shifts = open_shifts.filtered(find_resource)
+        for (resource_id, allocated_percentage), shifts in shifts_per_assignment.items():
+            shifts.write({
+                'resource_id': resource_id,
+                'allocated_percentage': allocated_percentage,
+            })
+
+        return {"open_shift_assigned": assigned_shifts.ids}
 
 # A. Represent the resoures shifts and the open shift on a timeline
 #   Legend
@@ -1256,19 +1291,34 @@ class Planning(models.Model):
     def _get_new_timeline_if_fits_in(self, split_shift_intervals, rate, resource_hours_per_day, timeline, empty_timeline):
         if rate > 1:
             return False
+        # Only the values of the days around the shift are needed to check it: the timeline is split around them, and
+        # only their ghost events at 0:00 are added. The first value before these days gives the occupation rate to
+        # start from, and the values after them are not changed by the shift.
+        get_instant = itemgetter(0)
+        window_start = min(start for start, dummy, dummy in split_shift_intervals).astimezone(pytz.utc).replace(tzinfo=None) \
+            + relativedelta(days=-1, hour=0, minute=0, second=0, microsecond=0)
+        window_end = max(end for dummy, end, dummy in split_shift_intervals).astimezone(pytz.utc).replace(tzinfo=None) \
+            + relativedelta(days=3, hour=0, minute=0, second=0, microsecond=0)
+        window_start_index = max(bisect_left(timeline, window_start, key=get_instant) - 1, 0)
+        window_end_index = bisect_left(timeline, window_end, key=get_instant)
+        window_timeline = timeline[window_start_index:window_end_index]
+        window_midnights = empty_timeline[
+            bisect_left(empty_timeline, window_start, key=get_instant):bisect_left(empty_timeline, window_end, key=get_instant)
+        ]
+
         add_midnights = True
         for split_shift_start, split_shift_end, _ in split_shift_intervals:
             start = split_shift_start.astimezone(pytz.utc).replace(tzinfo=None)
             end = split_shift_end.astimezone(pytz.utc).replace(tzinfo=None)
-            increments = self._values_to_increments(timeline) + [(start, rate), (end, -rate)]
+            increments = self._values_to_increments(window_timeline) + [(start, rate), (end, -rate)]
             if add_midnights:
                 # Add ghost events at 0:00 to delimit days. This condition prevents from adding ghost events on each iteration.
-                increments += empty_timeline
+                increments += window_midnights
                 add_midnights = False
-            timeline = self._increments_to_values(increments, check=(start, end, resource_hours_per_day))
-            if not timeline:
+            window_timeline = self._increments_to_values(increments, check=(start, end, resource_hours_per_day))
+            if not window_timeline:
                 return False
-        return timeline
+        return timeline[:window_start_index] + window_timeline + timeline[window_end_index:]
 
     @api.model
     def _increments_to_values(self, increments, check=False):
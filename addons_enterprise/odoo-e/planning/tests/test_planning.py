@@ -587,6 +587,50 @@ class TestPlanning(TestCommonPlanning, MockEmail):
         self.assertEqual(night_shift.allocated_hours, 8, 'The allocated hours should remain the same')
         self.assertEqual(night_shift.allocated_percentage, 100, 'The allocated percentage should be 100% as the resource will work the allocated hours')
 
+    def test_auto_plan_week(self):
+        """ Auto-plan a week of open shifts: each resource is assigned shifts until its days are full, without
+            being assigned overlapping shifts, the other shifts remaining open.
+        """
+        calendar = self.env['resource.calendar'].create({
+            'name': 'Day Calendar',
+            'tz': 'UTC',
+            'hours_per_day': 8.0,
+            'attendance_ids': [
+                (0, 0, {'name': 'Morning ' + str(day), 'dayofweek': str(day), 'hour_from': 8, 'hour_to': 12, 'day_period': 'morning'})
+                for day in range(5)
+            ] + [
+                (0, 0, {'name': 'Afternoon ' + str(day), 'dayofweek': str(day), 'hour_from': 13, 'hour_to': 17, 'day_period': 'afternoon'})
+                for day in range(5)
+            ],
+        })
+        role = self.env['planning.role'].create({'name': 'Cashier'})
+        employees = self.env['hr.employee'].create([{
+            'name': f'Cashier {index}',
+            'tz': 'UTC',
+            'resource_calendar_id': calendar.id,
+            'default_planning_role_id': role.id,
+        } for index in range(2)])
+        week_start = self.random_monday_date
+        open_shifts = self.env['planning.slot'].create([{
+            'start_datetime': week_start + timedelta(days=day, hours=hour_from),
+            'end_datetime': week_start + timedelta(days=day, hours=hour_from + 4),
+            'role_id': role.id,
+        } for day in range(5) for hour_from in (8, 13) for dummy in range(3)])
+        open_shifts.allocated_hours = 4
+
+        assigned_shift_ids = self.env['planning.slot'].with_context(
+            default_start_datetime=week_start,
+            default_end_datetime=week_start + timedelta(days=7),
+        ).auto_plan_ids([('id', 'in', open_shifts.ids)])['open_shift_assigned']
+
+        self.assertEqual(len(assigned_shift_ids), 20, 'Each resource should be assigned a shift per half-day')
+        self.assertEqual(open_shifts.filtered('resource_id').ids, sorted(assigned_shift_ids, key=open_shifts.ids.index))
+        for start_datetime, shifts in open_shifts.grouped('start_datetime').items():
+            assigned_shifts = shifts.filtered('resource_id')
+            self.assertEqual(assigned_shifts.resource_id, employees.resource_id,
+                             f'The shifts starting at {start_datetime} should be assigned to different resources')
+            self.assertEqual(assigned_shifts.mapped('allocated_hours'), [4, 4])
+
     def test_write_multiple_slots(self):
         """ Test that we can write a resource_id on multiple slots at once. """
         slots = self.env['planning.slot'].create([
@@ -0,0 +1,115 @@
+# Part of Odoo. See LICENSE file for full copyright and licensing details
+import logging
+import time
+from datetime import timedelta
+
+from odoo.tests.common import tagged
+
+from .common import TestCommonPlanning
+
+_logger = logging.getLogger(__name__)
+
+RESOURCES_COUNT = 1000
+# days of past shifts of each resource, about one million shifts overall
+HISTORY_DAYS = 1000
+
+
+@tagged('post_install', '-at_install', '-standard', 'planning_perf')
+class TestPlanningOverlapPerf(TestCommonPlanning):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.setUpDates()
+        cls.week_start = cls.random_monday_date
+        cls.week_stop = cls.week_start + timedelta(days=7)
+        cls.resources = cls.env['resource.resource'].create([
+            {'name': 'Resource %s' % index, 'calendar_id': False}
+            for index in range(RESOURCES_COUNT)
+        ])
+
+        # the past shifts are too many to be created through the ORM
+        cls.env.cr.execute(
+            """
+                INSERT INTO planning_slot (
+                    resource_id, company_id, start_datetime, end_datetime,
+                    allocated_hours, allocated_percentage, state, access_token
+                )
+                SELECT resource.id, %(company_id)s, day + INTERVAL '8 hours', day + INTERVAL '16 hours',
+                       8, 100, 'published', md5(resource.id::text || day::text)
+                  FROM unnest(%(resource_ids)s) AS resource(id),
+                       generate_series(%(history_start)s::timestamp, %(history_stop)s::timestamp, INTERVAL '1 day') AS day
+            """,
+            {
+                'company_id': cls.env.company.id,
+                'resource_ids': cls.resources.ids,
+                'history_start': cls.week_start - timedelta(days=HISTORY_DAYS),
+                'history_stop': cls.week_start - timedelta(days=1),
+            },
+        )
+        cls.env.cr.execute("ANALYZE planning_slot")
+
+        # A shift a day for each resource. Some resources get a second shift on Monday, either during their first one
+        # (conflict) or right after it (no conflict, the periods only touch each other).
+        cls.double_booked_resources = cls.resources[::20]
+        extra_shifts = [
+            {
+                'resource_id': resource.id,
+                'start_datetime': cls.week_start + timedelta(hours=start_hour),
+                'end_datetime': cls.week_start + timedelta(hours=start_hour + 4),
+                'allocated_percentage': 100,
+                'state': 'published',
+            }
+            for resource in cls.resources[::10]
+            for start_hour in [12 if resource in cls.double_booked_resources else 16]
+        ]
+        cls.week_slots = cls.env['planning.slot'].create([
+            {
+                'resource_id': resource.id,
+                'start_datetime': cls.week_start + timedelta(days=day, hours=8),
+                'end_datetime': cls.week_start + timedelta(days=day, hours=16),
+                'allocated_percentage': 100,
+                'state': 'published',
+            }
+            for resource in cls.resources
+            for day in range(7)
+        ] + extra_shifts)
+        cls.env.flush_all()
+
+    def _get_expected_conflicts(self):
+        """ Conflicting shifts of the week, compared two by two. """
+        conflicts = {}
+        for slots in self.week_slots.grouped('resource_id').values():
+            for slot in slots:
+                conflicts[slot.id] = {
+                    other.id
+                    for other in slots
+                    if other != slot
+                    and other.start_datetime < slot.end_datetime and slot.start_datetime < other.end_datetime
+                    and slot.allocated_percentage + other.allocated_percentage > 100
+                }
+        return conflicts
+
+    def test_overlap_slot_count_perf(self):
+        expected_conflicts = self._get_expected_conflicts()
+        self.assertEqual(sum(len(conflicts) for conflicts in expected_conflicts.values()), 2 * len(self.double_booked_resources))
+
+        self.env.invalidate_all()
+        start = time.perf_counter()
+        self.week_slots.mapped('overlap_slot_count')
+        compute_time = time.perf_counter() - start
+        self.assertEqual({slot.id: set(slot.conflicting_slot_ids.ids) for slot in self.week_slots}, expected_conflicts)
+
+        start = time.perf_counter()
+        conflicting_slots = self.env['planning.slot'].search([
+            ('start_datetime', '<', self.week_stop),
+            ('end_datetime', '>', self.week_start),
+            ('overlap_slot_count', '>', 0),
+        ])
+        search_time = time.perf_counter() - start
+        self.assertEqual(set(conflicting_slots.ids), {slot_id for slot_id, conflicts in expected_conflicts.items() if conflicts})
+
+        _logger.info(
+            "Conflicts of %s shifts of the week, out of %s shifts: %.2fms to compute, %.2fms to search",
+            len(self.week_slots), RESOURCES_COUNT * HISTORY_DAYS + len(self.week_slots), compute_time * 1000, search_time * 1000,
+        )
@@ -2,6 +2,7 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 import logging
+import time
 from dateutil.relativedelta import relativedelta
 from markupsafe import escape, Markup
 from psycopg2.extensions import TransactionRollbackError
@@ -12,7 +13,7 @@ from odoo import fields, models, _, api, Command, SUPERUSER_ID, modules
 from odoo.exceptions import UserError, ValidationError
 from odoo.tools.float_utils import float_is_zero
 from odoo.osv import expression
-from odoo.tools import config, format_amount, format_list, plaintext2html, split_every, str2bool
+from odoo.tools import SQL, config, format_amount, format_list, plaintext2html, split_every, str2bool
 from odoo.tools.misc import format_date
 
 _logger = logging.getLogger(__name__)
@@ -31,6 +32,15 @@ SUBSCRIPTION_STATES = [
     ('7_upsell', 'Upsell'),  # Quotation or SO upselling a subscription
 ]
 
+# Crons generating the recurring invoices, one per partition of the subscriptions. They can run in different cron workers
+# at the same time, each subscription belonging to a single partition.
+RECURRING_INVOICE_CRON_XMLIDS = (
+    'sale_subscription.account_analytic_cron_for_invoice',
+    'sale_subscription.account_analytic_cron_for_invoice_partition_1',
+    'sale_subscription.account_analytic_cron_for_invoice_partition_2',
+    'sale_subscription.account_analytic_cron_for_invoice_partition_3',
+)
+
 
 class SaleOrder(models.Model):
     _name = "sale.order"
@@ -1163,15 +1173,74 @@ class SaleOrder(models.Model):
         }
 
     def _compute_kpi(self):
-        for subscription in self:
-            delta_1month = subscription._get_subscription_delta(fields.Date.today() - relativedelta(months=1))
-            delta_3months = subscription._get_subscription_delta(fields.Date.today() - relativedelta(months=3))
-            subscription.write({
-                'kpi_1month_mrr_delta': delta_1month['delta'],
-                'kpi_1month_mrr_percentage': delta_1month['percentage'],
-                'kpi_3months_mrr_delta': delta_3months['delta'],
-                'kpi_3months_mrr_percentage': delta_3months['percentage'],
-            })
+        """ Compute the MRR evolution over the last month and the last 3 months, compared to the last MRR change logged
+        before them (see _get_subscription_delta), for all the subscriptions at once. Only the subscriptions whose KPIs
+        changed are written, grouped by identical values.
+        """
+        if not self:
+            return
+        kpi_fnames = ['kpi_1month_mrr_delta', 'kpi_1month_mrr_percentage', 'kpi_3months_mrr_delta', 'kpi_3months_mrr_percentage']
+        self.flush_recordset(['recurring_monthly', *kpi_fnames])
+        self.env['sale.order.log'].flush_model(['order_id', 'event_type', 'event_date', 'recurring_monthly'])
+        today = fields.Date.today()
+        rows = self.env.execute_query(SQL(
+            """
+            WITH period(months, date) AS (
+                VALUES (1, %(date_1month)s::date), (3, %(date_3months)s::date)
+            ),
+            period_log AS (
+                SELECT DISTINCT ON (log.order_id, period.months)
+                       log.order_id,
+                       period.months,
+                       log.recurring_monthly
+                  FROM sale_order_log log
+                  JOIN period ON log.event_date <= period.date
+                 WHERE log.order_id = ANY(%(order_ids)s)
+                   AND log.event_type IN %(event_types)s
+              ORDER BY log.order_id, period.months, log.event_date DESC, log.id DESC
+            ),
+            kpi AS (
+                SELECT sale_order.id,
+                       COALESCE(COALESCE(sale_order.recurring_monthly, 0) - log_1month.recurring_monthly, 0)::float8 AS delta_1month,
+                       (CASE
+                           WHEN log_1month.recurring_monthly IS NULL THEN 0
+                           WHEN log_1month.recurring_monthly = 0 THEN 100
+                           ELSE (COALESCE(sale_order.recurring_monthly, 0) - log_1month.recurring_monthly) / log_1month.recurring_monthly
+                       END)::float8 AS percentage_1month,
+                       COALESCE(COALESCE(sale_order.recurring_monthly, 0) - log_3months.recurring_monthly, 0)::float8 AS delta_3months,
+                       (CASE
+                           WHEN log_3months.recurring_monthly IS NULL THEN 0
+                           WHEN log_3months.recurring_monthly = 0 THEN 100
+                           ELSE (COALESCE(sale_order.recurring_monthly, 0) - log_3months.recurring_monthly) / log_3months.recurring_monthly
+                       END)::float8 AS percentage_3months,
+                       sale_order.kpi_1month_mrr_delta,
+                       sale_order.kpi_1month_mrr_percentage,
+                       sale_order.kpi_3months_mrr_delta,
+                       sale_order.kpi_3months_mrr_percentage
+                  FROM sale_order
+             LEFT JOIN period_log log_1month ON log_1month.order_id = sale_order.id AND log_1month.months = 1
+             LEFT JOIN period_log log_3months ON log_3months.order_id = sale_order.id AND log_3months.months = 3
+                 WHERE sale_order.id = ANY(%(order_ids)s)
+            )
+            SELECT id, delta_1month, percentage_1month, delta_3months, percentage_3months
+              FROM kpi
+             WHERE (delta_1month, percentage_1month, delta_3months, percentage_3months) IS DISTINCT FROM (
+                       COALESCE(kpi_1month_mrr_delta, 0),
+                       COALESCE(kpi_1month_mrr_percentage, 0),
+                       COALESCE(kpi_3months_mrr_delta, 0),
+                       COALESCE(kpi_3months_mrr_percentage, 0)
+                   )
+            """,
+            date_1month=today - relativedelta(months=1),
+            date_3months=today - relativedelta(months=3),
+            order_ids=self.ids,
+            event_types=('0_creation', '1_expansion', '15_contraction', '2_transfer'),
+        ))
+        subscription_ids_by_kpis = defaultdict(list)
+        for subscription_id, *kpis in rows:
+            subscription_ids_by_kpis[tuple(kpis)].append(subscription_id)
+        for kpis, subscription_ids in subscription_ids_by_kpis.items():
+            self.browse(subscription_ids).write(dict(zip(kpi_fnames, kpis)))
 
     def _get_portal_return_action(self):
         """ Return the action used to display orders when returning from customer portal. """
@@ -1185,12 +1254,21 @@ class SaleOrder(models.Model):
     ####################
 
     @api.model
-    def _cron_recurring_create_invoice(self):
+    def _cron_recurring_create_invoice(self, partition=0):
         deferred_account = self.env.company.deferred_revenue_account_id
         deferred_journal = self.env.company.deferred_revenue_journal_id
         if not deferred_account or not deferred_journal:
             raise ValidationError(_("The deferred settings are not properly set. Please complete them to generate subscription deferred revenues"))
-        return self._create_recurring_invoice()
+        partitions_count = self._get_recurring_invoice_partitions_count()
+        if partitions_count == 1:
+            return self._create_recurring_invoice() if partition == 0 else self.env['account.move']
+        if partition >= partitions_count:
+            return self.env['account.move']
+        if partition == 0:
+            # Wake up the crons of the other partitions, so that they are invoiced at the same time.
+            for cron_xmlid in RECURRING_INVOICE_CRON_XMLIDS[1:partitions_count]:
+                self.env.ref(cron_xmlid)._trigger()
+        return self.with_context(recurring_invoice_partition=partition)._create_recurring_invoice()
 
     def _get_invoiceable_lines(self, final=False):
         date_from = self.env.context.get('invoiceable_date_from', fields.Date.today())
@@ -1427,6 +1505,42 @@ class SaleOrder(models.Model):
                 break
         return self.browse(to_invoice_ids)
 
+    @api.model
+    def _get_recurring_invoice_partitions_count(self):
+        partitions_count = int(self.env['ir.config_parameter'].sudo().get_param('sale_subscription.invoice_partitions', 1) or 1)
+        return max(1, min(partitions_count, len(RECURRING_INVOICE_CRON_XMLIDS)))
+
+    def _filter_recurring_invoice_partition(self):
+        """ Return the subscriptions of self belonging to the partition being invoiced, if any.
+        The partition only depends on the invoice address, so that consolidated invoices are never split between partitions.
+        """
+        partition = self.env.context.get('recurring_invoice_partition')
+        if partition is None:
+            return self
+        partitions_count = self._get_recurring_invoice_partitions_count()
+        return self.filtered(lambda sub: sub.partner_invoice_id.id % partitions_count == partition)
+
+    def _recurring_invoice_claim_partition(self, domain, limit=None):
+        """ Return the ids of the first subscriptions matching domain that belong to the partition being invoiced, at most limit.
+        They are locked until the next commit; the ones currently locked by another transaction are left to the next run.
+        """
+        partition = self.env.context['recurring_invoice_partition']
+        partitions_count = self._get_recurring_invoice_partitions_count()
+        query = self._where_calc(domain)
+        query.add_where(SQL(
+            "COALESCE(%s, 0) %% %s = %s",
+            self._field_to_sql(self._table, 'partner_invoice_id', query), partitions_count, partition,
+        ))
+        # Only the subscriptions processed by this run are locked
+        query.order = SQL.identifier(self._table, 'id')
+        query.limit = limit
+        return [
+            subscription_id
+            for subscription_id, in self.env.execute_query(SQL(
+                "%s FOR UPDATE OF %s SKIP LOCKED", query.select(), SQL.identifier(self._table),
+            ))
+        ]
+
     def _recurring_invoice_get_subscriptions(self, grouped=False, batch_size=30):
         """ Return a boolean and an iterable of recordsets.
         The boolean is true if batch_size is smaller than the number of remaining records
@@ -1440,6 +1554,11 @@ class SaleOrder(models.Model):
         else:
             domain = self._recurring_invoice_domain()
             limit = batch_size and batch_size + 1
+            if self.env.context.get('recurring_invoice_partition') is not None:
+                claimed_ids = self._recurring_invoice_claim_partition(domain, limit=batch_size or None)
+                domain = [('id', 'in', claimed_ids)]
+                # Other subscriptions of the partition may remain, the claimed ones filling the batch
+                need_cron_trigger = bool(batch_size) and len(claimed_ids) >= batch_size
 
         if grouped:
             all_subscriptions = self.read_group(
@@ -1448,13 +1567,13 @@ class SaleOrder(models.Model):
                 self._get_auto_invoice_grouping_keys(),
                 limit=limit, lazy=False)
             all_subscriptions = [self.browse(res['id']) for res in all_subscriptions]
-            need_cron_trigger = batch_size and len(all_subscriptions) > batch_size
+            need_cron_trigger = need_cron_trigger or batch_size and len(all_subscriptions) > batch_size
             # We get a list of record sets when grouped is true. For each record set in all_subscriptions,
             # we call the '_get_subscriptions_to_invoice' method to process them.
             all_subscriptions = [subscription._get_subscriptions_to_invoice() for subscription in all_subscriptions]
         else:
             all_subscriptions = self.search(domain).with_context(limit=limit)._get_subscriptions_to_invoice()
-            need_cron_trigger = batch_size and len(all_subscriptions) > batch_size
+            need_cron_trigger = need_cron_trigger or batch_size and len(all_subscriptions) > batch_size
 
         if batch_size:
             all_subscriptions = all_subscriptions[:batch_size]
@@ -1474,7 +1593,8 @@ class SaleOrder(models.Model):
 
     # The following function is used so that it can be overwritten in test files
     def _subscription_launch_cron_parallel(self, batch_size):
-        self.env.ref('sale_subscription.account_analytic_cron_for_invoice')._trigger()
+        partition = self.env.context.get('recurring_invoice_partition') or 0
+        self.env.ref(RECURRING_INVOICE_CRON_XMLIDS[partition])._trigger()
 
     def _get_subscription_payment_exception_condition(self):
         """ Return a boolean if we agree that the payment_exception should be reset.
@@ -1483,6 +1603,7 @@ class SaleOrder(models.Model):
         return False
 
     def _create_recurring_invoice(self, batch_size=30):
+        start_time = time.perf_counter()
         today = fields.Date.today()
         auto_commit = not bool(config['test_enable'] or config['test_file'])
         grouped_invoice = self.env['ir.config_parameter'].get_param('sale_subscription.invoice_consolidation', False)
@@ -1509,73 +1630,91 @@ class SaleOrder(models.Model):
             # When it is a list, we are creating consolidated invoices and they are removed in the
             # `subscription -= closed_contract`` instruction above.
             all_subscriptions -= self.env['sale.order'].browse(order_to_remove_ids)
-        lines_to_reset_qty = self.env['sale.order.line']
+        invoiceable_lines_by_order = all_invoiceable_lines.grouped('order_id')
         account_moves = self.env['account.move']
         move_to_send_ids = []
+        failures_count = 0
         # Set quantity to invoice before the invoice creation. If something goes wrong, the line will appear as "to invoice"
         # It prevents the use of _compute method and compare the today date and the next_invoice_date in the compute which would be bad for perfs
         all_invoiceable_lines._reset_subscription_qty_to_invoice()
         self._subscription_commit_cursor(auto_commit)
+        subscriptions_to_invoice = []
         for subscription in all_subscriptions:
-            if len(subscription) == 1:
-                subscription = subscription[0]  # Trick to not prefetch other subscriptions is all_subscription is recordset, as the cache is currently invalidated at each iteration
-
             # We check that the subscription should not be processed or that it has not already been set to "in exception" by previous cron failure
             # We only invoice contract in sale state. Locked contracts are invoiced in advance. They are frozen.
             subscription = subscription.filtered(lambda sub: sub.subscription_state == '3_progress' and not sub.payment_exception)
             if not subscription:
                 continue
+            invoiceable_lines = self.env['sale.order.line'].concat(*(
+                invoiceable_lines_by_order.get(sub, self.env['sale.order.line']) for sub in subscription
+            ))
             try:
-                self._subscription_commit_cursor(auto_commit)  # To avoid a rollback in case something is wrong, we create the invoices one by one
-                draft_invoices = subscription.invoice_ids.filtered(lambda am: am.state == 'draft')
-                if subscription.payment_token_id and draft_invoices:
-                    draft_invoices.button_cancel()
-                elif draft_invoices:
-                    # Skip subscription if no payment_token, and it has a draft invoice
-                    continue
-                invoiceable_lines = all_invoiceable_lines.filtered(lambda l: l.order_id.id in subscription.ids)
-                invoice_is_free, is_exception = subscription._invoice_is_considered_free(invoiceable_lines)
-                if not invoiceable_lines or invoice_is_free:
-                    updatable_invoice_date = subscription.filtered(lambda sub: sub.next_invoice_date and sub.next_invoice_date <= today)
-                    if is_exception:
-                        for sub in subscription:
-                            # Mix between recurring and non-recurring lines. We let the contract in exception, it should be
-                            # handled manually
-                            msg_body = _(
-                                "Mix of negative recurring lines and non-recurring line. The contract should be fixed manually",
-                                inv=sub.next_invoice_date
-                            )
-                            sub.message_post(body=msg_body)
-                        subscription.payment_exception = True
-                    # We still update the next_invoice_date if it is due
-                    elif updatable_invoice_date:
-                        updatable_invoice_date._update_next_invoice_date()
-                        if invoice_is_free:
-                            for line in invoiceable_lines:
-                                line.qty_invoiced = line.product_uom_qty
-                            updatable_invoice_date._subscription_post_success_free_renewal()
-                    continue
+                # The savepoint isolates the changes of each subscription, without committing them one by one
+                with self.env.cr.savepoint():
+                    draft_invoices = subscription.invoice_ids.filtered(lambda am: am.state == 'draft')
+                    if subscription.payment_token_id and draft_invoices:
+                        draft_invoices.button_cancel()
+                    elif draft_invoices:
+                        # Skip subscription if no payment_token, and it has a draft invoice
+                        continue
+                    invoice_is_free, is_exception = subscription._invoice_is_considered_free(invoiceable_lines)
+                    if not invoiceable_lines or invoice_is_free:
+                        updatable_invoice_date = subscription.filtered(lambda sub: sub.next_invoice_date and sub.next_invoice_date <= today)
+                        if is_exception:
+                            for sub in subscription:
+                                # Mix between recurring and non-recurring lines. We let the contract in exception, it should be
+                                # handled manually
+                                msg_body = _(
+                                    "Mix of negative recurring lines and non-recurring line. The contract should be fixed manually",
+                                    inv=sub.next_invoice_date
+                                )
+                                sub.message_post(body=msg_body)
+                            subscription.payment_exception = True
+                        # We still update the next_invoice_date if it is due
+                        elif updatable_invoice_date:
+                            updatable_invoice_date._update_next_invoice_date()
+                            if invoice_is_free:
+                                for line in invoiceable_lines:
+                                    line.qty_invoiced = line.product_uom_qty
+                                updatable_invoice_date._subscription_post_success_free_renewal()
+                        continue
+                subscriptions_to_invoice.append(subscription)
+            except Exception:
+                failures_count += 1
+                name_list = [f"{sub.name} {sub.client_order_ref}" for sub in subscription]
+                _logger.exception("Error during renewal of contract %s", "; ".join(name_list))
 
-                try:
-                    invoice = subscription.with_context(recurring_automatic=True)._create_invoices(final=True)
-                    lines_to_reset_qty |= invoiceable_lines
-                except Exception as e:
-                    # We only raise the error in test, if the transaction is broken we should raise the exception
-                    if not auto_commit and isinstance(e, TransactionRollbackError):
-                        raise
-                    # we suppose that the payment is run only once a day
-                    self._subscription_rollback_cursor(auto_commit)
-                    for sub in subscription:
-                        email_context = sub._get_subscription_mail_payment_context()
-                        error_message = _("Error during renewal of contract %s (Payment not recorded)", sub.name)
-                        _logger.exception(error_message)
-                        body = self._get_traceback_body(e, error_message)
-                        mail = self.env['mail.mail'].sudo().create(
-                            {'body_html': body, 'subject': error_message,
-                             'email_to': email_context['responsible_email'], 'auto_delete': True})
-                        mail.send()
-                    continue
-                self._subscription_commit_cursor(auto_commit)
+        invoices_by_subscription = self._recurring_invoice_create_invoices(subscriptions_to_invoice)
+        for subscription in subscriptions_to_invoice:
+            if subscription in invoices_by_subscription:
+                continue
+            try:
+                with self.env.cr.savepoint():
+                    invoices_by_subscription[subscription] = subscription.with_context(recurring_automatic=True)._create_invoices(final=True)
+            except Exception as e:
+                # We only raise the error in test, if the transaction is broken we should raise the exception
+                if not auto_commit and isinstance(e, TransactionRollbackError):
+                    raise
+                failures_count += 1
+                # we suppose that the payment is run only once a day
+                for sub in subscription:
+                    email_context = sub._get_subscription_mail_payment_context()
+                    error_message = _("Error during renewal of contract %s (Payment not recorded)", sub.name)
+                    _logger.exception(error_message)
+                    body = self._get_traceback_body(e, error_message)
+                    mail = self.env['mail.mail'].sudo().create(
+                        {'body_html': body, 'subject': error_message,
+                         'email_to': email_context['responsible_email'], 'auto_delete': True})
+                    mail.send()
+        self._subscription_commit_cursor(auto_commit)
+
+        for subscription in subscriptions_to_invoice:
+            invoice = invoices_by_subscription.get(subscription)
+            if not invoice:
+                continue
+            # The cache is invalidated by the commits done while paying, don't prefetch the other subscriptions of the batch
+            subscription = subscription.with_prefetch()
+            try:
                 # Handle automatic payment or invoice posting
                 existing_invoices = subscription.with_context(recurring_automatic=True)._handle_automatic_invoices(invoice, auto_commit) or self.env['account.move']
                 account_moves |= existing_invoices
@@ -1587,6 +1726,7 @@ class SaleOrder(models.Model):
                     move_to_send_ids += existing_invoices.ids
                 self._subscription_commit_cursor(auto_commit)
             except Exception:
+                failures_count += 1
                 name_list = [f"{sub.name} {sub.client_order_ref}" for sub in subscription]
                 _logger.exception("Error during renewal of contract %s", "; ".join(name_list))
                 self._subscription_rollback_cursor(auto_commit)
@@ -1600,7 +1740,7 @@ class SaleOrder(models.Model):
             if self:
                 invoice_sub = self.filtered('is_subscription')
             else:
-                invoice_sub = self.search([('is_invoice_cron', '=', True)])
+                invoice_sub = self.search([('is_invoice_cron', '=', True)])._filter_recurring_invoice_partition()
 
             try:
                 invoice_sub._post_invoice_hook()
@@ -1610,11 +1750,42 @@ class SaleOrder(models.Model):
                 _logger.exception("Error during post invoice action: %s", e)
                 invoice_sub._handle_post_invoice_hook_exception()
 
-            failing_subscriptions = self.search([('is_batch', '=', True)])
+            failing_subscriptions = self.search([('is_batch', '=', True)])._filter_recurring_invoice_partition()
             (failing_subscriptions | invoice_sub).write({'is_batch': False, 'is_invoice_cron': False})
             self._subscription_commit_cursor(auto_commit)
+
+        partition = self.env.context.get('recurring_invoice_partition')
+        duration = time.perf_counter() - start_time
+        processed_count = sum(len(subscription) for subscription in all_subscriptions)
+        _logger.info(
+            "Recurring invoicing%s: %s subscriptions processed, %s invoices created, %s failures in %.2fs (%.2f subscriptions/s)",
+            "" if partition is None else f" of partition {partition}",
+            processed_count, len(account_moves), failures_count, duration, processed_count / duration if duration else 0.0,
+        )
         return account_moves
 
+    def _recurring_invoice_create_invoices(self, subscriptions_to_invoice):
+        """ Create at once the invoices of the subscriptions that are not consolidated with other ones.
+        :param subscriptions_to_invoice: list of recordsets, each of them being invoiced with a single invoice
+        :return: dict mapping these recordsets to their invoice. If the creation fails, it is empty and the invoices are
+            created one by one, so that the error only affects its subscription.
+        """
+        single_subscriptions = self.env['sale.order'].concat(*(sub for sub in subscriptions_to_invoice if len(sub) == 1))
+        if len(single_subscriptions) < 2:
+            return {}
+        try:
+            with self.env.cr.savepoint():
+                invoices = single_subscriptions.with_context(recurring_automatic=True)._create_invoices(grouped=True, final=True)
+        except Exception:  # noqa: BLE001
+            _logger.info("Creating the invoices of subscriptions %s at once failed, creating them one by one.", single_subscriptions.ids)
+            return {}
+        # Orders without anything to invoice are skipped, their error is raised when invoicing them alone
+        return {
+            invoice.invoice_line_ids.sale_line_ids.order_id: invoice
+            for invoice in invoices
+            if len(invoice.invoice_line_ids.sale_line_ids.order_id) == 1
+        }
+
     def _create_invoices(self, grouped=False, final=False, date=None):
         """ Override to increment periods when needed """
         order_already_invoiced = self.env['sale.order']
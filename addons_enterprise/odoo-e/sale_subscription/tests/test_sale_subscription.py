@@ -909,6 +909,12 @@ class TestSubscription(TestSubscriptionCommon, MockEmail):
         self.assertEqual(self.subscription.kpi_3months_mrr_percentage, 0.5)
         self.assertEqual(self.subscription.health, 'done')
 
+        # The KPIs did not change since the last run, the subscription is not written again
+        with patch.object(SaleOrder, 'write', autospec=True, side_effect=SaleOrder.write) as write_mock:
+            self.subscription._cron_update_kpi()
+        self.assertFalse(write_mock.called)
+        self.assertEqual(self.subscription.kpi_1month_mrr_delta, 20.0)
+
     def test_onchange_date_start(self):
         recurring_bound_tmpl = self.env['sale.order.template'].create({
             'name': 'Recurring Bound Template',
@@ -5311,3 +5317,31 @@ class TestSubscriptionInvoiceSignature(TestInvoiceSignature, TestSubscription):
 
             invoice_2._post()
             self.assertEqual(invoice_2.state, 'posted', 'Second invoice should be posted successfully')
+
+    def test_recurring_invoice_partitions(self):
+        """ Each partition cron only invoices the subscriptions of its own customers, with a single invoice per subscription. """
+        self.env['ir.config_parameter'].set_param('sale_subscription.invoice_partitions', 2)
+        partners = self.env['res.partner'].create([{'name': f"Partition Customer {index}"} for index in range(4)])
+        with freeze_time("2021-01-03"):
+            subscriptions = self.env['sale.order'].create([{
+                'is_subscription': True,
+                'plan_id': self.plan_month.id,
+                'partner_id': partner.id,
+                'order_line': [Command.create({'product_id': self.product.id, 'product_uom_qty': 1.0})],
+            } for partner in partners])
+            subscriptions.action_confirm()
+            subscriptions_by_partition = [
+                subscriptions.filtered(lambda sub: sub.partner_invoice_id.id % 2 == partition)
+                for partition in range(2)
+            ]
+
+            self.env['sale.order']._cron_recurring_create_invoice(partition=0)
+            for sub in subscriptions:
+                self.assertEqual(sub.invoice_count, 1 if sub in subscriptions_by_partition[0] else 0)
+
+            self.env['sale.order']._cron_recurring_create_invoice(partition=1)
+            for sub in subscriptions:
+                self.assertEqual(sub.invoice_count, 1)
+                self.assertEqual(sub.invoice_ids.invoice_line_ids.sale_line_ids.order_id, sub)
+                self.assertEqual(sub.next_invoice_date, datetime.date(2021, 2, 3))
+            self.assertFalse(any(subscriptions.mapped('is_invoice_cron')))
@@ -11,3 +11,10 @@ class ResConfigSettings(models.TransientModel):
         help="Consolidate all of a customer's subscriptions that are due to be billed on the same day onto a single invoice.",
         config_parameter='sale_subscription.invoice_consolidation',
     )
+    invoice_partitions = fields.Integer(
+        string="Recurring Invoicing Partitions",
+        help="Number of cron workers generating the recurring invoices at the same time (at most 4), each of them invoicing "
+             "the subscriptions of its own customers.",
+        config_parameter='sale_subscription.invoice_partitions',
+        default=1,
+    )
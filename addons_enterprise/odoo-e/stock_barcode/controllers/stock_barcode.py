@@ -4,7 +4,7 @@ from collections import defaultdict
 
 from odoo import fields, http, _
 from odoo.http import request
-from odoo.exceptions import UserError
+from odoo.exceptions import UserError, ValidationError
 from odoo.osv import expression
 from odoo.tools import pdf, split_every
 from odoo.tools.misc import file_open
@@ -33,34 +33,45 @@ class StockBarcodeController(http.Controller):
                 barcode = res.get('code', barcode)
                 break
 
+        # Finds which of the models below have a record with this barcode at once, to only try to open those.
+        matching_models = self._search_barcode_res_ids({
+            model_name: self._get_barcode_index_keys(model_name, barcode)
+            for model_name in ['stock.picking', 'stock.picking.type', 'stock.location', 'product.product', 'stock.lot', 'stock.quant.package']
+        })
+
         if not barcode_type:
-            ret_open_picking = self._try_open_picking(barcode)
-            if ret_open_picking:
-                return ret_open_picking
+            if 'stock.picking' in matching_models:
+                ret_open_picking = self._try_open_picking(barcode)
+                if ret_open_picking:
+                    return ret_open_picking
 
-            ret_open_picking_type = self._try_open_picking_type(barcode)
-            if ret_open_picking_type:
-                return ret_open_picking_type
+            if 'stock.picking.type' in matching_models:
+                ret_open_picking_type = self._try_open_picking_type(barcode)
+                if ret_open_picking_type:
+                    return ret_open_picking_type
 
         if request.env.user.has_group('stock.group_stock_multi_locations') and \
-           (not barcode_type or barcode_type in ['location', 'dest_location']):
+           (not barcode_type or barcode_type in ['location', 'dest_location']) and \
+           'stock.location' in matching_models:
             ret_new_internal_picking = self._try_new_internal_picking(barcode)
             if ret_new_internal_picking:
                 return ret_new_internal_picking
 
-        if not barcode_type or barcode_type == 'product':
+        if (not barcode_type or barcode_type == 'product') and 'product.product' in matching_models:
             ret_open_product_location = self._try_open_product_location(barcode)
             if ret_open_product_location:
                 return ret_open_product_location
 
         if request.env.user.has_group('stock.group_production_lot') and \
-           (not barcode_type or barcode_type == 'lot'):
+           (not barcode_type or barcode_type == 'lot') and \
+           'stock.lot' in matching_models:
             ret_open_lot = self._try_open_lot(barcode)
             if ret_open_lot:
                 return ret_open_lot
 
         if request.env.user.has_group('stock.group_tracking_lot') and \
-           (not barcode_type or barcode_type == 'package'):
+           (not barcode_type or barcode_type == 'package') and \
+           'stock.quant.package' in matching_models:
             ret_open_package = self._try_open_package(barcode)
             if ret_open_package:
                 return ret_open_package
@@ -171,37 +182,19 @@ class StockBarcodeController(http.Controller):
             barcodes = kwargs.get('barcodes') or [kwargs.get('barcode')]
             barcodes_by_model = {model_name: barcodes for model_name in barcode_field_by_model.keys()}
 
+        indexed_models = request.env['stock.barcode.index']._get_indexed_models()
+        res_ids_by_model = self._search_barcode_res_ids({
+            model_name: barcodes
+            for model_name, barcodes in barcodes_by_model.items()
+            if model_name in indexed_models
+        })
         for model_name, barcodes in barcodes_by_model.items():
             if not barcodes:
                 continue
-            barcode_field = request.env[model_name]._barcode_field
-            domain = [(barcode_field, 'in', barcodes)]
-
-            if nomenclature.is_gs1_nomenclature:
-                # If we use GS1 nomenclature, the domain might need some adjustments.
-                converted_barcodes_domain = []
-                unconverted_barcodes = []
-                for barcode in set(barcodes):
-                    try:
-                        # If barcode is digits only, cut off the padding to keep the original barcode only.
-                        barcode = str(int(barcode))
-                        if converted_barcodes_domain:
-                            converted_barcodes_domain = expression.OR([
-                                converted_barcodes_domain,
-                                [(barcode_field, 'ilike', barcode)]
-                            ])
-                        else:
-                            converted_barcodes_domain = [(barcode_field, 'ilike', barcode)]
-                    except ValueError:
-                        unconverted_barcodes.append(barcode)
-                        pass  # Barcode isn't digits only.
-                if converted_barcodes_domain:
-                    domain = converted_barcodes_domain
-                    if unconverted_barcodes:
-                        domain = expression.OR([
-                            domain,
-                            [(barcode_field, 'in', unconverted_barcodes)]
-                        ])
+            if model_name in indexed_models:
+                domain = [('id', 'in', res_ids_by_model.get(model_name, []))]
+            else:
+                domain = self._get_barcode_domain(model_name, barcodes, nomenclature)
             # Adds additionnal domain if applicable.
             domain_for_this_model = domains_by_model.get(model_name)
             if domain_for_this_model:
@@ -236,36 +229,17 @@ class StockBarcodeController(http.Controller):
         nomenclature = request.env.company.nomenclature_id
         result = defaultdict(list)
 
+        indexed_models = request.env['stock.barcode.index']._get_indexed_models()
+        res_ids_by_model = self._search_barcode_res_ids({
+            model_name: barcodes
+            for model_name, barcodes in kwargs.items()
+            if model_name in indexed_models
+        })
         for model_name, barcodes in kwargs.items():
-            barcode_field = request.env[model_name]._barcode_field
-            domain = [(barcode_field, 'in', barcodes)]
-
-            if nomenclature.is_gs1_nomenclature:
-                # If we use GS1 nomenclature, the domain might need some adjustments.
-                converted_barcodes_domain = []
-                unconverted_barcodes = []
-                for barcode in barcodes:
-                    try:
-                        # If barcode is digits only, cut off the padding to keep the original barcode only.
-                        barcode = str(int(barcode))
-                        if converted_barcodes_domain:
-                            converted_barcodes_domain = expression.OR([
-                                converted_barcodes_domain,
-                                [(barcode_field, 'ilike', barcode)]
-                            ])
-                        else:
-                            converted_barcodes_domain = [(barcode_field, 'ilike', barcode)]
-                    except ValueError:
-                        unconverted_barcodes.append(barcode)
-                        pass  # Barcode isn't digits only.
-                if converted_barcodes_domain:
-                    domain = converted_barcodes_domain
-                    if unconverted_barcodes:
-                        domain = expression.OR([
-                            domain,
-                            [(barcode_field, 'in', unconverted_barcodes)]
-                        ])
-
+            if model_name in indexed_models:
+                domain = [('id', 'in', res_ids_by_model.get(model_name, []))]
+            else:
+                domain = self._get_barcode_domain(model_name, barcodes, nomenclature)
             records = request.env[model_name].search(domain)
             fetched_data = self._get_records_fields_stock_barcode(records)
             for f_model_name in fetched_data:
@@ -309,9 +283,7 @@ class StockBarcodeController(http.Controller):
         """ If barcode represent a lot, open a form view to show all
         the details of this lot.
         """
-        result = request.env['stock.lot'].search_read([
-            ('name', '=', barcode),
-        ], ['id', 'display_name'], limit=1)
+        result = self._search_by_barcode('stock.lot', barcode, limit=1).read(['id', 'display_name'])
         if result:
             return {
                 'action': {
@@ -328,9 +300,7 @@ class StockBarcodeController(http.Controller):
         """ If barcode represent a product, open a list/kanban view to show all
         the locations of this product.
         """
-        result = request.env['product.product'].search_read([
-            ('barcode', '=', barcode),
-        ], ['id', 'display_name'], limit=1)
+        result = self._search_by_barcode('product.product', barcode, limit=1).read(['id', 'display_name'])
         if result:
             tree_view_id = request.env.ref('stock.view_stock_quant_tree').id
             kanban_view_id = request.env.ref('stock_barcode.stock_quant_barcode_kanban_2').id
@@ -352,8 +322,7 @@ class StockBarcodeController(http.Controller):
         """ If barcode represent a picking type, open a new
         picking with this type
         """
-        picking_type = request.env['stock.picking.type'].search([
-            ('barcode', '=', barcode),
+        picking_type = self._search_by_barcode('stock.picking.type', barcode, [
             ('company_id', 'in', [False, *self._get_allowed_company_ids()]),
         ], limit=1)
         if picking_type:
@@ -365,9 +334,7 @@ class StockBarcodeController(http.Controller):
     def _try_open_picking(self, barcode):
         """ If barcode represents a picking, open it
         """
-        corresponding_picking = request.env['stock.picking'].search([
-            ('name', '=', barcode),
-        ], limit=1)
+        corresponding_picking = self._search_by_barcode('stock.picking', barcode, limit=1)
         if corresponding_picking:
             action = corresponding_picking.action_open_picking_client_action()
             return {'action': action}
@@ -376,7 +343,7 @@ class StockBarcodeController(http.Controller):
     def _try_open_package(self, barcode):
         """ If barcode represents a package, open it.
         """
-        package = request.env['stock.quant.package'].search([('name', '=', barcode)], limit=1)
+        package = self._search_by_barcode('stock.quant.package', barcode, limit=1)
         if package:
             view_id = request.env.ref('stock.view_quant_package_form').id
             return {
@@ -394,8 +361,7 @@ class StockBarcodeController(http.Controller):
     def _try_new_internal_picking(self, barcode):
         """ If barcode represents a location, open a new picking from this location
         """
-        corresponding_location = request.env['stock.location'].search([
-            ('barcode', '=', barcode),
+        corresponding_location = self._search_by_barcode('stock.location', barcode, [
             ('usage', '=', 'internal'),
             ("company_id", "=", self._get_allowed_company_ids()[0])
         ], limit=1)
@@ -483,6 +449,81 @@ class StockBarcodeController(http.Controller):
             "barcode.rule": nomenclature.rule_ids.read(load=False)
         }
 
+    def _get_barcode_gs1_types(self):
+        """ Returns the types of the GS1 rules whose data is the barcode of the records of a model, by model. """
+        return {
+            'product.product': ['product'],
+            'stock.lot': ['lot'],
+            'stock.location': ['location', 'location_dest'],
+            'stock.quant.package': ['package'],
+        }
+
+    def _get_barcode_index_keys(self, model_name, barcode):
+        """ Returns the barcodes to look for in the barcode index to find the records of the model scanned with the
+        given barcode: with the GS1 nomenclature, the data of the barcode's rules matching the model, if any.
+        """
+        nomenclature = request.env.company.nomenclature_id
+        gs1_types = self._get_barcode_gs1_types().get(model_name)
+        if not nomenclature.is_gs1_nomenclature or not gs1_types:
+            return [barcode]
+        try:
+            parsed_results = nomenclature.parse_barcode(barcode) or []
+        except (ValidationError, ValueError):
+            parsed_results = []
+        if not isinstance(parsed_results, list):
+            return [barcode]
+        return [str(result['value']) for result in parsed_results if result['type'] in gs1_types] or [barcode]
+
+    def _search_barcode_res_ids(self, barcodes_by_model):
+        """ Returns {model_name: res_ids} of the records having one of the given barcodes, for the indexed models.
+        With the GS1 nomenclature, digits-only barcodes match regardless of their zero padding.
+        """
+        return request.env['stock.barcode.index']._search_res_ids(
+            barcodes_by_model,
+            unpadded=request.env.company.nomenclature_id.is_gs1_nomenclature,
+        )
+
+    def _search_by_barcode(self, model_name, barcode, domain=None, limit=None):
+        """ Searches the records of the model scanned with the given barcode, through the barcode index. """
+        res_ids = self._search_barcode_res_ids({
+            model_name: self._get_barcode_index_keys(model_name, barcode),
+        }).get(model_name)
+        if not res_ids:
+            return request.env[model_name]
+        return request.env[model_name].search(expression.AND([[('id', 'in', res_ids)], domain or []]), limit=limit)
+
+    def _get_barcode_domain(self, model_name, barcodes, nomenclature):
+        """ Returns the domain of the records of a model not in the barcode index having one of the given barcodes. """
+        barcode_field = request.env[model_name]._barcode_field
+        domain = [(barcode_field, 'in', barcodes)]
+
+        if nomenclature.is_gs1_nomenclature:
+            # If we use GS1 nomenclature, the domain might need some adjustments.
+            converted_barcodes_domain = []
+            unconverted_barcodes = []
+            for barcode in set(barcodes):
+                try:
+                    # If barcode is digits only, cut off the padding to keep the original barcode only.
+                    barcode = str(int(barcode))
+                    if converted_barcodes_domain:
+                        converted_barcodes_domain = expression.OR([
+                            converted_barcodes_domain,
+                            [(barcode_field, 'ilike', barcode)]
+                        ])
+                    else:
+                        converted_barcodes_domain = [(barcode_field, 'ilike', barcode)]
+                except ValueError:
+                    unconverted_barcodes.append(barcode)
+                    pass  # Barcode isn't digits only.
+            if converted_barcodes_domain:
+                domain = converted_barcodes_domain
+                if unconverted_barcodes:
+                    domain = expression.OR([
+                        domain,
+                        [(barcode_field, 'in', unconverted_barcodes)]
+                    ])
+        return domain
+
     def _get_barcode_field_by_model(self):
         list_model = [
             'stock.location',
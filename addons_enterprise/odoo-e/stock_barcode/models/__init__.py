@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+from . import stock_barcode_index
 from . import stock_picking
 from . import stock_picking_type
 from . import stock_quant
@@ -12,6 +13,7 @@ from . import stock_lot
 from . import stock_quant_package
 from . import stock_warehouse
 from . import product_product
+from . import product_template
 from . import product_packaging
 from . import res_config_settings
 from . import res_partner
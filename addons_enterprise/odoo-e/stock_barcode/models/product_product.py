@@ -3,10 +3,11 @@
 
 from odoo import api, fields, models
 from odoo.osv import expression
+from odoo.tools import SQL
 
 
 class Product(models.Model):
-    _inherit = 'product.product'
+    _inherit = ['product.product', 'stock.barcode.index.mixin']
     _barcode_field = 'barcode'
 
     has_image = fields.Boolean(compute='_compute_has_image')
@@ -22,6 +23,21 @@ class Product(models.Model):
         domain = self.env.company.sudo().nomenclature_id._preprocess_gs1_search_args(domain, ['product'])
         return super()._search(domain, offset=offset, limit=limit, order=order)
 
+    @api.model
+    def _get_barcode_index_query(self, ids=None):
+        # The company of the variants is the one of their template.
+        self.flush_model(['barcode', 'product_tmpl_id'])
+        self.env['product.template'].flush_model(['company_id'])
+        return SQL(
+            """
+                SELECT product_product.id AS res_id, product_product.barcode, product_template.company_id
+                  FROM product_product
+                  JOIN product_template ON product_template.id = product_product.product_tmpl_id
+                 WHERE %s
+            """,
+            SQL("product_product.id = ANY(%s)", ids) if ids is not None else SQL("TRUE"),
+        )
+
     @api.model
     def _get_fields_stock_barcode(self):
         return [
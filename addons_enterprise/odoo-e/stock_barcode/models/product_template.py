@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+from odoo import models
+
+
+class ProductTemplate(models.Model):
+    _inherit = 'product.template'
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'company_id' in vals:
+            variants = self.with_context(active_test=False).product_variant_ids
+            self.env['stock.barcode.index']._refresh(variants)
+        return res
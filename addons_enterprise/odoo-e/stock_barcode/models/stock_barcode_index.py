@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo. See LICENSE file for full copyright and licensing details.
+
+import re
+
+from odoo import api, fields, models
+from odoo.tools import SQL, create_index
+
+
+class StockBarcodeIndex(models.Model):
+    """ Barcodes of the records that can be scanned in the Barcode application,
+    so a scan is resolved with one indexed lookup, whatever the model of the
+    scanned record is. It is maintained by the models inheriting from
+    'stock.barcode.index.mixin'. """
+    _name = 'stock.barcode.index'
+    _description = "Barcode Index"
+    _log_access = False
+
+    res_model = fields.Char("Model", required=True, readonly=True)
+    res_id = fields.Many2oneReference("Record", model_field='res_model', required=True, readonly=True)
+    barcode = fields.Char(required=True, readonly=True)
+    kind = fields.Selection(
+        selection=[
+            ('exact', "Exact"),
+            ('unpadded', "Unpadded"),
+        ],
+        required=True,
+        readonly=True,
+        help="Exact barcodes are the barcodes of the records as they are; unpadded barcodes are the digits-only ones "
+             "without their leading zeros, used to find them from a GS1 barcode.",
+    )
+    company_id = fields.Many2one('res.company', readonly=True, ondelete='cascade')
+
+    def init(self):
+        super().init()
+        create_index(
+            self.env.cr,
+            indexname='stock_barcode_index_barcode_idx',
+            tablename=self._table,
+            expressions=['barcode', 'res_model', 'kind'],
+        )
+        create_index(
+            self.env.cr,
+            indexname='stock_barcode_index_res_model_res_id_idx',
+            tablename=self._table,
+            expressions=['res_model', 'res_id'],
+        )
+
+    @api.model
+    def _get_indexed_models(self):
+        return [
+            model_name
+            for model_name in self.env.registry.descendants(['stock.barcode.index.mixin'], '_inherit')
+            if not self.env[model_name]._abstract
+        ]
+
+    @api.model
+    def _unpad(self, barcode):
+        """ Returns the barcode without its leading zeros if it is digits only, as GS1 barcodes are zero-padded. """
+        if re.fullmatch('[0-9]+', barcode):
+            return barcode.lstrip('0') or barcode
+        return barcode
+
+    @api.model
+    def _search_res_ids(self, barcodes_by_model, unpadded=False):
+        """ Returns the ids of the records having one of the given barcodes, in one lookup.
+
+        :param dict barcodes_by_model: the scanned barcodes for each indexed model;
+        :param bool unpadded: whether the digits-only barcodes match regardless of their leading zeros, as with the GS1
+          nomenclature;
+        :returns: {res_model: res_ids}, for the models having at least a matching record of the current companies.
+        """
+        res_models = []
+        barcodes = []
+        for res_model, model_barcodes in barcodes_by_model.items():
+            for barcode in set(model_barcodes):
+                if barcode:
+                    res_models.append(res_model)
+                    barcodes.append(self._unpad(barcode) if unpadded else barcode)
+        if not barcodes:
+            return {}
+
+        rows = self.env.execute_query(SQL(
+            """
+                SELECT barcode_index.res_model, ARRAY_AGG(DISTINCT barcode_index.res_id)
+                  FROM UNNEST(%(res_models)s::varchar[], %(barcodes)s::varchar[]) AS scanned(res_model, barcode)
+                  JOIN stock_barcode_index AS barcode_index
+                    ON barcode_index.barcode = scanned.barcode
+                   AND barcode_index.res_model = scanned.res_model
+                 WHERE %(kind_sql)s
+                   AND (barcode_index.company_id IS NULL OR barcode_index.company_id = ANY(%(company_ids)s))
+              GROUP BY barcode_index.res_model
+            """,
+            res_models=res_models,
+            barcodes=barcodes,
+            kind_sql=SQL("TRUE") if unpadded else SQL("barcode_index.kind = 'exact'"),
+            company_ids=self.env.companies.ids,
+        ))
+        return dict(rows)
+
+    @api.model
+    def _rebuild(self):
+        """ Recomputes the barcodes of all the records of the indexed models. """
+        self.env.cr.execute(SQL("DELETE FROM %s", SQL.identifier(self._table)))
+        for model_name in self._get_indexed_models():
+            self._insert_barcodes(self.env[model_name])
+
+    @api.model
+    def _refresh(self, records):
+        """ Recomputes the barcodes of the given records, after their barcode or company changed. """
+        if not records:
+            return
+        self._remove(records)
+        self._insert_barcodes(records, ids=records.ids)
+
+    @api.model
+    def _remove(self, records):
+        if not records:
+            return
+        self.env.cr.execute(SQL(
+            "DELETE FROM stock_barcode_index WHERE res_model = %s AND res_id = ANY(%s)",
+            records._name, records.ids,
+        ))
+
+    @api.model
+    def _insert_barcodes(self, model, ids=None):
+        self.env.cr.execute(SQL(
+            r"""
+                WITH indexed_record AS (%(records_query)s)
+                INSERT INTO stock_barcode_index (res_model, res_id, barcode, kind, company_id)
+                SELECT %(res_model)s, res_id, barcode, 'exact', company_id
+                  FROM indexed_record
+                 WHERE barcode != ''
+
+                 UNION ALL
+
+                SELECT %(res_model)s, res_id, LTRIM(barcode, '0'), 'unpadded', company_id
+                  FROM indexed_record
+                 WHERE barcode ~ '^0+[1-9][0-9]*$'
+            """,
+            records_query=model._get_barcode_index_query(ids=ids),
+            res_model=model._name,
+        ))
+
+    @api.autovacuum
+    def _gc_barcodes(self):
+        """ Removes the barcodes of the records deleted without going through their unlink, e.g. by a cascade. """
+        for model_name in self._get_indexed_models():
+            self.env.cr.execute(SQL(
+                """
+                    DELETE FROM stock_barcode_index AS barcode_index
+                     WHERE barcode_index.res_model = %s
+                       AND NOT EXISTS (SELECT 1 FROM %s AS record WHERE record.id = barcode_index.res_id)
+                """,
+                model_name, SQL.identifier(self.env[model_name]._table),
+            ))
+
+
+class StockBarcodeIndexMixin(models.AbstractModel):
+    """ Keeps the barcodes of the records, held by their '_barcode_field',
+    in the barcode index. """
+    _name = 'stock.barcode.index.mixin'
+    _description = "Barcode Indexed Records"
+
+    def init(self):
+        super().init()
+        if self._abstract:
+            return
+        # Indexes the existing records when the model starts being indexed.
+        self.env.cr.execute(SQL("SELECT 1 FROM stock_barcode_index WHERE res_model = %s LIMIT 1", self._name))
+        if not self.env.cr.rowcount:
+            self.env['stock.barcode.index']._insert_barcodes(self)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['stock.barcode.index']._refresh(records)
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if self._barcode_field in vals or 'company_id' in vals:
+            self.env['stock.barcode.index']._refresh(self)
+        return res
+
+    def unlink(self):
+        self.env['stock.barcode.index']._remove(self)
+        return super().unlink()
+
+    @api.model
+    def _get_barcode_index_query(self, ids=None):
+        """ Returns a query selecting the (res_id, barcode, company_id) of the records to index, all of them or the ones
+        of the given ids. """
+        self.flush_model([self._barcode_field, 'company_id'])
+        table = self._table
+        return SQL(
+            "SELECT %s AS res_id, %s AS barcode, %s AS company_id FROM %s WHERE %s",
+            SQL.identifier(table, 'id'),
+            SQL.identifier(table, self._barcode_field),
+            SQL.identifier(table, 'company_id'),
+            SQL.identifier(table),
+            SQL("%s = ANY(%s)", SQL.identifier(table, 'id'), ids) if ids is not None else SQL("TRUE"),
+        )
@@ -5,7 +5,7 @@ from odoo import api, models
 
 
 class PackageType(models.Model):
-    _inherit = 'stock.package.type'
+    _inherit = ['stock.package.type', 'stock.barcode.index.mixin']
     _barcode_field = 'barcode'
 
     @api.model
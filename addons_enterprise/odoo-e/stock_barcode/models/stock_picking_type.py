@@ -3,7 +3,8 @@ from odoo.exceptions import UserError
 
 
 class StockPickingType(models.Model):
-    _inherit = 'stock.picking.type'
+    _inherit = ['stock.picking.type', 'stock.barcode.index.mixin']
+    _barcode_field = 'barcode'
 
     barcode_allow_extra_product = fields.Boolean(
         "Allow extra products", default=True,
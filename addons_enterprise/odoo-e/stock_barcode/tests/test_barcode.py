@@ -277,3 +277,46 @@ class TestBarcodeClientAction(HttpCase):
 
         action = self.env['stock.picking'].with_context(active_id=warehouse.out_type_id.id).filter_on_barcode(lot.name)
         self.assertEqual(action['action']['context']['search_default_lot_id'], lot.id)
+
+    def test_barcode_index(self):
+        """ Checks the barcode index follows the barcodes and companies of the
+        records, and finds them from their exact barcode or, as with the GS1
+        nomenclature, from their barcode with any zero padding.
+        """
+        BarcodeIndex = self.env['stock.barcode.index'].with_context(allowed_company_ids=self.env.company.ids)
+        product1 = self.env['product.product'].create({
+            'name': 'product1',
+            'barcode': '01304510',
+            'is_storable': True,
+            'tracking': 'lot',
+        })
+        product2 = self.env['product.product'].create({
+            'name': 'product2',
+            'barcode': '73411048',
+        })
+        lot = self.env['stock.lot'].create({
+            'name': 'lot1',
+            'product_id': product1.id,
+        })
+
+        self.assertEqual(
+            BarcodeIndex._search_res_ids({'product.product': ['01304510'], 'stock.lot': ['lot1']}),
+            {'product.product': product1.ids, 'stock.lot': lot.ids},
+        )
+        self.assertEqual(
+            BarcodeIndex._search_res_ids({'product.product': ['00000001304510'], 'stock.lot': ['01304510']}),
+            {},
+            "Padded barcodes should only match when asked to",
+        )
+        self.assertEqual(
+            BarcodeIndex._search_res_ids({'product.product': ['00000001304510', '73411048']}, unpadded=True),
+            {'product.product': (product1 | product2).ids},
+        )
+
+        product1.barcode = '99999999'
+        product2.product_tmpl_id.company_id = self.env['res.company'].create({'name': 'Other Company'})
+        lot.unlink()
+        self.assertEqual(
+            BarcodeIndex._search_res_ids({'product.product': ['01304510', '99999999', '73411048'], 'stock.lot': ['lot1']}),
+            {'product.product': product1.ids},
+        )
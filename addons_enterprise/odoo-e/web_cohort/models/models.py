@@ -71,39 +71,68 @@ class Base(models.AbstractModel):
             today = date.today()
             convert_method = fields.Date.to_date
 
+        def _get_row_range_domain(group_value):
+            return ['&', (date_start, '>=', group_value), (date_start, '<', group_value + models.READ_GROUP_TIME_GRANULARITY[interval])]
+
+        def _get_col_dates(group_value, col):
+            col_start_date = group_value
+            if interval == 'day':
+                col_start_date += relativedelta(days=col)
+                col_end_date = col_start_date + relativedelta(days=1)
+            elif interval == 'week':
+                col_start_date += relativedelta(days=7 * col)
+                col_end_date = col_start_date + relativedelta(days=7)
+            elif interval == 'month':
+                col_start_date += relativedelta(months=col)
+                col_end_date = col_start_date + relativedelta(months=1)
+            else:
+                col_start_date += relativedelta(years=col)
+                col_end_date = col_start_date + relativedelta(years=1)
+            return col_start_date, col_end_date
+
+        # The whole matrix is aggregated at once, by (start period, stop period)
+        cell_groups = self._read_group(
+            domain=domain,
+            groupby=[date_start + ':' + interval, date_stop + ':' + interval],
+            aggregates=[measure],
+        )
+        sub_group_per_row = defaultdict(dict)
+        for group_value, stop_group_value, aggregate_value in cell_groups:
+            sub_group_per_row[group_value][convert_method(stop_group_value)] = aggregate_value
+
+        # Values of the rows still remaining before their first column in
+        # backward timeline, for all the rows at once
+        initial_value_per_row = {}
+        if timeline == 'backward' and row_groups:
+            outside_timeline_domain = expression.AND([domain, expression.OR([
+                expression.AND([
+                    _get_row_range_domain(group_value),
+                    ['|',
+                        (date_stop, '=', False),
+                        (date_stop, '>=', fields.Datetime.to_string(_get_col_dates(group_value, -15)[0])),
+                    ],
+                ])
+                for group_value, dummy, dummy in row_groups
+            ])])
+            initial_value_per_row = dict(self._read_group(
+                domain=outside_timeline_domain,
+                groupby=[date_start + ':' + interval],
+                aggregates=[measure],
+            ))
+
         for group_value, sum_value, value in row_groups:
             total_value += value
             group_domain = expression.AND([
                 domain,
-                ['&', (date_start, '>=', group_value), (date_start, '<', group_value + models.READ_GROUP_TIME_GRANULARITY[interval])]
+                _get_row_range_domain(group_value),
             ])
-            sub_group = self._read_group(
-                domain=group_domain,
-                groupby=[date_stop + ':' + interval],
-                aggregates=[measure],
-            )
-            sub_group_per_period = {
-                convert_method(group_value): aggregate_value
-                for group_value, aggregate_value in sub_group
-            }
+            sub_group_per_period = sub_group_per_row[group_value]
 
             columns = []
             initial_value = sum_value
             col_range = range(-15, 1) if timeline == 'backward' else range(0, 16)
             for col_index, col in enumerate(col_range):
-                col_start_date = group_value
-                if interval == 'day':
-                    col_start_date += relativedelta(days=col)
-                    col_end_date = col_start_date + relativedelta(days=1)
-                elif interval == 'week':
-                    col_start_date += relativedelta(days=7 * col)
-                    col_end_date = col_start_date + relativedelta(days=7)
-                elif interval == 'month':
-                    col_start_date += relativedelta(months=col)
-                    col_end_date = col_start_date + relativedelta(months=1)
-                else:
-                    col_start_date += relativedelta(years=col)
-                    col_end_date = col_start_date + relativedelta(years=1)
+                col_start_date, col_end_date = _get_col_dates(group_value, col)
 
                 if col_start_date > today:
                     columns_avg[col_index]
@@ -119,20 +148,7 @@ class Base(models.AbstractModel):
                 # In backward timeline, if columns are out of given range, we need
                 # to set initial value for calculating correct percentage
                 if timeline == 'backward' and col_index == 0:
-                    outside_timeline_domain = expression.AND(
-                        [
-                            group_domain,
-                            ['|',
-                                (date_stop, '=', False),
-                                (date_stop, '>=', fields.Datetime.to_string(col_start_date)),
-                            ]
-                        ]
-                    )
-                    col_group = self._read_group(
-                        domain=outside_timeline_domain,
-                        aggregates=[measure],
-                    )
-                    initial_value = float(col_group[0][0])
+                    initial_value = float(initial_value_per_row.get(group_value) or 0.0)
                     initial_churn_value = sum_value - initial_value
 
                 previous_col_remaining_value = initial_value if col_index == 0 else columns[-1]['value']
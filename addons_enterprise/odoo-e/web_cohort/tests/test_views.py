@@ -1,4 +1,5 @@
 from dateutil.relativedelta import relativedelta
+from unittest.mock import patch
 
 from odoo import Command, fields
 
@@ -89,3 +90,17 @@ class TestViews(ViewCase):
              relativedelta(months=3)).replace(day=1)),
         ]
         self.assertEqual(second_row['domain'], expected_period_domain)
+
+        # the whole matrix is computed with a fixed number of queries, whatever the number of rows
+        Stuff = type(self.env['x_stuff'])
+        for timeline, read_group_count in (('forward', 2), ('backward', 3)):
+            with patch.object(Stuff, '_read_group', autospec=True, side_effect=Stuff._read_group) as read_group_mock:
+                cohort = self.env['x_stuff'].get_cohort_data(
+                    'x_date_start', 'x_date_stop', '__count', 'month', [], 'churn', timeline)
+            self.assertEqual(read_group_mock.call_count, read_group_count)
+            self.assertEqual(len(cohort['rows']), 2)
+
+        # in backward timeline, the stuffs are all remaining 15 months before they started
+        second_row = cohort['rows'][1]
+        self.assertEqual([col['value'] for col in second_row['columns']], [1.0] * 16)
+        self.assertEqual([col['churn_value'] for col in second_row['columns']], [0.0] * 16)